@@ -2,20 +2,81 @@
 blockchain.py — Local file-based blockchain
 =============================================
 Each block stores a project ID + its combined hash.
-The chain is persisted as `blockchain.json`.
+The chain is persisted as an append-only segment log in `ledger/`:
+
+    ledger/segment-000000.jsonl   one compact JSON block per line
+    ledger/segment-000001.jsonl   (a new segment every SEGMENT_MAX_BLOCKS blocks)
+    ledger/tail.json              last fsynced position, replaced atomically
+                                  (rebuilt by scanning the segments if lost)
+    ledger/checkpoints.jsonl      hash-chained checkpoints every K blocks
+
+Appending a block writes one line; fsync and the tail pointer update are
+batched every `sync_every` blocks (and on flush/close). A legacy
+`blockchain.json` is imported into the log the first time it is opened.
+
+Checkpoints let validation start from the last trusted block instead of
+genesis. Each checkpoint commits to its block hash and to the previous
+checkpoint; set LEDGER_CHECKPOINT_KEY to sign them with HMAC-SHA256.
 """
 
 import hashlib
+import hmac
 import json
 import os
+import sys
+import tempfile
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
+from typing import Iterable, Optional, Union
+
+
+HASHING_DIR = os.path.dirname(os.path.abspath(__file__))
+BLOCKCHAIN_FILE = os.path.join(HASHING_DIR, "blockchain.json")
+LEDGER_DIR = os.path.join(HASHING_DIR, "ledger")
+
+TAIL_FILE = "tail.json"
+SEGMENT_MAX_BLOCKS = 100_000
+SYNC_EVERY = 64
 
+CHECKPOINT_FILE = "checkpoints.jsonl"
+CHECKPOINT_INTERVAL = 1000
+CHECKPOINT_KEY = os.getenv("LEDGER_CHECKPOINT_KEY", "")
 
-BLOCKCHAIN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blockchain.json")
+# project_id prefix of image evidence blocks (image_hasher.py). They are
+# indexed by object path and kept out of the project lookups.
+IMAGE_BLOCK_PREFIX = "image:"
+
+
+def _pack(digest: str) -> Union[bytes, str]:
+    """64-char lowercase hex → 32 raw bytes; anything else is kept verbatim."""
+    if len(digest) == 64:
+        try:
+            raw = bytes.fromhex(digest)
+        except ValueError:
+            return digest
+        # fromhex also accepts upper case and spaces, which would not round-trip
+        if len(raw) == 32 and (digest.islower() or digest.isdigit()):
+            return raw
+    return digest
+
+
+def _unpack(digest: Union[bytes, str]) -> str:
+    return digest.hex() if type(digest) is bytes else digest
 
 
 class Block:
-    """A single block in the chain."""
+    """
+    A single block in the chain.
+
+    Digests are held as raw 32-byte values (hex only at the edges) and a
+    block's own hash is computed on first use, so loading a stored block
+    never re-hashes it. `previous_hash` shares the previous block's digest
+    object instead of holding a copy.
+    """
+
+    __slots__ = ("index", "timestamp", "project_id", "project_name", "_combined", "_previous", "_hash")
 
     def __init__(self, index: int, project_id: str, project_name: str,
                  combined_hash: str, previous_hash: str, timestamp: str = None):
@@ -23,9 +84,30 @@ class Block:
         self.timestamp = timestamp or datetime.now(timezone.utc).isoformat()
         self.project_id = project_id
         self.project_name = project_name
-        self.combined_hash = combined_hash
-        self.previous_hash = previous_hash
-        self.block_hash = self._calculate_hash()
+        self._combined = _pack(combined_hash)
+        self._previous = _pack(previous_hash)
+        self._hash = None
+
+    @property
+    def combined_hash(self) -> str:
+        return _unpack(self._combined)
+
+    @property
+    def previous_hash(self) -> str:
+        return _unpack(self._previous)
+
+    @property
+    def block_hash(self) -> str:
+        if self._hash is None:
+            self._hash = _pack(self._calculate_hash())
+        return _unpack(self._hash)
+
+    @property
+    def block_digest(self) -> Union[bytes, str]:
+        """block_hash in its packed form (what the indexes are keyed on)."""
+        if self._hash is None:
+            self._hash = _pack(self._calculate_hash())
+        return self._hash
 
     def _calculate_hash(self) -> str:
         """SHA-256 hash of the block's contents (excluding block_hash itself)."""
@@ -39,6 +121,13 @@ class Block:
         )
         return hashlib.sha256(content.encode("utf-8")).hexdigest()
 
+    @classmethod
+    def _follow(cls, previous: "Block", project_id: str, project_name: str, combined_hash: str) -> "Block":
+        """A new block linked to `previous`, sharing its digest object."""
+        block = cls(previous.index + 1, project_id, project_name, combined_hash, "")
+        block._previous = previous.block_digest
+        return block
+
     def to_dict(self) -> dict:
         return {
             "index": self.index,
@@ -52,29 +141,108 @@ class Block:
 
     @classmethod
     def from_dict(cls, data: dict) -> "Block":
-        block = cls(
-            index=data["index"],
-            project_id=data["project_id"],
-            project_name=data["project_name"],
-            combined_hash=data["combined_hash"],
-            previous_hash=data["previous_hash"],
-            timestamp=data["timestamp"],
-        )
-        block.block_hash = data["block_hash"]
+        """Rebuild a stored block without hashing it (validation re-hashes)."""
+        block = cls.__new__(cls)
+        block.index = data["index"]
+        block.timestamp = data["timestamp"]
+        block.project_id = data["project_id"]
+        block.project_name = data["project_name"]
+        block._combined = _pack(data["combined_hash"])
+        block._previous = _pack(data["previous_hash"])
+        block._hash = _pack(data["block_hash"])
         return block
 
 
+# Segment lines are decoded to str first: skips json.loads' per-call
+# encoding detection on bytes
+_decode = json.JSONDecoder().decode
+
+
+def _segment_name(number: int) -> str:
+    return f"segment-{number:06d}.jsonl"
+
+
+def _checkpoint_digest(index: int, block_hash: str, previous: str, key: str) -> str:
+    """HMAC-SHA256 (when a key is configured) or SHA-256 binding a checkpoint."""
+    message = f"{index}:{block_hash}:{previous}".encode("utf-8")
+    if key:
+        return hmac.new(key.encode("utf-8"), message, hashlib.sha256).hexdigest()
+    return hashlib.sha256(message).hexdigest()
+
+
+def _audit_segment(seg_path: str) -> dict:
+    """Re-hash and re-link one segment file (runs in a worker process)."""
+    result = {"path": seg_path, "count": 0, "first_previous_hash": None,
+              "first_index": None, "last_hash": None, "error": None}
+    previous_hash = None
+    with open(seg_path, "rb") as f:
+        for line in f:
+            block = Block.from_dict(json.loads(line))
+            if block.block_hash != block._calculate_hash():
+                result["error"] = f"Block {block.index}: hash mismatch (data tampered)"
+                return result
+            if previous_hash is None:
+                result["first_previous_hash"] = block.previous_hash
+                result["first_index"] = block.index
+            elif block.previous_hash != previous_hash:
+                result["error"] = f"Block {block.index}: previous_hash broken"
+                return result
+            previous_hash = block.block_hash
+            result["count"] += 1
+    result["last_hash"] = previous_hash
+    return result
+
+
+def _fsync_dir(path: str):
+    """Persist a directory entry (rename/create) where the platform allows it."""
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
 class Blockchain:
-    """A simple blockchain that persists to a JSON file."""
+    """A simple blockchain persisted as an append-only segment log."""
 
-    def __init__(self, filepath: str = BLOCKCHAIN_FILE):
-        self.filepath = filepath
+    def __init__(self, path: str = LEDGER_DIR, sync_every: int = SYNC_EVERY,
+                 legacy_file: str = BLOCKCHAIN_FILE,
+                 checkpoint_interval: int = CHECKPOINT_INTERVAL,
+                 checkpoint_key: str = CHECKPOINT_KEY):
+        self.path = path
+        self.sync_every = max(1, sync_every)
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        self.checkpoint_key = checkpoint_key
         self.chain: list[Block] = []
-        if os.path.exists(self.filepath):
+        self.checkpoints: list[dict] = []
+        self._verified_upto = 0      # highest index known to be valid
+
+        # Lookup indexes: built lazily on first query, then kept current by _append
+        self._index_ready = False
+        self._by_project: dict[str, int] = {}
+        self._by_image: dict[str, int] = {}          # object path → image block
+        self._by_combined_hash: dict[Union[bytes, str], int] = {}   # keyed on packed digests
+        self._by_block_hash: dict[Union[bytes, str], int] = {}
+        self._timestamps: list[str] = []
+        self._timestamps_sorted = True
+        self._segment = 0            # number of the segment being appended to
+        self._segment_blocks = 0     # blocks in that segment
+        self._offset = 0             # bytes written to that segment
+        self._unsynced = 0           # blocks written since the last fsync
+        self._fh = None
+
+        if os.path.exists(os.path.join(self.path, TAIL_FILE)):
             self.load()
+        elif os.path.exists(os.path.join(self.path, _segment_name(0))):
+            # Segments without a tail pointer: never start a second genesis on top
+            self._rebuild_tail()
         else:
-            self._create_genesis_block()
-            self.save()
+            os.makedirs(self.path, exist_ok=True)
+            if not self._import_legacy(legacy_file):
+                self._create_genesis_block()
+            self.flush()
 
     # ── Genesis ───────────────────────────────────────────────────────
     def _create_genesis_block(self):
@@ -85,27 +253,69 @@ class Blockchain:
             combined_hash="0" * 64,
             previous_hash="0" * 64,
         )
-        self.chain.append(genesis)
+        self._append(genesis)
+        self._verified_upto = 0
 
     # ── Add Block ─────────────────────────────────────────────────────
     def add_block(self, project_id: str, project_name: str, combined_hash: str) -> Block:
-        """Append a new block to the chain and save."""
+        """Append a new block to the log (fsync is batched, see `sync_every`)."""
         previous = self.chain[-1]
-        block = Block(
-            index=previous.index + 1,
-            project_id=project_id,
-            project_name=project_name,
-            combined_hash=combined_hash,
-            previous_hash=previous.block_hash,
-        )
-        self.chain.append(block)
-        self.save()
+        block = Block._follow(previous, project_id, project_name, combined_hash)
+        self._append(block)
+        # Built from the verified tip, so the new block is valid by construction
+        if self._verified_upto == previous.index:
+            self._verified_upto = block.index
+        if self._unsynced >= self.sync_every:
+            self.flush()
         return block
 
+    def add_blocks(self, entries: Iterable[tuple[str, str, str]]) -> list[Block]:
+        """
+        Append many (project_id, project_name, combined_hash) blocks at once.
+
+        Periodic fsyncs are suspended for the batch and the whole batch is
+        persisted by a single flush at the end. This is not a transaction: a
+        crash before that flush may leave any prefix of the batch on disk,
+        and load() keeps those blocks like other cleanly written lines past
+        the tail. Callers re-run the batch and skip what is already present
+        (the watcher checks has_project).
+        """
+        blocks = []
+        previous = self.chain[-1]
+        trusted = self._verified_upto == previous.index
+        for project_id, project_name, combined_hash in entries:
+            block = Block._follow(previous, project_id, project_name, combined_hash)
+            self._append(block)
+            blocks.append(block)
+            previous = block
+        if blocks:
+            if trusted:
+                self._verified_upto = previous.index
+            self.flush()
+        return blocks
+
     # ── Validation ────────────────────────────────────────────────────
-    def is_chain_valid(self) -> bool:
-        """Walk the chain and verify every link."""
-        for i in range(1, len(self.chain)):
+    def is_chain_valid(self, full: bool = False) -> bool:
+        """
+        Verify every link after the last trusted checkpoint.
+
+        The checkpoint chain itself is re-checked first (O(#checkpoints));
+        pass full=True to re-hash the whole chain from genesis instead.
+        """
+        start = 1
+        if not full and self.checkpoints:
+            if not self._checkpoints_valid():
+                return False
+            start = self.checkpoints[-1]["index"] + 1
+
+        if not self._validate_range(start, len(self.chain)):
+            return False
+        self._verified_upto = len(self.chain) - 1
+        return True
+
+    def _validate_range(self, start: int, stop: int) -> bool:
+        """Re-hash blocks [start, stop) and check each link to its predecessor."""
+        for i in range(max(1, start), stop):
             current = self.chain[i]
             previous = self.chain[i - 1]
 
@@ -115,27 +325,371 @@ class Blockchain:
                 return False
 
             # Check the chain link
-            if current.previous_hash != previous.block_hash:
+            if current._previous != previous.block_digest:
                 print(f"  ✗ Block {current.index}: previous_hash broken")
                 return False
 
         return True
 
+    def _checkpoints_valid(self) -> bool:
+        """Check checkpoint digests and that each still matches its block."""
+        previous = "0" * 64
+        for cp in self.checkpoints:
+            if not self._checkpoint_ok(cp, previous):
+                return False
+            previous = cp["digest"]
+        return True
+
+    def _checkpoint_ok(self, cp: dict, previous: str) -> bool:
+        """One checkpoint: its digest, its link to `previous` and its block."""
+        expected = _checkpoint_digest(cp["index"], cp["block_hash"], previous, self.checkpoint_key)
+        if cp["digest"] != expected or cp["previous"] != previous:
+            print(f"  ✗ Checkpoint {cp['index']}: digest mismatch")
+            return False
+        if cp["index"] >= len(self.chain) or self.chain[cp["index"]].block_hash != cp["block_hash"]:
+            print(f"  ✗ Checkpoint {cp['index']}: block hash does not match the chain")
+            return False
+        return True
+
+    def audit(self, workers: int = None) -> bool:
+        """
+        Full parallel audit of the on-disk ledger.
+
+        Each segment (a disjoint block range) is re-hashed in its own process;
+        the boundary links between consecutive segments are stitched here.
+        """
+        self.flush()
+        segments = []
+        number = 0
+        while os.path.exists(os.path.join(self.path, _segment_name(number))):
+            segments.append(os.path.join(self.path, _segment_name(number)))
+            number += 1
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_audit_segment, segments))
+
+        previous_hash = None
+        total = 0
+        for result in results:
+            if result["error"]:
+                print(f"  ✗ {os.path.basename(result['path'])}: {result['error']}")
+                return False
+            if result["count"] == 0:
+                continue
+            if previous_hash is not None and result["first_previous_hash"] != previous_hash:
+                print(f"  ✗ Block {result['first_index']}: previous_hash broken at segment boundary")
+                return False
+            previous_hash = result["last_hash"]
+            total += result["count"]
+
+        if total != len(self.chain) or previous_hash != self.chain[-1].block_hash:
+            print(f"  ✗ On-disk ledger ({total} blocks) does not match the loaded chain ({len(self.chain)})")
+            return False
+        self._verified_upto = len(self.chain) - 1
+        return True
+
     # ── Persistence ───────────────────────────────────────────────────
-    def save(self):
-        data = [block.to_dict() for block in self.chain]
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+    def _append(self, block: Block):
+        """Write one block line to the current segment and keep it in memory."""
+        if self._segment_blocks >= SEGMENT_MAX_BLOCKS:
+            self._rotate_segment()
+        if self._fh is None:
+            self._fh = open(os.path.join(self.path, _segment_name(self._segment)), "ab")
+        line = (json.dumps(block.to_dict(), ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        self._fh.write(line)
+        self._offset += len(line)
+        self._segment_blocks += 1
+        self._unsynced += 1
+        self.chain.append(block)
+        if self._index_ready:
+            self._index_block(block)
+
+    def _rotate_segment(self):
+        """Seal the current segment and start the next one."""
+        if self._fh is not None:
+            self.flush()
+            self._fh.close()
+            self._fh = None
+        self._segment += 1
+        self._segment_blocks = 0
+        self._offset = 0
+
+    def flush(self):
+        """fsync pending appends, write due checkpoints, advance the tail pointer."""
+        if self._fh is not None:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+        self._write_checkpoints()
+        tail = {
+            "segment": self._segment,
+            "offset": self._offset,
+            "length": len(self.chain),
+            "block_hash": self.chain[-1].block_hash if self.chain else None,
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.path, prefix=".tail-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(tail, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, TAIL_FILE))
+        _fsync_dir(self.path)
+        self._unsynced = 0
+
+    def _write_checkpoints(self):
+        """Append a checkpoint for every K-th block up to the verified tip."""
+        previous = self.checkpoints[-1]["digest"] if self.checkpoints else "0" * 64
+        index = (self.checkpoints[-1]["index"] if self.checkpoints else 0) + self.checkpoint_interval
+        new = []
+        while index <= self._verified_upto:
+            block_hash = self.chain[index].block_hash
+            digest = _checkpoint_digest(index, block_hash, previous, self.checkpoint_key)
+            new.append({"index": index, "block_hash": block_hash, "previous": previous,
+                        "digest": digest, "signed": bool(self.checkpoint_key)})
+            previous = digest
+            index += self.checkpoint_interval
+        if not new:
+            return
+        with open(os.path.join(self.path, CHECKPOINT_FILE), "ab") as f:
+            for cp in new:
+                f.write((json.dumps(cp, separators=(",", ":")) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        self.checkpoints.extend(new)
+
+    def _load_checkpoints(self):
+        """Read checkpoints, keeping the prefix that still verifies against the chain."""
+        self.checkpoints = []
+        cp_path = os.path.join(self.path, CHECKPOINT_FILE)
+        if not os.path.exists(cp_path):
+            return
+        good_offset = 0
+        torn = untrusted = False
+        previous = "0" * 64
+        with open(cp_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    torn = True
+                    break
+                try:
+                    cp = json.loads(line)
+                except ValueError:
+                    torn = True
+                    break
+                if not self._checkpoint_ok(cp, previous):
+                    untrusted = True
+                    break
+                self.checkpoints.append(cp)
+                previous = cp["digest"]
+                good_offset += len(line)
+
+        if untrusted:
+            # Wrong key or tampering: keep the evidence, start a fresh checkpoint file
+            aside = f"{cp_path}.untrusted-{int(time.time())}"
+            os.replace(cp_path, aside)
+            print(f"  ⚠ Untrusted checkpoints moved to {aside}")
+            self.checkpoints = []
+        elif torn:
+            with open(cp_path, "r+b") as f:
+                f.truncate(good_offset)
+
+    # Kept for callers written against the single-file ledger
+    save = flush
+
+    def close(self):
+        """Flush and release the segment file handle."""
+        self.flush()
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _rebuild_tail(self):
+        """Load a ledger whose tail.json is lost, then write a fresh one."""
+        last = 0
+        while os.path.exists(os.path.join(self.path, _segment_name(last + 1))):
+            last += 1
+        # Nothing is known to be fsynced: only the last segment may end torn
+        self.load({"segment": last, "offset": 0, "length": 0})
+        self.flush()
+        print(f"  ⚠ {TAIL_FILE} was missing; rebuilt it from {last + 1} segment(s), {len(self.chain)} block(s)")
 
-    def load(self):
-        with open(self.filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        self.chain = [Block.from_dict(b) for b in data]
+    def load(self, tail: Optional[dict] = None):
+        """Read the segments in order, recovering from a torn final write."""
+        if tail is None:
+            with open(os.path.join(self.path, TAIL_FILE), "r", encoding="utf-8") as f:
+                tail = json.load(f)
+
+        self.chain = []
+        self._reset_index()
+        segment = 0
+        while True:
+            seg_path = os.path.join(self.path, _segment_name(segment))
+            if not os.path.exists(seg_path):
+                break
+            blocks, good_offset = self._read_segment(seg_path)
+            self.chain.extend(blocks)
+            if segment < tail["segment"] and good_offset < os.path.getsize(seg_path):
+                raise ValueError(f"Sealed segment {seg_path} is corrupt at byte {good_offset}")
+            if segment >= tail["segment"]:
+                # Bytes before the tail pointer were fsynced: a bad line there is
+                # corruption (or tampering), not a torn write, so leave the file alone.
+                durable = tail["offset"] if segment == tail["segment"] else 0
+                if good_offset < durable:
+                    raise ValueError(
+                        f"Segment {seg_path} is corrupt at byte {good_offset}, "
+                        f"inside its fsynced region ({durable} bytes)"
+                    )
+                # Lines past the tail pointer were written but maybe not fsynced:
+                # keep whatever parsed and linked cleanly, drop a torn remainder.
+                if good_offset < os.path.getsize(seg_path):
+                    with open(seg_path, "r+b") as f:
+                        f.truncate(good_offset)
+                self._segment = segment
+                self._segment_blocks = len(blocks)
+                self._offset = good_offset
+            segment += 1
+
+        if len(self.chain) < tail["length"]:
+            raise ValueError(
+                f"Ledger at {self.path} is shorter ({len(self.chain)}) than its "
+                f"tail pointer ({tail['length']}); segments are missing or truncated"
+            )
+        self._load_checkpoints()
+        # Re-hash only what follows the last checkpoint (at most one interval plus
+        # unflushed blocks once checkpoints keep up) so appends extend a verified
+        # tip and flush() keeps writing checkpoints after a restart
+        self._verified_upto = self.checkpoints[-1]["index"] if self.checkpoints else 0
+        if self._validate_range(self._verified_upto + 1, len(self.chain)):
+            self._verified_upto = len(self.chain) - 1
+        else:
+            print(f"  ⚠ Blocks after {self._verified_upto} failed validation; no new checkpoints until repaired")
+
+    def _read_segment(self, seg_path: str) -> tuple[list[Block], int]:
+        """Parse one segment line by line; returns blocks and the last good byte offset."""
+        blocks = []
+        offset = 0
+        previous = self.chain[-1] if self.chain else None
+        with open(seg_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    block = Block.from_dict(_decode(line.decode("utf-8")))
+                except (ValueError, KeyError):
+                    break
+                if previous is not None:
+                    if block._previous != previous._hash:
+                        break
+                    block._previous = previous._hash
+                blocks.append(block)
+                previous = block
+                offset += len(line)
+        return blocks, offset
+
+    def _import_legacy(self, legacy_file: str) -> bool:
+        """Import a pre-segment `blockchain.json` ledger, if a readable one exists."""
+        if not legacy_file or not os.path.exists(legacy_file):
+            return False
+        try:
+            with open(legacy_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"  ⚠ Could not import legacy ledger {legacy_file}: {e}")
+            return False
+        for entry in data:
+            self._append(Block.from_dict(entry))
+        print(f"  ✓ Imported {len(data)} block(s) from {legacy_file}")
+        return bool(data)
+
+    # ── Indexes ───────────────────────────────────────────────────────
+    def _reset_index(self):
+        self._index_ready = False
+        self._by_project = {}
+        self._by_image = {}
+        self._by_combined_hash = {}
+        self._by_block_hash = {}
+        self._timestamps = []
+        self._timestamps_sorted = True
+
+    def _index_block(self, block: Block):
+        if block.project_id.startswith(IMAGE_BLOCK_PREFIX):
+            # Latest block wins when an image is re-hashed
+            self._by_image[block.project_id[len(IMAGE_BLOCK_PREFIX):]] = block.index
+            self._by_combined_hash[block._combined] = block.index
+        elif block.project_id != "GENESIS":
+            # Latest block wins if a project is ever re-anchored
+            self._by_project[block.project_id] = block.index
+            self._by_combined_hash[block._combined] = block.index
+        self._by_block_hash[block.block_digest] = block.index
+        if self._timestamps and block.timestamp < self._timestamps[-1]:
+            self._timestamps_sorted = False
+        self._timestamps.append(block.timestamp)
+
+    def _ensure_index(self):
+        """Build the lookup indexes on first use (O(n) once)."""
+        if self._index_ready:
+            return
+        self._reset_index()
+        for block in self.chain:
+            self._index_block(block)
+        self._index_ready = True
+
+    # ── Queries ───────────────────────────────────────────────────────
+    def has_project(self, project_id: str) -> bool:
+        """O(1): whether a project already has a block."""
+        self._ensure_index()
+        return project_id in self._by_project
+
+    def get_block_by_project(self, project_id: str) -> Optional[Block]:
+        """O(1): the (latest) block anchoring a project, or None."""
+        self._ensure_index()
+        index = self._by_project.get(project_id)
+        return self.chain[index] if index is not None else None
+
+    def get_block_by_image(self, path: str) -> Optional[Block]:
+        """O(1): the (latest) image evidence block for an object path, or None."""
+        self._ensure_index()
+        index = self._by_image.get(path)
+        return self.chain[index] if index is not None else None
+
+    def get_block_by_hash(self, block_hash: str) -> Optional[Block]:
+        """O(1): the block with the given block hash, or None."""
+        self._ensure_index()
+        index = self._by_block_hash.get(_pack(block_hash))
+        return self.chain[index] if index is not None else None
+
+    def contains_hash(self, digest: str) -> bool:
+        """O(1): whether a digest is any block's combined hash or block hash."""
+        self._ensure_index()
+        digest = _pack(digest)
+        return digest in self._by_combined_hash or digest in self._by_block_hash
+
+    def get_blocks_between(self, start: Union[str, datetime], end: Union[str, datetime]) -> list[Block]:
+        """
+        Blocks with start <= timestamp <= end.
+
+        O(log n + k) via binary search while timestamps are in append order
+        (the normal case); falls back to a scan if a clock went backwards.
+        """
+        self._ensure_index()
+        start = start.isoformat() if isinstance(start, datetime) else start
+        end = end.isoformat() if isinstance(end, datetime) else end
+        if not self._timestamps_sorted:
+            return [b for b in self.chain if start <= b.timestamp <= end]
+        lo = bisect_left(self._timestamps, start)
+        hi = bisect_right(self._timestamps, end)
+        return self.chain[lo:hi]
 
     # ── Helpers ───────────────────────────────────────────────────────
     def get_hashed_project_ids(self) -> set[str]:
-        """Return a set of project IDs already in the chain."""
-        return {block.project_id for block in self.chain if block.project_id != "GENESIS"}
+        """Return a set of project IDs already in the chain (image blocks excluded)."""
+        self._ensure_index()
+        return set(self._by_project)
 
     def __len__(self):
         return len(self.chain)
@@ -160,8 +714,60 @@ class Blockchain:
         print("=" * 70 + "\n")
 
 
+# ── Benchmark ─────────────────────────────────────────────────────────
+def benchmark_append(sizes=(10_000, 100_000, 1_000_000), sync_every: int = SYNC_EVERY):
+    """Append throughput of the segment log at several chain sizes."""
+    print(f"\n  Append benchmark (sync_every={sync_every}, segment={SEGMENT_MAX_BLOCKS} blocks)")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            with Blockchain(os.path.join(tmp, "ledger"), sync_every=sync_every, legacy_file=None) as bc:
+                for i in range(n):
+                    bc.add_block(f"project-{i}", f"Project {i}", "ab" * 32)
+            append_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            reloaded = Blockchain(os.path.join(tmp, "ledger"), legacy_file=None)
+            load_s = time.perf_counter() - start
+            reloaded.close()
+            print(f"  {n:>9,} blocks: append {append_s:7.2f}s ({n / append_s:>9,.0f} blocks/s), "
+                  f"load {load_s:6.2f}s")
+
+
+def benchmark_validate(n: int = 1_000_000, workers: int = None):
+    """Incremental (checkpointed) vs full vs parallel-audit validation time."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ledger")
+        with Blockchain(path, legacy_file=None) as bc:
+            for i in range(n):
+                bc.add_block(f"project-{i}", f"Project {i}", "ab" * 32)
+        bc = Blockchain(path, legacy_file=None)
+        print(f"\n  Validation benchmark ({n:,} blocks, {len(bc.checkpoints):,} checkpoints)")
+        for label, fn in (("incremental", bc.is_chain_valid),
+                          ("full", lambda: bc.is_chain_valid(full=True)),
+                          ("parallel audit", lambda: bc.audit(workers))):
+            start = time.perf_counter()
+            ok = fn()
+            print(f"  {label:<15}: {time.perf_counter() - start:7.2f}s valid={ok}")
+        bc.close()
+
+
 # ── Quick test ────────────────────────────────────────────────────────
 if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        sizes = [int(a) for a in sys.argv[1:] if a.isdigit()] or (10_000, 100_000, 1_000_000)
+        benchmark_append(sizes)
+        sys.exit(0)
+    if "--bench-validate" in sys.argv:
+        sizes = [int(a) for a in sys.argv[1:] if a.isdigit()] or (1_000_000,)
+        for n in sizes:
+            benchmark_validate(n)
+        sys.exit(0)
+    if "--audit" in sys.argv:
+        with Blockchain() as bc:
+            print(f"Audit ({len(bc)} blocks): {'✓ valid' if bc.audit() else '✗ INVALID'}")
+        sys.exit(0)
+
     bc = Blockchain()
     bc.print_chain()
     print(f"Chain length: {len(bc)} blocks")
@@ -0,0 +1,273 @@
+"""
+image_hasher.py — Bulk evidence hashing for submission images
+===============================================================
+Walks the Supabase Storage bucket (or a local mirror directory), streams
+every image through the combined hasher on a process pool and records
+(object path, size, combined hash) in a manifest. Each hash is also
+appended to the ledger as a block whose project_id is `image:<path>`, so
+the ledger commits to the imagery bytes and not only to project IDs. The
+ledger indexes those blocks by path (get_block_by_image) and leaves them
+out of its project lookups. The recorded size is the number of bytes
+actually hashed.
+
+    python image_hasher.py --dir /mnt/mirror/project-submissions
+    python image_hasher.py --bucket project-submissions [--prefix uploads/]
+
+Memory stays bounded: files are hashed in fixed-size chunks (nothing is
+loaded whole) and at most `workers * IN_FLIGHT_PER_WORKER` objects are
+queued at a time. Re-runs are incremental: an object whose size and
+mtime (local) or ETag (bucket) match the manifest is skipped.
+
+Manifest (ledger/image_manifest.jsonl), one JSON record per line, last
+record for a path wins:
+
+    {"path": ..., "size": ..., "version": ..., "combined_hash": ..., "block_index": ...}
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, Optional
+from urllib.parse import quote
+
+from dotenv import load_dotenv
+
+from hash_generator import CHUNK_SIZE, hash_file, hash_stream
+from blockchain import IMAGE_BLOCK_PREFIX, Blockchain, LEDGER_DIR
+
+
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+STORAGE_BUCKET = os.getenv("STORAGE_BUCKET", "project-submissions")
+
+MANIFEST_FILE = os.path.join(LEDGER_DIR, "image_manifest.jsonl")
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".webp", ".bmp"}
+IN_FLIGHT_PER_WORKER = 4
+LEDGER_BATCH = 1000
+LIST_PAGE_SIZE = 1000
+
+
+# ── Sources ───────────────────────────────────────────────────────────
+def walk_directory(root: str) -> Iterator[dict]:
+    """Image files under a local mirror, as {path, size, version, location}."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            full = os.path.join(dirpath, name)
+            st = os.stat(full)
+            yield {
+                "path": os.path.relpath(full, root).replace(os.sep, "/"),
+                "size": st.st_size,
+                "version": str(st.st_mtime_ns),
+                "location": full,
+            }
+
+
+def walk_bucket(bucket: str, prefix: str = "") -> Iterator[dict]:
+    """Image objects in a Storage bucket, as {path, size, version, location}."""
+    from supabase import create_client
+
+    storage = create_client(SUPABASE_URL, SUPABASE_KEY).storage.from_(bucket)
+    pending = [prefix.strip("/")]
+    while pending:
+        folder = pending.pop()
+        offset = 0
+        while True:
+            entries = storage.list(folder, {"limit": LIST_PAGE_SIZE, "offset": offset,
+                                            "sortBy": {"column": "name", "order": "asc"}})
+            for entry in entries:
+                path = f"{folder}/{entry['name']}" if folder else entry["name"]
+                if entry.get("id") is None:        # folders have no object id
+                    pending.append(path)
+                    continue
+                if os.path.splitext(entry["name"])[1].lower() not in IMAGE_EXTENSIONS:
+                    continue
+                meta = entry.get("metadata") or {}
+                yield {
+                    "path": path,
+                    "size": meta.get("size"),
+                    "version": meta.get("eTag") or entry.get("updated_at"),
+                    "location": f"{SUPABASE_URL}/storage/v1/object/{quote(bucket, safe='')}/{quote(path)}",
+                }
+            if len(entries) < LIST_PAGE_SIZE:
+                break
+            offset += LIST_PAGE_SIZE
+
+
+# ── Workers ───────────────────────────────────────────────────────────
+def _hash_local(location: str) -> tuple[int, str]:
+    result = hash_file(location)
+    return result["size"], result["combined_hash"]
+
+
+def _hash_remote(location: str) -> tuple[int, str]:
+    import httpx
+
+    headers = {"apikey": SUPABASE_KEY, "Authorization": f"Bearer {SUPABASE_KEY}"}
+
+    def chunks():
+        with httpx.stream("GET", location, headers=headers, timeout=60.0) as response:
+            response.raise_for_status()
+            yield from response.iter_bytes(CHUNK_SIZE)
+
+    result = hash_stream(chunks())
+    return result["size"], result["combined_hash"]
+
+
+# ── Manifest ──────────────────────────────────────────────────────────
+def load_manifest(path: str) -> dict[str, dict]:
+    """Latest record per object path (torn trailing lines are ignored)."""
+    records = {}
+    lines = 0
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record["path"]] = record
+                lines += 1
+    if lines > 2 * len(records) + LEDGER_BATCH:
+        _compact_manifest(path, records)
+    return records
+
+
+def _compact_manifest(path: str, records: dict[str, dict]):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for record in records.values():
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ── Job ───────────────────────────────────────────────────────────────
+def hash_images(objects: Iterator[dict], blockchain: Optional[Blockchain],
+                manifest_path: str = MANIFEST_FILE, workers: int = None) -> dict:
+    """
+    Hash every changed object and record it in the manifest (and ledger).
+
+    Returns counts and throughput for the run.
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    manifest = load_manifest(manifest_path)
+    stats = {"hashed": 0, "skipped": 0, "failed": 0, "bytes": 0, "blocks": 0}
+    done: list[dict] = []
+    start = time.perf_counter()
+
+    with open(manifest_path, "a", encoding="utf-8") as out, ProcessPoolExecutor(workers) as pool:
+
+        def commit():
+            # Ledger first, then the manifest: an object missing from the
+            # manifest is re-hashed and matched against its existing block
+            entries, for_ledger = [], []
+            for record in done:
+                key = IMAGE_BLOCK_PREFIX + record["path"]
+                existing = blockchain.get_block_by_image(record["path"]) if blockchain else None
+                if existing is not None and existing.combined_hash == record["combined_hash"]:
+                    record["block_index"] = existing.index
+                elif blockchain is not None:
+                    for_ledger.append(record)
+                    entries.append((key, record["path"], record["combined_hash"]))
+            if entries:
+                for record, block in zip(for_ledger, blockchain.add_blocks(entries)):
+                    record["block_index"] = block.index
+                stats["blocks"] += len(entries)
+            for record in done:
+                out.write(json.dumps(record, separators=(",", ":")) + "\n")
+                manifest[record["path"]] = record
+            out.flush()
+            os.fsync(out.fileno())
+            done.clear()
+
+        in_flight = {}
+        window = workers * IN_FLIGHT_PER_WORKER
+        objects = iter(objects)
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < window:
+                obj = next(objects, None)
+                if obj is None:
+                    exhausted = True
+                    break
+                known = manifest.get(obj["path"])
+                if known and known["size"] == obj["size"] and known["version"] == obj["version"]:
+                    stats["skipped"] += 1
+                    continue
+                fn = _hash_remote if obj["location"].startswith(("http://", "https://")) else _hash_local
+                in_flight[pool.submit(fn, obj["location"])] = obj
+            if not in_flight:
+                continue
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                obj = in_flight.pop(future)
+                try:
+                    size, combined = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"  ✗ {obj['path']}: {e}")
+                    continue
+                stats["hashed"] += 1
+                stats["bytes"] += size
+                done.append({"path": obj["path"], "size": size, "version": obj["version"],
+                             "combined_hash": combined, "block_index": None})
+            if len(done) >= LEDGER_BATCH:
+                commit()
+        if done:
+            commit()
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = elapsed
+    stats["mb_per_s"] = stats["bytes"] / 1e6 / elapsed if elapsed else 0.0
+    stats["files_per_s"] = stats["hashed"] / elapsed if elapsed else 0.0
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hash stored submission images into the ledger")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--dir", help="local mirror of the bucket")
+    source.add_argument("--bucket", default=None, help=f"Storage bucket (default {STORAGE_BUCKET})")
+    parser.add_argument("--prefix", default="", help="only objects under this bucket prefix")
+    parser.add_argument("--workers", type=int, default=None, help="hashing processes (default: CPU count)")
+    parser.add_argument("--manifest", default=MANIFEST_FILE)
+    parser.add_argument("--no-ledger", action="store_true", help="write the manifest only")
+    args = parser.parse_args()
+
+    if args.dir:
+        objects = walk_directory(args.dir)
+        label = args.dir
+    else:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            print("ERROR: SUPABASE_URL and SUPABASE_KEY must be set in .env (or use --dir)")
+            sys.exit(1)
+        bucket = args.bucket or STORAGE_BUCKET
+        objects = walk_bucket(bucket, args.prefix)
+        label = f"bucket '{bucket}'"
+
+    print("=" * 70)
+    print("  IMAGE EVIDENCE HASHING")
+    print("=" * 70)
+    print(f"  Source: {label}\n")
+
+    if args.no_ledger:
+        stats = hash_images(objects, None, args.manifest, args.workers)
+    else:
+        with Blockchain() as blockchain:
+            stats = hash_images(objects, blockchain, args.manifest, args.workers)
+
+    print(f"  Hashed {stats['hashed']:,} image(s), skipped {stats['skipped']:,} unchanged, "
+          f"{stats['failed']:,} failed; {stats['blocks']:,} ledger block(s)")
+    print(f"  {stats['bytes'] / 1e6:,.1f} MB in {stats['seconds']:.2f}s "
+          f"({stats['mb_per_s']:,.1f} MB/s, {stats['files_per_s']:,.0f} files/s)\n")
@@ -1,56 +1,179 @@
+"""
+supabase_watcher.py — Supabase → hash → blockchain pipeline
+=============================================================
+Reads the projects table incrementally with keyset pagination on
+(created_at, id): each request selects only id/name/created_at for rows
+after the last seen watermark, PAGE_SIZE rows at a time. The watermark is
+persisted next to the ledger (ledger/watermark.json) after the blocks it
+covers have been flushed, so a restart resumes where the last run stopped.
+
+Modes:
+    python supabase_watcher.py --once          one incremental pass
+    python supabase_watcher.py [interval]      poll; the interval doubles
+                                               while idle, up to --max-interval
+    python supabase_watcher.py --listen        Supabase Realtime INSERT events
+                                               trigger a pass (with a slow
+                                               safety poll)
+
+Add --batch (optionally --workers N) to any mode for bulk ingestion: each
+page is hashed in one go and appended with a single persist, and a pass
+prints one summary line with its throughput.
+
+Set POSTGREST_URL to read from a plain PostgREST endpoint (e.g. a local
+stand-in) instead of SUPABASE_URL.
+"""
+
+import argparse
+import asyncio
+import json
 import os
 import sys
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional
 
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
-from hash_generator import generate_combined_hash
-from blockchain import Blockchain
+from hash_generator import combined_hashes, generate_combined_hash
+from blockchain import Blockchain, _fsync_dir
 
 
 load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+POSTGREST_URL = os.getenv("POSTGREST_URL")
 
 TABLE_NAME = "projects"
 ID_COLUMN = "id"
 NAME_COLUMN = "name"
+CREATED_COLUMN = "created_at"
+
+PAGE_SIZE = int(os.getenv("WATCH_PAGE_SIZE", "1000"))
+# Re-read rows this far behind the watermark: a transaction that commits late
+# can carry a created_at older than rows already seen (duplicates are skipped)
+LOOKBACK_SECONDS = float(os.getenv("WATCH_LOOKBACK_SECONDS", "30"))
+MAX_INTERVAL = int(os.getenv("WATCH_MAX_INTERVAL", "300"))
+BATCH_PAGE_SIZE = int(os.getenv("WATCH_BATCH_PAGE_SIZE", "10000"))
+POOL_MIN_BATCH = 5000   # below this, process start-up costs more than it saves
+WATERMARK_FILE = "watermark.json"
 
 
 def get_supabase_client() -> Client:
-    
+
+    if POSTGREST_URL:
+        from postgrest import SyncPostgrestClient
+
+        headers = {"apikey": SUPABASE_KEY, "Authorization": f"Bearer {SUPABASE_KEY}"} if SUPABASE_KEY else {}
+        return SyncPostgrestClient(POSTGREST_URL, headers=headers)
+
     if not SUPABASE_URL or not SUPABASE_KEY:
-        print("ERROR: SUPABASE_URL and SUPABASE_KEY must be set in .env")
+        print("ERROR: SUPABASE_URL and SUPABASE_KEY must be set in .env (or POSTGREST_URL)")
         sys.exit(1)
     return create_client(SUPABASE_URL, SUPABASE_KEY)
 
 
-def fetch_projects(client: Client) -> list[dict]:
-    
-    response = client.table(TABLE_NAME).select("*").execute()
+# ── Watermark ─────────────────────────────────────────────────────────
+def load_watermark(blockchain: Blockchain) -> Optional[dict]:
+    """Last (created_at, id) processed, if it belongs to this ledger."""
+    path = os.path.join(blockchain.path, WATERMARK_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            mark = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"  WARNING: ignoring unreadable watermark ({e}); rescanning")
+        return None
+
+    # A watermark written against another ledger (e.g. one that was reset)
+    # would skip rows this ledger has never seen
+    if mark.get("table") != TABLE_NAME or blockchain.get_block_by_hash(mark.get("ledger_tip", "")) is None:
+        print("  WARNING: watermark does not match this ledger; rescanning")
+        return None
+    return mark
+
+
+def save_watermark(blockchain: Blockchain, created_at: str, row_id: str):
+    """Atomically persist the watermark (call after blockchain.flush())."""
+    mark = {
+        "table": TABLE_NAME,
+        "created_at": created_at,
+        "id": row_id,
+        "ledger_tip": blockchain.chain[-1].block_hash,
+    }
+    fd, tmp = tempfile.mkstemp(dir=blockchain.path, prefix=".watermark-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(mark, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(blockchain.path, WATERMARK_FILE))
+    _fsync_dir(blockchain.path)
+
+
+# ── Fetching ──────────────────────────────────────────────────────────
+def fetch_projects_page(client: Client, after: Optional[tuple[str, str]], limit: int = PAGE_SIZE) -> list[dict]:
+    """One keyset page of (id, name, created_at) ordered by (created_at, id)."""
+    query = client.table(TABLE_NAME).select(f"{ID_COLUMN},{NAME_COLUMN},{CREATED_COLUMN}")
+    created_at, row_id = after or (None, None)
+    if created_at is not None and not row_id:
+        # Lookback start: a timestamp bound only (ids are UUIDs, "" is not one)
+        query = query.gte(CREATED_COLUMN, created_at)
+    elif created_at is not None:
+        query = query.or_(
+            f'{CREATED_COLUMN}.gt."{created_at}",'
+            f'and({CREATED_COLUMN}.eq."{created_at}",{ID_COLUMN}.gt."{row_id}")'
+        )
+    response = (
+        query.order(CREATED_COLUMN)
+        .order(ID_COLUMN)
+        .limit(limit)
+        .execute()
+    )
     return response.data
 
 
-def process_new_projects(client: Client, blockchain: Blockchain) -> int:
-    
-    projects = fetch_projects(client)
-    already_hashed = blockchain.get_hashed_project_ids()
-    new_count = 0
+def _position(created_at: str, row_id: str) -> tuple[datetime, str]:
+    return datetime.fromisoformat(created_at), row_id
+
+
+def _scan_start(mark: Optional[dict]) -> Optional[tuple[str, str]]:
+    if mark is None:
+        return None
+    if LOOKBACK_SECONDS <= 0:
+        return mark["created_at"], mark["id"]
+    start = datetime.fromisoformat(mark["created_at"]) - timedelta(seconds=LOOKBACK_SECONDS)
+    return start.isoformat(), ""
+
 
+# ── Processing ────────────────────────────────────────────────────────
+def hash_project_ids(project_ids: list[str], pool: Optional[ProcessPoolExecutor] = None,
+                     workers: int = 1) -> list[str]:
+    """Combined hashes for many IDs, spread over a `workers`-process pool when given one."""
+    if pool is None or len(project_ids) < POOL_MIN_BATCH:
+        return combined_hashes(project_ids)
+    step = -(-len(project_ids) // (workers * 4))
+    chunks = [project_ids[i:i + step] for i in range(0, len(project_ids), step)]
+    return [digest for part in pool.map(combined_hashes, chunks) for digest in part]
+
+
+def _ingest_verbose(projects: list[dict], blockchain: Blockchain) -> int:
+    new_count = 0
     for project in projects:
         project_id = str(project[ID_COLUMN])
         project_name = project.get(NAME_COLUMN, "Unknown")
 
-        if project_id in already_hashed:
+        if blockchain.has_project(project_id):
             continue
 
-      
+
         result = generate_combined_hash(project_id)
         combined_hash = result["combined_hash"]
 
-        
+
         block = blockchain.add_block(project_id, project_name, combined_hash)
 
         new_count += 1
@@ -62,45 +185,211 @@ def process_new_projects(client: Client, blockchain: Blockchain) -> int:
         print(f"    Combined : {combined_hash}")
         print(f"    Block Hash: {block.block_hash}")
         print()
+    return new_count
+
+
+def _ingest_batch(projects: list[dict], blockchain: Blockchain,
+                  pool: Optional[ProcessPoolExecutor], workers: int) -> int:
+    new_ids, names, seen = [], [], set()
+    for project in projects:
+        project_id = str(project[ID_COLUMN])
+        if project_id in seen or blockchain.has_project(project_id):
+            continue
+        seen.add(project_id)
+        new_ids.append(project_id)
+        names.append(project.get(NAME_COLUMN, "Unknown"))
+
+    hashes = hash_project_ids(new_ids, pool, workers)
+    return len(blockchain.add_blocks(zip(new_ids, names, hashes)))
+
+
+def process_new_projects(client: Client, blockchain: Blockchain, batch: bool = False, workers: int = 1) -> int:
+    """
+    Hash and append every project after the watermark.
+
+    batch=True hashes each page in one go (across `workers` processes) and
+    appends it with a single persist, printing one summary line instead of
+    a report per block.
+    """
+    mark = load_watermark(blockchain)
+    cursor = _scan_start(mark)
+    new_count = 0
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(workers) if batch and workers > 1 else None
+
+    try:
+        while True:
+            projects = fetch_projects_page(client, cursor, BATCH_PAGE_SIZE if batch else PAGE_SIZE)
+
+            if batch:
+                added = _ingest_batch(projects, blockchain, pool, workers)
+            else:
+                added = _ingest_verbose(projects, blockchain)
+            new_count += added
+
+            if projects:
+                last = projects[-1]
+                cursor = (last[CREATED_COLUMN], str(last[ID_COLUMN]))
+                advanced = mark is None or _position(*cursor) > _position(mark["created_at"], mark["id"])
+                # The lookback re-reads rows already seen on every poll: an idle
+                # page (nothing added, watermark not passed) touches no files
+                if not batch and (added or advanced):
+                    # Make this page's blocks durable before the watermark moves past
+                    # them (add_blocks has already flushed a batch page)
+                    blockchain.flush()
+                if advanced:
+                    save_watermark(blockchain, *cursor)
+                    mark = {"created_at": cursor[0], "id": cursor[1]}
+
+            if len(projects) < (BATCH_PAGE_SIZE if batch else PAGE_SIZE):
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if batch and new_count:
+        elapsed = time.perf_counter() - start
+        print(f"  [{time.strftime('%H:%M:%S')}] Ingested {new_count:,} block(s) in {elapsed:.2f}s "
+              f"({new_count / elapsed:,.0f} blocks/s, {workers} worker(s)), tip #{blockchain.chain[-1].index}")
 
     return new_count
 
 
-def run_once(client: Client, blockchain: Blockchain):
-    
+def run_once(client: Client, blockchain: Blockchain, batch: bool = False, workers: int = 1):
+
     print("\n── One-Shot Mode ──────────────────────────────────────────")
-    print(f"  Fetching projects from Supabase table '{TABLE_NAME}'...\n")
+    print(f"  Fetching new projects from table '{TABLE_NAME}'...\n")
 
-    added = process_new_projects(client, blockchain)
+    added = process_new_projects(client, blockchain, batch, workers)
 
     if added == 0:
         print("  No new projects found. Blockchain is up-to-date.\n")
     else:
         print(f"  Added {added} new block(s) to the blockchain.\n")
 
-    blockchain.print_chain()
+    if not batch:
+        blockchain.print_chain()
+
 
+def run_watch(client: Client, blockchain: Blockchain, interval: int, max_interval: int = MAX_INTERVAL,
+              batch: bool = False, workers: int = 1):
 
-def run_watch(client: Client, blockchain: Blockchain, interval: int):
-    
     print("\n── Watch Mode ─────────────────────────────────────────────")
-    print(f"  Polling Supabase table '{TABLE_NAME}' every {interval}s")
+    print(f"  Polling table '{TABLE_NAME}' every {interval}s (backing off to {max_interval}s when idle)")
     print("  Press Ctrl+C to stop.\n")
 
+    delay = interval
     try:
         while True:
-            added = process_new_projects(client, blockchain)
+            try:
+                added = process_new_projects(client, blockchain, batch, workers)
+            except Exception as e:
+                print(f"  [{time.strftime('%H:%M:%S')}] Poll failed: {e}")
+                added = 0
             if added > 0:
                 print(f"  [{time.strftime('%H:%M:%S')}] Added {added} new block(s).\n")
+                delay = interval
             else:
-                print(f"  [{time.strftime('%H:%M:%S')}] No new projects.", end="\r")
-            time.sleep(interval)
+                print(f"  [{time.strftime('%H:%M:%S')}] No new projects (next poll in {delay}s).", end="\r")
+            time.sleep(delay)
+            if added == 0:
+                delay = min(delay * 2, max_interval)
     except KeyboardInterrupt:
         print("\n\n  Watch stopped.")
         blockchain.print_chain()
 
 
+# ── Realtime ──────────────────────────────────────────────────────────
+async def _listen(client: Client, blockchain: Blockchain, max_interval: int, batch: bool, workers: int):
+    from realtime import AsyncRealtimeClient
+
+    wake = asyncio.Event()
+    realtime_url = SUPABASE_URL.rstrip("/").replace("http", "ws", 1) + "/realtime/v1"
+    socket = AsyncRealtimeClient(realtime_url, SUPABASE_KEY)
+    await socket.connect()
+    channel = socket.channel(f"watcher-{TABLE_NAME}")
+    await channel.on_postgres_changes(
+        "INSERT", lambda payload: wake.set(), table=TABLE_NAME, schema="public"
+    ).subscribe()
+
+    try:
+        while True:
+            # Events only wake the loop; the keyset pass is what reads rows,
+            # so missed or coalesced events cannot lose data
+            added = await asyncio.to_thread(process_new_projects, client, blockchain, batch, workers)
+            if added > 0:
+                print(f"  [{time.strftime('%H:%M:%S')}] Added {added} new block(s).\n")
+            wake.clear()
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=max_interval)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        await socket.close()
+
+
+def run_listen(client: Client, blockchain: Blockchain, max_interval: int = MAX_INTERVAL,
+               batch: bool = False, workers: int = 1):
+
+    if POSTGREST_URL or not SUPABASE_URL:
+        print("ERROR: --listen needs Supabase Realtime (SUPABASE_URL); use polling with POSTGREST_URL")
+        sys.exit(1)
+
+    print("\n── Listen Mode ────────────────────────────────────────────")
+    print(f"  Waiting for INSERTs on '{TABLE_NAME}' (safety poll every {max_interval}s)")
+    print("  Press Ctrl+C to stop.\n")
+
+    try:
+        asyncio.run(_listen(client, blockchain, max_interval, batch, workers))
+    except KeyboardInterrupt:
+        print("\n\n  Listen stopped.")
+        blockchain.print_chain()
+
+
+# ── Benchmark ─────────────────────────────────────────────────────────
+def benchmark_ingest(n: int = 100_000, workers: int = 1):
+    """Per-block (verbose) vs batch ingestion of n synthetic projects, no network."""
+    import contextlib
+    import io
+    import uuid
+
+    projects = [{ID_COLUMN: str(uuid.uuid4()), NAME_COLUMN: f"Project {i}"} for i in range(n)]
+    print(f"\n  Ingest benchmark ({n:,} projects)")
+    for label in ("per-block", "batch"):
+        with tempfile.TemporaryDirectory() as tmp:
+            with Blockchain(os.path.join(tmp, "ledger"), legacy_file=None) as bc:
+                start = time.perf_counter()
+                if label == "batch":
+                    with ProcessPoolExecutor(workers) if workers > 1 else contextlib.nullcontext() as pool:
+                        for i in range(0, n, BATCH_PAGE_SIZE):
+                            _ingest_batch(projects[i:i + BATCH_PAGE_SIZE], bc, pool, workers)
+                else:
+                    # Terminal output replaced by an in-memory sink
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        for i in range(0, n, PAGE_SIZE):
+                            _ingest_verbose(projects[i:i + PAGE_SIZE], bc)
+                            bc.flush()
+                elapsed = time.perf_counter() - start
+        print(f"  {label:<10}: {elapsed:6.2f}s ({n / elapsed:>9,.0f} blocks/s)")
+
+
 if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        sizes = [int(a) for a in sys.argv[1:] if a.isdigit()] or (100_000,)
+        for n in sizes:
+            benchmark_ingest(n)
+        sys.exit(0)
+
+
+    parser = argparse.ArgumentParser(description="Supabase → hash → blockchain pipeline")
+    parser.add_argument("interval", nargs="?", type=int, default=10, help="base poll interval in seconds")
+    parser.add_argument("--once", action="store_true", help="run a single incremental pass")
+    parser.add_argument("--listen", action="store_true", help="react to Supabase Realtime INSERT events")
+    parser.add_argument("--max-interval", type=int, default=MAX_INTERVAL, help="idle backoff ceiling in seconds")
+    parser.add_argument("--batch", action="store_true", help="bulk ingest: one persist and one summary line per page")
+    parser.add_argument("--workers", type=int, default=1, help="hashing processes in --batch mode")
+    args = parser.parse_args()
+
     print("=" * 70)
     print("  SUPABASE → HASH → BLOCKCHAIN PIPELINE")
     print("=" * 70)
@@ -108,10 +397,13 @@ if __name__ == "__main__":
     client = get_supabase_client()
     blockchain = Blockchain()
 
-    if "--once" in sys.argv:
-        
-        run_once(client, blockchain)
-    else:
-    
-        interval = int(sys.argv[1]) if len(sys.argv) > 1 else 10
-        run_watch(client, blockchain, interval)
+    with blockchain:
+        if args.once:
+
+            run_once(client, blockchain, args.batch, args.workers)
+        elif args.listen:
+            run_listen(client, blockchain, args.max_interval, args.batch, args.workers)
+        else:
+
+            run_watch(client, blockchain, args.interval, max(args.interval, args.max_interval),
+                      args.batch, args.workers)
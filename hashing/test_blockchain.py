@@ -0,0 +1,88 @@
+"""
+Regression tests for Blockchain.load recovery
+
+    cd hashing && python -m pytest -q test_blockchain.py
+"""
+
+import os
+
+import pytest
+
+from blockchain import IMAGE_BLOCK_PREFIX, Blockchain, _segment_name
+
+
+def _ledger(tmp_path, n=10):
+    path = str(tmp_path / "ledger")
+    with Blockchain(path, legacy_file=None) as bc:
+        for i in range(n):
+            bc.add_block(f"project-{i}", f"Project {i}", "ab" * 32)
+    return path, os.path.join(path, _segment_name(0))
+
+
+def test_corruption_inside_fsynced_region_is_not_truncated(tmp_path):
+    path, seg = _ledger(tmp_path)
+    with open(seg, "rb") as f:
+        lines = f.readlines()
+    lines[3] = lines[3][:40] + b"\n"          # unparseable line at block 3
+    with open(seg, "wb") as f:
+        f.writelines(lines)
+    size = os.path.getsize(seg)
+
+    with pytest.raises(ValueError, match="fsynced region"):
+        Blockchain(path, legacy_file=None)
+    assert os.path.getsize(seg) == size
+
+
+def test_torn_write_past_tail_is_dropped(tmp_path):
+    path, seg = _ledger(tmp_path)
+    size = os.path.getsize(seg)
+    with open(seg, "ab") as f:
+        f.write(b'{"index": 11, "proj')
+
+    bc = Blockchain(path, legacy_file=None)
+    assert len(bc) == 11
+    assert os.path.getsize(seg) == size
+    bc.close()
+
+
+def test_image_blocks_stay_out_of_project_lookups(tmp_path):
+    path, _ = _ledger(tmp_path, n=2)
+    with Blockchain(path, legacy_file=None) as bc:
+        bc.add_block(IMAGE_BLOCK_PREFIX + "uploads/a.jpg", "uploads/a.jpg", "cd" * 32)
+
+    bc = Blockchain(path, legacy_file=None)
+    assert bc.get_hashed_project_ids() == {"project-0", "project-1"}
+    assert not bc.has_project(IMAGE_BLOCK_PREFIX + "uploads/a.jpg")
+    assert bc.get_block_by_image("uploads/a.jpg").combined_hash == "cd" * 32
+    assert bc.contains_hash("cd" * 32)
+    bc.close()
+
+
+def test_missing_tail_is_rebuilt_without_a_second_genesis(tmp_path):
+    path, _ = _ledger(tmp_path, n=30)
+    os.remove(os.path.join(path, "tail.json"))
+
+    with Blockchain(path, legacy_file=None) as bc:
+        assert len(bc) == 31
+        for i in range(5):
+            bc.add_block(f"late-{i}", f"Late {i}", "ef" * 32)
+
+    bc = Blockchain(path, legacy_file=None)
+    assert len(bc) == 36
+    assert [b.project_id for b in bc.chain].count("GENESIS") == 1
+    assert bc.is_chain_valid(full=True)
+    bc.close()
+
+
+def test_checkpoints_keep_advancing_after_a_restart(tmp_path):
+    path = str(tmp_path / "ledger")
+    with Blockchain(path, legacy_file=None, checkpoint_interval=10) as bc:
+        bc.add_blocks((f"project-{i}", f"Project {i}", "ab" * 32) for i in range(25))
+        assert [cp["index"] for cp in bc.checkpoints] == [10, 20]
+
+    with Blockchain(path, legacy_file=None, checkpoint_interval=10) as bc:
+        bc.add_blocks((f"more-{i}", f"More {i}", "cd" * 32) for i in range(100))
+
+    bc = Blockchain(path, legacy_file=None, checkpoint_interval=10)
+    assert [cp["index"] for cp in bc.checkpoints] == list(range(10, 121, 10))
+    bc.close()
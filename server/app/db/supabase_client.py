@@ -2,14 +2,24 @@
 Supabase client initialization and database operations
 """
 
+import asyncio
+from datetime import datetime, timezone
 from supabase import create_client, Client
+from app.utils.cache import ReadThroughCache
 from app.utils.config import settings
+from app.utils.metrics import DB_SECONDS, timed
 import logging
 
 logger = logging.getLogger(__name__)
 
 _supabase_client: Client = None
 
+# Read-through caches for the hot submission reads. Entries are shared
+# between callers and must be treated as read-only; update_submission
+# invalidates them, and the TTL bounds staleness from other processes.
+_submission_cache = ReadThroughCache(settings.DB_CACHE_TTL_SECONDS, settings.DB_CACHE_MAX_ENTRIES)
+_latest_verified_cache = ReadThroughCache(settings.DB_CACHE_TTL_SECONDS, settings.DB_CACHE_MAX_ENTRIES)
+
 
 def get_supabase_client() -> Client:
     """Get or create Supabase client singleton"""
@@ -28,29 +38,47 @@ def get_supabase_client() -> Client:
     return _supabase_client
 
 
+def cache_stats() -> dict:
+    """Hit/miss counters of the submission read caches"""
+    return {
+        "submission": _submission_cache.stats(),
+        "latest_verified_submission": _latest_verified_cache.stats(),
+    }
+
+
+@timed(DB_SECONDS.labels("create_submission"))
 async def create_submission(submission_data: dict) -> dict:
     """Create a new submission record"""
     client = get_supabase_client()
     result = client.table("submissions").insert(submission_data).execute()
+    if submission_data.get("project_id"):
+        _latest_verified_cache.invalidate(str(submission_data["project_id"]))
     return result.data[0] if result.data else None
 
 
+@timed(DB_SECONDS.labels("update_submission"))
 async def update_submission(submission_id: str, update_data: dict) -> dict:
     """Update submission record"""
     client = get_supabase_client()
+    _submission_cache.invalidate(str(submission_id))
     result = client.table("submissions").update(update_data).eq("id", submission_id).execute()
-    return result.data[0] if result.data else None
+    row = result.data[0] if result.data else None
+    # Invalidate again after the write: a read that raced it may have cached the old row
+    _submission_cache.invalidate(str(submission_id))
+    if row and row.get("project_id"):
+        _latest_verified_cache.invalidate(str(row["project_id"]))
+    return row
 
 
-async def get_submission(submission_id: str) -> dict:
-    """Get submission by ID"""
+@timed(DB_SECONDS.labels("get_submission"))
+def _fetch_submission(submission_id: str) -> dict:
     client = get_supabase_client()
     result = client.table("submissions").select("*").eq("id", submission_id).execute()
     return result.data[0] if result.data else None
 
 
-async def get_latest_verified_submission(project_id: str) -> dict:
-    """Get the latest verified submission for a project"""
+@timed(DB_SECONDS.labels("get_latest_verified_submission"))
+def _fetch_latest_verified_submission(project_id: str) -> dict:
     client = get_supabase_client()
     result = (
         client.table("submissions")
@@ -64,6 +92,23 @@ async def get_latest_verified_submission(project_id: str) -> dict:
     return result.data[0] if result.data else None
 
 
+async def get_submission(submission_id: str) -> dict:
+    """Get submission by ID (cached; concurrent lookups share one query)"""
+    key = str(submission_id)
+    return await _submission_cache.get_or_load(
+        key, lambda: asyncio.to_thread(_fetch_submission, key)
+    )
+
+
+async def get_latest_verified_submission(project_id: str) -> dict:
+    """Get the latest verified submission for a project (cached)"""
+    key = str(project_id)
+    return await _latest_verified_cache.get_or_load(
+        key, lambda: asyncio.to_thread(_fetch_latest_verified_submission, key)
+    )
+
+
+@timed(DB_SECONDS.labels("create_temporal_history"))
 async def create_temporal_history(history_data: dict) -> dict:
     """Create temporal history record"""
     client = get_supabase_client()
@@ -71,6 +116,7 @@ async def create_temporal_history(history_data: dict) -> dict:
     return result.data[0] if result.data else None
 
 
+@timed(DB_SECONDS.labels("register_model"))
 async def register_model(model_data: dict) -> dict:
     """Register a model in the model registry"""
     client = get_supabase_client()
@@ -78,6 +124,7 @@ async def register_model(model_data: dict) -> dict:
     return result.data[0] if result.data else None
 
 
+@timed(DB_SECONDS.labels("get_model_version"))
 async def get_model_version(model_name: str) -> dict:
     """Get latest model version"""
     client = get_supabase_client()
@@ -90,3 +137,157 @@ async def get_model_version(model_name: str) -> dict:
         .execute()
     )
     return result.data[0] if result.data else None
+
+
+@timed(DB_SECONDS.labels("create_anchor_records"))
+async def create_anchor_records(records: list) -> list:
+    """Store Merkle inclusion proofs for an anchored batch"""
+    client = get_supabase_client()
+    result = client.table("blockchain_anchors").insert(records).execute()
+    return result.data or []
+
+
+@timed(DB_SECONDS.labels("update_anchor_records"))
+async def update_anchor_records(batch_id: str, update_data: dict) -> list:
+    """Update every anchor record of a batch (status, transaction hash)"""
+    client = get_supabase_client()
+    result = client.table("blockchain_anchors").update(update_data).eq("batch_id", batch_id).execute()
+    return result.data or []
+
+
+@timed(DB_SECONDS.labels("get_anchor_record"))
+async def get_anchor_record(submission_id: str) -> dict:
+    """Get the latest anchor record (root + proof) for a submission"""
+    client = get_supabase_client()
+    result = (
+        client.table("blockchain_anchors")
+        .select("*")
+        .eq("submission_id", submission_id)
+        .order("created_at", desc=True)
+        .limit(1)
+        .execute()
+    )
+    return result.data[0] if result.data else None
+
+
+# PostgREST caps a response (max-rows, 1000 by default) and long in.() lists
+# make long URLs, so the anchor recovery reads and filters in pages
+_PAGE_SIZE = 1000
+_IN_CHUNK = 200
+
+
+@timed(DB_SECONDS.labels("queue_anchor"))
+async def queue_anchor(submission_id: str, data_hash: str) -> dict:
+    """Persist a submission's leaf until its Merkle batch is sealed"""
+    client = get_supabase_client()
+    result = client.table("anchor_queue").upsert(
+        {"submission_id": submission_id, "data_hash": data_hash}
+    ).execute()
+    return result.data[0] if result.data else None
+
+
+@timed(DB_SECONDS.labels("delete_queued_anchors"))
+async def delete_queued_anchors(submission_ids: list) -> None:
+    """Drop queued leaves whose batch records have been stored"""
+    client = get_supabase_client()
+    for i in range(0, len(submission_ids), _IN_CHUNK):
+        client.table("anchor_queue").delete().in_("submission_id", submission_ids[i:i + _IN_CHUNK]).execute()
+
+
+@timed(DB_SECONDS.labels("get_queued_anchors"))
+async def get_queued_anchors(created_before: str) -> list:
+    """Queued leaves older than a timestamp, oldest first"""
+    client = get_supabase_client()
+    rows = []
+    while True:
+        page = (
+            client.table("anchor_queue")
+            .select("*")
+            .lt("created_at", created_before)
+            .order("created_at")
+            .order("submission_id")
+            .range(len(rows), len(rows) + _PAGE_SIZE - 1)
+            .execute()
+        ).data or []
+        rows.extend(page)
+        if len(page) < _PAGE_SIZE:
+            return rows
+
+
+@timed(DB_SECONDS.labels("get_anchor_records_by_status"))
+async def get_anchor_records_by_status(status: str, created_before: str) -> list:
+    """Anchor records in one status older than a timestamp, by batch and leaf"""
+    client = get_supabase_client()
+    rows = []
+    while True:
+        page = (
+            client.table("blockchain_anchors")
+            .select("*")
+            .eq("status", status)
+            .lt("created_at", created_before)
+            .order("batch_id")
+            .order("leaf_index")
+            .range(len(rows), len(rows) + _PAGE_SIZE - 1)
+            .execute()
+        ).data or []
+        rows.extend(page)
+        if len(page) < _PAGE_SIZE:
+            return rows
+
+
+def _claim(query, claimant: str, stale_before: str) -> list:
+    """
+    Finish a claiming UPDATE: rows nobody holds, or whose claim went stale
+    
+    Postgres re-checks the WHERE clause of a row another UPDATE has just
+    changed, so when processes race for the same rows each row is returned
+    to exactly one of them.
+    """
+    return query.update({
+        "claimed_by": claimant,
+        "claimed_at": datetime.now(timezone.utc).isoformat(),
+    }).or_(f'claimed_at.is.null,claimed_at.lt."{stale_before}"')
+
+
+@timed(DB_SECONDS.labels("claim_queued_anchors"))
+async def claim_queued_anchors(submission_ids: list, claimant: str, stale_before: str) -> list:
+    """Claim queued leaves for resealing; returns the rows this caller won"""
+    client = get_supabase_client()
+    claimed = []
+    for i in range(0, len(submission_ids), _IN_CHUNK):
+        result = (
+            _claim(client.table("anchor_queue"), claimant, stale_before)
+            .in_("submission_id", submission_ids[i:i + _IN_CHUNK])
+            .execute()
+        )
+        claimed.extend(result.data or [])
+    return claimed
+
+
+@timed(DB_SECONDS.labels("claim_anchor_batch"))
+async def claim_anchor_batch(batch_id: str, status: str, claimant: str, stale_before: str) -> list:
+    """Claim every record of a batch still in `status`; empty when another process holds it"""
+    client = get_supabase_client()
+    result = (
+        _claim(client.table("blockchain_anchors"), claimant, stale_before)
+        .eq("batch_id", batch_id)
+        .eq("status", status)
+        .execute()
+    )
+    return result.data or []
+
+
+@timed(DB_SECONDS.labels("get_anchored_submission_ids"))
+async def get_anchored_submission_ids(submission_ids: list) -> set:
+    """Which of these submissions already have an anchor record"""
+    client = get_supabase_client()
+    anchored = set()
+    for i in range(0, len(submission_ids), _IN_CHUNK):
+        result = (
+            client.table("blockchain_anchors")
+            .select("submission_id")
+            .in_("submission_id", submission_ids[i:i + _IN_CHUNK])
+            .execute()
+        )
+        anchored.update(str(row["submission_id"]) for row in result.data or [])
+    return anchored
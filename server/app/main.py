@@ -7,20 +7,25 @@ from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from typing import Optional
 import logging
 
-from app.routes import upload, mrv, projects, health
+from app.routes import upload, mrv, projects, health, metrics, debug
 from app.services.ml_pipeline import MLPipelineOrchestrator
+from app.services.mangrove_model import get_mangrove_model
+from app.services.biomass_model import get_biomass_model
+from app.services.temporal_model import get_temporal_model
+from app.services.spatial_index import start_spatial_index, stop_spatial_index
+from app.services.job_manager import get_job_manager, stop_job_manager
 from app.db.supabase_client import get_supabase_client
 from app.utils.config import settings
+from app.utils.log import configure_logging, shutdown_logging
+from app.utils.profiler import ProfilerMiddleware
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (queue-backed; formatting and writes happen off the request path)
+configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT, settings.LOG_QUEUE_SIZE)
 logger = logging.getLogger(__name__)
 
 # Global ML Pipeline Orchestrator
@@ -46,14 +51,31 @@ async def lifespan(app: FastAPI):
     
     # Store in app state
     app.state.ml_pipeline = ml_pipeline
+    get_job_manager(ml_pipeline.run_pipeline)
+    
+    # Spatial index loads in the background; /projects/search answers 503 until ready
+    await start_spatial_index()
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down Blue Carbon MRV Backend...")
+    await stop_spatial_index()
+    await stop_job_manager()
     if ml_pipeline:
         await ml_pipeline.cleanup()
     logger.info("✅ Shutdown complete")
+    shutdown_logging()
+
+
+def preload():
+    """
+    Load the ML models in this process (the pre-fork parent, see app.utils.prefork);
+    forked workers then find the model singletons already loaded during lifespan startup
+    """
+    async def load():
+        await asyncio.gather(get_mangrove_model(), get_biomass_model(), get_temporal_model())
+    asyncio.run(load())
 
 
 # Create FastAPI app
@@ -73,8 +95,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Readable by browser JS: the projects list's next-page cursor and page ETag
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Opt-in request profiling (X-Profile-Token header or /debug/profile/start)
+app.add_middleware(ProfilerMiddleware)
+
 # Security
 security = HTTPBearer()
 
@@ -90,6 +117,8 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
 
 # Include routers
 app.include_router(health.router, tags=["Health"])
+app.include_router(metrics.router, tags=["Metrics"])
+app.include_router(debug.router, tags=["Debug"])
 app.include_router(upload.router, prefix="/api/v1", tags=["Upload"], dependencies=[Depends(verify_token)])
 app.include_router(mrv.router, prefix="/api/v1", tags=["MRV Pipeline"], dependencies=[Depends(verify_token)])
 app.include_router(projects.router, prefix="/api/v1", tags=["Projects"], dependencies=[Depends(verify_token)])
@@ -0,0 +1,73 @@
+"""
+Debug endpoints - request profiling
+"""
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import hmac
+
+from app.utils.config import settings
+from app.utils.profiler import get_profiler
+
+router = APIRouter()
+
+
+def require_profile_token(x_profile_token: Optional[str] = Header(None)):
+    """Debug endpoints exist only when PROFILE_TOKEN is set, and require it"""
+    if not settings.PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_profile_token or not hmac.compare_digest(x_profile_token, settings.PROFILE_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+
+@router.post("/debug/profile/start", dependencies=[Depends(require_profile_token)])
+async def start_profiling(
+    requests: int = Query(0, ge=0, le=10000, description="Profile the next N requests"),
+    seconds: float = Query(0, ge=0, le=3600, description="Profile every request for T seconds")
+):
+    """Arm the sampling profiler"""
+    if not requests and not seconds:
+        raise HTTPException(status_code=400, detail="Give requests and/or seconds")
+    get_profiler().arm(requests, seconds)
+    return get_profiler().stats()
+
+
+@router.post("/debug/profile/stop", dependencies=[Depends(require_profile_token)])
+async def stop_profiling():
+    """Disarm the profiler (requests already being profiled finish normally)"""
+    get_profiler().disarm()
+    return get_profiler().stats()
+
+
+@router.get("/debug/profile", response_class=PlainTextResponse, dependencies=[Depends(require_profile_token)])
+async def download_profile(path: Optional[str] = Query(None, description="Only requests to this path")):
+    """Collapsed stacks of all retained profiles (flamegraph.pl / speedscope input)"""
+    return PlainTextResponse(
+        get_profiler().collapsed(path),
+        headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'},
+    )
+
+
+@router.get("/debug/profile/requests", dependencies=[Depends(require_profile_token)])
+async def list_profiles():
+    """Retained per-request profiles, newest last"""
+    profiler = get_profiler()
+    return {"profiler": profiler.stats(), "requests": [p.summary() for p in profiler.profiles()]}
+
+
+@router.get("/debug/profile/{profile_id}", response_class=PlainTextResponse,
+            dependencies=[Depends(require_profile_token)])
+async def download_request_profile(profile_id: str):
+    """Collapsed stacks for one request (its X-Profile-Id response header)"""
+    profile = get_profiler().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile.collapsed())
+
+
+@router.delete("/debug/profile", dependencies=[Depends(require_profile_token)])
+async def clear_profiles():
+    """Drop retained profiles"""
+    get_profiler().clear()
+    return get_profiler().stats()
@@ -3,7 +3,11 @@ Health check endpoints
 """
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 from app.services.ml_pipeline import MLPipelineOrchestrator
+from app.db.supabase_client import cache_stats
+from app.services.event_bus import get_event_bus
+from app.services.job_manager import get_job_manager
 from app import main
 
 router = APIRouter()
@@ -18,6 +22,23 @@ async def health_check():
     }
 
 
+@router.get("/health/ready")
+async def readiness_check():
+    """Readiness check - 503 until every ML model has finished loading"""
+    ml_pipeline: MLPipelineOrchestrator = getattr(main.app.state, "ml_pipeline", None)
+    
+    if ml_pipeline and ml_pipeline.ready:
+        return {"status": "ready"}
+    
+    return JSONResponse(
+        status_code=503,
+        content={
+            "status": "error" if ml_pipeline and ml_pipeline.init_error else "warming_up",
+            "error": ml_pipeline.init_error if ml_pipeline else None,
+        }
+    )
+
+
 @router.get("/health/detailed")
 async def detailed_health_check():
     """Detailed health check with ML model status"""
@@ -27,8 +48,23 @@ async def detailed_health_check():
         "status": "healthy",
         "ml_pipeline": {
             "initialized": ml_pipeline.initialized if ml_pipeline else False,
+            "init_error": ml_pipeline.init_error if ml_pipeline else None,
+            "load_seconds": ml_pipeline.load_seconds if ml_pipeline else {},
             "mangrove_model": ml_pipeline.mangrove_model.initialized if ml_pipeline and ml_pipeline.mangrove_model else False,
             "biomass_model": ml_pipeline.biomass_model.initialized if ml_pipeline and ml_pipeline.biomass_model else False,
             "temporal_model": ml_pipeline.temporal_model.initialized if ml_pipeline and ml_pipeline.temporal_model else False,
-        }
+        },
+        "mangrove_feature_extraction": (
+            ml_pipeline.mangrove_model.feature_extractor.stats()
+            if ml_pipeline and ml_pipeline.mangrove_model else None
+        ),
+        "db_cache": cache_stats(),
+        "event_bus": get_event_bus().stats(),
+        "jobs": get_job_manager().stats() if ml_pipeline else None,
     }
+
+
+@router.get("/health/cache")
+async def cache_health_check():
+    """Hit rates of the in-process submission read caches"""
+    return cache_stats()
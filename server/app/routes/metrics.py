@@ -0,0 +1,31 @@
+"""
+Metrics endpoint
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.event_bus import get_event_bus
+from app.services import job_manager
+from app.utils.metrics import REGISTRY
+
+router = APIRouter()
+
+
+def _job_count(state: str) -> float:
+    manager = job_manager._job_manager
+    return manager.stats()[state] if manager else 0
+
+
+# Sampled when /metrics is scraped
+JOBS = REGISTRY.gauge("mrv_jobs", "Background pipeline jobs by state", ["state"])
+JOBS.labels("queued").set_function(lambda: _job_count("queued"))
+JOBS.labels("running").set_function(lambda: _job_count("running"))
+EVENT_SUBSCRIBERS = REGISTRY.gauge("mrv_event_subscribers", "Open submission event streams")
+EVENT_SUBSCRIBERS.set_function(lambda: get_event_bus().stats()["subscribers"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of pipeline, model and DB metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
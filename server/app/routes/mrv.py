@@ -2,12 +2,17 @@
 MRV Pipeline endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import Optional
+import json
 import logging
 
 from app.db.supabase_client import get_submission
+from app.services.event_bus import TERMINAL_STAGES, get_event_bus, submission_topic
+from app.services.job_manager import get_job_manager
 from app.services.ml_pipeline import MLPipelineOrchestrator
+from app.utils.config import settings
 from app import main
 
 router = APIRouter()
@@ -32,27 +37,149 @@ async def get_submission_status(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/mrv/process/{submission_id}")
+def _sse(event: dict) -> str:
+    lines = f"id: {event['id']}\n" if "id" in event else ""
+    return f"{lines}event: {event['stage']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+@router.get("/mrv/submission/{submission_id}/events")
+async def submission_events(
+    submission_id: str,
+    request: Request,
+    user: dict = Depends(lambda: {"user_id": "default_user"})
+):
+    """
+    Stream stage transitions for a submission as server-sent events
+    
+    The first event is the current stage (or a snapshot of the stored
+    status); the stream ends after verified, rejected or error. Stages are
+    only published in the process running the pipeline, so each heartbeat
+    also re-reads the stored status and ends the stream with a snapshot
+    once it is terminal.
+    """
+    bus = get_event_bus()
+    topic = submission_topic(submission_id)
+    
+    def snapshot_of(submission: dict) -> dict:
+        return {
+            "submission_id": submission_id,
+            "stage": "snapshot",
+            "status": submission.get("status"),
+            "terminal": submission.get("status") in TERMINAL_STAGES,
+        }
+    
+    snapshot = None
+    if bus.last_event(topic) is None:
+        submission = await get_submission(submission_id)
+        if not submission:
+            raise HTTPException(status_code=404, detail="Submission not found")
+        snapshot = snapshot_of(submission)
+    
+    async def stream():
+        with bus.subscribe(topic) as subscription:
+            # Subscribed before reading the retained event, so nothing falls in between
+            current = bus.last_event(topic) or snapshot
+            yield _sse(current)
+            if current["terminal"]:
+                return
+            last_id = current.get("id", 0)
+            while True:
+                event = await subscription.get(timeout=settings.EVENT_HEARTBEAT_SECONDS)
+                if event is None:
+                    if await request.is_disconnected():
+                        return
+                    try:
+                        stored = await get_submission(submission_id)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Could not re-check submission {submission_id}: {e}")
+                        stored = None
+                    if stored and stored.get("status") in TERMINAL_STAGES:
+                        yield _sse(snapshot_of(stored))
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                if event["id"] <= last_id:
+                    continue
+                last_id = event["id"]
+                yield _sse(event)
+                if event["terminal"]:
+                    return
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/mrv/process/{submission_id}", status_code=202)
 async def trigger_processing(
     submission_id: str,
+    response: Response,
+    wait: bool = Query(False, description="Hold the request until the pipeline finishes"),
     user: dict = Depends(lambda: {"user_id": "default_user"})
 ):
-    """Manually trigger MRV pipeline for a submission"""
-    try:
-        ml_pipeline: MLPipelineOrchestrator = main.app.state.ml_pipeline
-        
-        if not ml_pipeline:
-            raise HTTPException(status_code=503, detail="ML Pipeline not initialized")
-        
-        # Run pipeline
-        result = await ml_pipeline.run_pipeline(submission_id)
-        
+    """
+    Trigger the MRV pipeline for a submission
+    
+    Returns 202 with a job handle right away; poll /mrv/jobs/{job_id} or
+    stream /mrv/submission/{submission_id}/events. A trigger for a
+    submission that is already queued or running returns the existing job.
+    With wait=true the request blocks until the job finishes (200).
+    """
+    ml_pipeline: MLPipelineOrchestrator = main.app.state.ml_pipeline
+    if not ml_pipeline:
+        raise HTTPException(status_code=503, detail="ML Pipeline not initialized")
+    
+    job, created = get_job_manager().submit(submission_id)
+    if wait:
+        await get_job_manager().wait(job)
+        if job.status == "failed":
+            logger.error(f"❌ Processing failed: {job.error}")
+            raise HTTPException(status_code=500, detail=job.error)
+        response.status_code = 200
         return {
             "submission_id": submission_id,
-            "status": result["status"],
+            "job_id": job.id,
+            "status": job.result["status"],
             "message": "Processing completed"
         }
+    
+    response.headers["Location"] = f"/api/v1/mrv/jobs/{job.id}"
+    return {
+        "submission_id": submission_id,
+        "job_id": job.id,
+        "status": job.status,
+        "deduplicated": not created,
+        "status_url": f"/api/v1/mrv/jobs/{job.id}",
+        "events_url": f"/api/v1/mrv/submission/{submission_id}/events",
+    }
+
+
+@router.get("/mrv/jobs/{job_id}")
+async def get_job_status(
+    job_id: str,
+    user: dict = Depends(lambda: {"user_id": "default_user"})
+):
+    """Pipeline job status with per-stage progress"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.get("/mrv/submission/{submission_id}/anchor")
+async def get_submission_anchor(
+    submission_id: str,
+    user: dict = Depends(lambda: {"user_id": "default_user"})
+):
+    """Verify a submission against its anchored Merkle root"""
+    try:
+        from app.services.blockchain_service import verify_submission_anchor
+        return await verify_submission_anchor(submission_id)
         
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        logger.error(f"❌ Processing failed: {e}")
+        logger.error(f"❌ Anchor verification failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -2,16 +2,31 @@
 Project management endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import base64
+import hashlib
+import json
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from typing import List, Optional
+from uuid import UUID
 import logging
 
 from app.db.supabase_client import get_supabase_client
 from app.db.schemas import ProjectCreate, Project
+from app.services.spatial_index import get_spatial_index
+from app.utils.cache import TTLCache
+from app.utils.config import settings
+from app.utils.metrics import DB_SECONDS, timed
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+PROJECT_FIELDS = tuple(Project.model_fields)
+
+# Listing pages keyed by (fields, limit, cursor, region, bbox); cleared on create
+_page_cache = TTLCache(settings.PROJECTS_CACHE_TTL_SECONDS, max_entries=512)
+
 
 @router.post("/projects", response_model=Project)
 async def create_project(
@@ -26,6 +41,8 @@ async def create_project(
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create project")
         
+        _page_cache.clear()
+        get_spatial_index().upsert(result.data[0])
         return result.data[0]
         
     except Exception as e:
@@ -33,20 +50,142 @@ async def create_project(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["created_at"], str(row["id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    # Both halves end up in a PostgREST filter: accept only a timestamp and a UUID
+    try:
+        created_at, project_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), str(UUID(project_id))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _parse_bbox(bbox: str) -> tuple:
+    try:
+        box = tuple(float(v) for v in bbox.split(","))
+    except ValueError:
+        box = ()
+    if len(box) != 4:
+        raise HTTPException(status_code=400, detail="bbox must be min_lat,min_lon,max_lat,max_lon")
+    return box
+
+
+@timed(DB_SECONDS.labels("list_projects"))
+def _fetch_projects_page(columns: List[str], limit: int, after: Optional[tuple], region: Optional[str],
+                         bbox: Optional[tuple]) -> List[dict]:
+    """One keyset page ordered by (created_at, id); runs in a worker thread"""
+    client = get_supabase_client()
+    query = client.table("projects").select(",".join(columns))
+    if after is not None:
+        created_at, project_id = after[0].isoformat(), after[1]
+        query = query.or_(
+            f'created_at.gt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.gt.{project_id})'
+        )
+    if region:
+        query = query.eq("region", region)
+    if bbox:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        query = query.gte("latitude", min_lat).lte("latitude", max_lat)
+        if min_lon <= max_lon:
+            query = query.gte("longitude", min_lon).lte("longitude", max_lon)
+        else:
+            # Box crossing the antimeridian
+            query = query.or_(f"longitude.gte.{min_lon},longitude.lte.{max_lon}")
+    result = query.order("created_at").order("id").limit(limit).execute()
+    return result.data
+
+
 @router.get("/projects", response_model=List[Project])
 async def list_projects(
+    request: Request,
+    limit: int = Query(settings.PROJECTS_PAGE_SIZE, ge=1, le=settings.PROJECTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    region: Optional[str] = None,
+    bbox: Optional[str] = Query(None, description="min_lat,min_lon,max_lat,max_lon"),
     user: dict = Depends(lambda: {"user_id": "default_user"})
 ):
-    """List all projects"""
-    try:
-        client = get_supabase_client()
-        result = client.table("projects").select("*").execute()
+    """
+    List projects, oldest first, one keyset page at a time
+    
+    The next page's cursor is returned in the X-Next-Cursor header (absent on
+    the last page). Pages are cached for PROJECTS_CACHE_TTL_SECONDS and carry
+    an ETag; a matching If-None-Match gets 304 without a database round-trip.
+    """
+    requested = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(PROJECT_FIELDS)
+    unknown = set(requested) - set(PROJECT_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    
+    box = _parse_bbox(bbox) if bbox else None
+    after = _decode_cursor(cursor) if cursor else None
+    
+    key = (tuple(requested), limit, after, region, box)
+    cached = _page_cache.get(key)
+    if cached is None:
+        try:
+            # Cursor columns are always read, then dropped unless requested
+            columns = list(dict.fromkeys(requested + ["created_at", "id"]))
+            rows = await asyncio.to_thread(_fetch_projects_page, columns, limit, after, region, box)
+        except Exception as e:
+            logger.error(f"❌ Failed to list projects: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
         
-        return result.data
-        
-    except Exception as e:
-        logger.error(f"❌ Failed to list projects: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        next_cursor = _encode_cursor(rows[-1]) if len(rows) == limit else None
+        if fields:
+            rows = [{f: row.get(f) for f in requested} for row in rows]
+        body = json.dumps(rows, separators=(",", ":"), default=str).encode()
+        etag = f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+        cached = (etag, body, next_cursor)
+        _page_cache.set(key, cached)
+    
+    etag, body, next_cursor = cached
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={int(settings.PROJECTS_CACHE_TTL_SECONDS)}"}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    # Rows come straight from the table: serialized once, no per-row model validation
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _ready_index():
+    index = get_spatial_index()
+    if index.built_at is None:
+        raise HTTPException(status_code=503, detail="Spatial index is still loading")
+    return index
+
+
+@router.get("/projects/search/bbox")
+async def search_projects_bbox(
+    bbox: str = Query(..., description="min_lat,min_lon,max_lat,max_lon (min_lon > max_lon crosses the antimeridian)"),
+    limit: int = Query(settings.PROJECTS_MAX_PAGE_SIZE, ge=1, le=settings.PROJECTS_MAX_PAGE_SIZE),
+    user: dict = Depends(lambda: {"user_id": "default_user"})
+):
+    """Projects inside a bounding box, served from the in-memory spatial index"""
+    min_lat, min_lon, max_lat, max_lon = _parse_bbox(bbox)
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="min_lat must not exceed max_lat")
+    results = _ready_index().bbox(min_lat, min_lon, max_lat, max_lon, limit=limit + 1)
+    return {"projects": results[:limit], "count": len(results[:limit]), "truncated": len(results) > limit}
+
+
+@router.get("/projects/search/nearest")
+async def search_projects_nearest(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=settings.PROJECTS_MAX_PAGE_SIZE),
+    max_km: Optional[float] = Query(None, gt=0, description="Only projects within this distance"),
+    user: dict = Depends(lambda: {"user_id": "default_user"})
+):
+    """k nearest projects by great-circle distance, closest first"""
+    results = _ready_index().nearest(lat, lon, k, max_km)
+    return {"projects": results, "count": len(results)}
 
 
 @router.get("/projects/{project_id}", response_model=Project)
@@ -2,17 +2,16 @@
 Image upload endpoints
 """
 
-from fastapi import APIRouter, UploadFile, File, BackgroundTasks, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from typing import Optional
 import uuid
 from datetime import datetime
 import logging
 
 from app.db.supabase_client import create_submission
-from app.services.ml_pipeline import MLPipelineOrchestrator
+from app.services.job_manager import get_job_manager
 from app.utils.storage import upload_to_supabase
 from app.utils.config import settings
-from app import main
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -22,7 +21,6 @@ logger = logging.getLogger(__name__)
 async def upload_image(
     project_id: str,
     file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     user: dict = Depends(lambda: {"user_id": "default_user"})
 ):
     """
@@ -81,17 +79,15 @@ async def upload_image(
         submission_id = submission["id"]
         
         # Trigger background ML pipeline
-        ml_pipeline: MLPipelineOrchestrator = main.app.state.ml_pipeline
+        job_id = None
         if settings.USE_CELERY:
             # Use Celery for production
             from app.tasks.mrv_tasks import run_mrv_pipeline_task
             run_mrv_pipeline_task.delay(str(submission_id))
         else:
-            # Use FastAPI BackgroundTasks for small scale
-            background_tasks.add_task(
-                ml_pipeline.run_pipeline,
-                str(submission_id)
-            )
+            # In-process job (same dedup and status endpoint as /mrv/process)
+            job, _ = get_job_manager().submit(str(submission_id))
+            job_id = job.id
         
         logger.info(f"✅ Image uploaded: {submission_id}, pipeline triggered")
         
@@ -99,6 +95,7 @@ async def upload_image(
             "submission_id": submission_id,
             "image_url": image_url,
             "status": "uploaded",
+            "job_id": job_id,
             "message": "Image uploaded successfully. Processing started."
         }
         
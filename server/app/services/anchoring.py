@@ -0,0 +1,358 @@
+"""
+On-chain Anchoring Backend
+Submits Merkle batch roots to MerkleTreeUtils.registerMerkleRoot over JSON-RPC
+
+Sealed batches are queued and sent by a background worker. The worker
+assigns nonces locally (one RPC round-trip per process, not per
+transaction) and retries failed sends with exponential backoff. A
+concurrent tracker polls receipts until each transaction has
+ANCHOR_CONFIRMATIONS confirmations.
+
+Transactions are signed locally with eth-account when PRIVATE_KEY is set
+and eth-account is installed; otherwise they go through eth_sendTransaction
+from an unlocked node account (Hardhat / Anvil dev chains).
+BLOCKCHAIN_RPC_URL=devchain selects the in-process stand-in chain.
+"""
+
+import asyncio
+import itertools
+import time
+from typing import Any, Dict, List, Optional
+import logging
+
+import httpx
+
+from app.utils.config import settings
+from app.utils.keccak import keccak256
+from app.services.merkle import MerkleBatch
+
+logger = logging.getLogger(__name__)
+
+REGISTER_MERKLE_ROOT = keccak256(b"registerMerkleRoot(string,bytes32)")[:4]
+PROJECT_MERKLE_ROOTS = keccak256(b"projectMerkleRoots(string)")[:4]
+
+
+class ChainError(Exception):
+    """JSON-RPC error returned by the node"""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+# ==================== ABI ====================
+
+def _encode_string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return len(data).to_bytes(32, "big") + data + b"\x00" * (-len(data) % 32)
+
+
+def encode_register_merkle_root(project_id: str, root: bytes) -> str:
+    """Calldata for registerMerkleRoot(string projectID, bytes32 merkleRoot)"""
+    if len(root) != 32:
+        raise ValueError("Merkle root must be 32 bytes")
+    head = (64).to_bytes(32, "big") + root
+    return "0x" + (REGISTER_MERKLE_ROOT + head + _encode_string(project_id)).hex()
+
+
+def encode_project_merkle_roots(project_id: str) -> str:
+    """Calldata for the projectMerkleRoots(string) getter"""
+    return "0x" + (PROJECT_MERKLE_ROOTS + (32).to_bytes(32, "big") + _encode_string(project_id)).hex()
+
+
+def decode_register_merkle_root(calldata: str) -> tuple:
+    """(project_id, root) from registerMerkleRoot calldata"""
+    data = bytes.fromhex(calldata[2:] if calldata.startswith("0x") else calldata)
+    if data[:4] != REGISTER_MERKLE_ROOT:
+        raise ValueError("Not a registerMerkleRoot call")
+    args = data[4:]
+    offset = int.from_bytes(args[:32], "big")
+    root = args[32:64]
+    length = int.from_bytes(args[offset:offset + 32], "big")
+    return args[offset + 32:offset + 32 + length].decode("utf-8"), root
+
+
+# ==================== JSON-RPC ====================
+
+class JsonRpcClient:
+    """Minimal async Ethereum JSON-RPC client"""
+
+    def __init__(self, url: str, transport: Optional[httpx.AsyncBaseTransport] = None, timeout: float = 30.0):
+        self.url = url
+        self._ids = itertools.count(1)
+        self._client = httpx.AsyncClient(transport=transport, timeout=timeout)
+
+    async def call(self, method: str, *params: Any) -> Any:
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)}
+        response = await self._client.post(self.url, json=payload)
+        response.raise_for_status()
+        body = response.json()
+        if body.get("error"):
+            error = body["error"]
+            raise ChainError(f"{method}: {error.get('message')}", error.get("code"))
+        return body.get("result")
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class NonceManager:
+    """Hands out sequential nonces for one sender; resyncs from the node on demand"""
+
+    def __init__(self, rpc: JsonRpcClient, address: str):
+        self.rpc = rpc
+        self.address = address
+        self._next: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    async def next(self) -> int:
+        async with self._lock:
+            if self._next is None:
+                self._next = int(await self.rpc.call("eth_getTransactionCount", self.address, "pending"), 16)
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    async def resync(self):
+        async with self._lock:
+            self._next = None
+
+
+# ==================== Worker ====================
+
+class AnchorWorker:
+    """
+    Queue → submit (nonce, retries) → confirm
+
+    enqueue() never blocks the caller; one task submits batches in order and
+    another tracks all in-flight transactions concurrently.
+    """
+
+    def __init__(self, rpc: JsonRpcClient, contract_address: str, private_key: str = "",
+                 from_address: str = "", confirmations: int = 1, max_retries: int = 5,
+                 poll_seconds: float = 2.0, tx_timeout_seconds: float = 600.0):
+        self.rpc = rpc
+        self.contract_address = contract_address
+        self.private_key = private_key
+        self.from_address = from_address
+        self.confirmations = max(1, confirmations)
+        self.max_retries = max_retries
+        self.poll_seconds = poll_seconds
+        self.tx_timeout_seconds = tx_timeout_seconds
+
+        self._account = None
+        self._chain_id: Optional[int] = None
+        self._nonces: Optional[NonceManager] = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pending: Dict[str, Dict] = {}   # tx hash → {batch, attempt, sent_at}
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {"submitted": 0, "confirmed": 0, "retried": 0, "failed": 0}
+
+    # ---------- lifecycle ----------
+
+    async def start(self):
+        await self._setup_sender()
+        self._tasks = [
+            asyncio.create_task(self._submit_loop()),
+            asyncio.create_task(self._confirm_loop()),
+        ]
+        logger.info(f"✅ Anchor worker started (sender {self.from_address}, contract {self.contract_address})")
+
+    async def stop(self, drain_seconds: float = 10.0):
+        """Give queued and in-flight anchors a moment to finish, then stop"""
+        deadline = time.monotonic() + drain_seconds
+        while (not self._queue.empty() or self._pending) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.rpc.close()
+        if not self._queue.empty() or self._pending:
+            logger.warning(
+                f"⚠️ Anchor worker stopped with {self._queue.qsize()} queued and "
+                f"{len(self._pending)} unconfirmed batch(es)"
+            )
+
+    def enqueue(self, batch: MerkleBatch, attempt: int = 0):
+        self._queue.put_nowait((batch, attempt))
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def _setup_sender(self):
+        self._chain_id = int(await self.rpc.call("eth_chainId"), 16)
+        if self.private_key:
+            try:
+                from eth_account import Account
+            except ImportError:
+                logger.warning("⚠️ eth-account not installed; PRIVATE_KEY ignored, using node accounts")
+            else:
+                self._account = Account.from_key(self.private_key)
+                self.from_address = self._account.address
+        if not self.from_address:
+            accounts = await self.rpc.call("eth_accounts")
+            if not accounts:
+                raise ChainError("No sender: set PRIVATE_KEY (with eth-account) or ANCHOR_FROM_ADDRESS")
+            self.from_address = accounts[0]
+        self._nonces = NonceManager(self.rpc, self.from_address)
+
+    # ---------- submission ----------
+
+    async def _submit_loop(self):
+        while True:
+            batch, attempt = await self._queue.get()
+            try:
+                tx_hash = await self._send(batch)
+            except Exception as e:
+                await self._retry(batch, attempt, f"send failed: {e}")
+                continue
+            self._pending[tx_hash] = {"batch": batch, "attempt": attempt, "sent_at": time.monotonic()}
+            self.stats["submitted"] += 1
+            await _update_anchor_status(batch, "submitted", tx_hash)
+            logger.info(f"Anchor tx {tx_hash} sent for batch {batch.batch_id} ({len(batch)} submissions)")
+
+    async def _send(self, batch: MerkleBatch) -> str:
+        data = encode_register_merkle_root(batch.batch_id, batch.tree.root)
+        nonce = await self._nonces.next()
+        tx = {"from": self.from_address, "to": self.contract_address, "data": data, "nonce": hex(nonce)}
+        try:
+            if self._account is None:
+                return await self.rpc.call("eth_sendTransaction", tx)
+            gas = int(await self.rpc.call("eth_estimateGas", tx), 16)
+            gas_price = int(await self.rpc.call("eth_gasPrice"), 16)
+            signed = self._account.sign_transaction({
+                "to": self.contract_address,
+                "data": data,
+                "value": 0,
+                "nonce": nonce,
+                "gas": gas,
+                "gasPrice": gas_price,
+                "chainId": self._chain_id,
+            })
+            raw = getattr(signed, "raw_transaction", None) or signed.rawTransaction
+            return await self.rpc.call("eth_sendRawTransaction", "0x" + bytes(raw).hex())
+        except Exception:
+            # Rejected, or lost in transport before the node saw it: this nonce
+            # may be unused, and a real node holds every later nonce back until
+            # the gap is filled. Take the next one from the node's view
+            await self._nonces.resync()
+            raise
+
+    async def _retry(self, batch: MerkleBatch, attempt: int, reason: str):
+        if attempt >= self.max_retries:
+            self.stats["failed"] += 1
+            logger.error(f"❌ Anchor for batch {batch.batch_id} failed after {attempt + 1} attempt(s): {reason}")
+            await _update_anchor_status(batch, "failed", None)
+            return
+        self.stats["retried"] += 1
+        delay = min(2 ** attempt, 60)
+        logger.warning(f"⚠️ Anchor batch {batch.batch_id} {reason}; retrying in {delay}s")
+        asyncio.get_running_loop().call_later(delay, self.enqueue, batch, attempt + 1)
+
+    # ---------- confirmation ----------
+
+    async def _confirm_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            if not self._pending:
+                continue
+            try:
+                head = int(await self.rpc.call("eth_blockNumber"), 16)
+                hashes = list(self._pending)
+                receipts = await asyncio.gather(
+                    *(self.rpc.call("eth_getTransactionReceipt", h) for h in hashes),
+                    return_exceptions=True
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Confirmation poll failed: {e}")
+                continue
+            for tx_hash, receipt in zip(hashes, receipts):
+                await self._check_receipt(tx_hash, receipt, head)
+
+    async def _check_receipt(self, tx_hash: str, receipt: Any, head: int):
+        entry = self._pending[tx_hash]
+        batch = entry["batch"]
+        if isinstance(receipt, Exception) or receipt is None:
+            if time.monotonic() - entry["sent_at"] > self.tx_timeout_seconds:
+                del self._pending[tx_hash]
+                # Never mined: likely stuck behind a nonce gap, so re-read the nonce
+                await self._nonces.resync()
+                await self._retry(batch, entry["attempt"], f"tx {tx_hash} not mined in time")
+            return
+        if head - int(receipt["blockNumber"], 16) + 1 < self.confirmations:
+            return
+        del self._pending[tx_hash]
+        if int(receipt["status"], 16) == 1 or await self._root_registered(batch):
+            # A reverted retry of an already-registered root is still a success
+            self.stats["confirmed"] += 1
+            await _update_anchor_status(batch, "confirmed", tx_hash)
+            logger.info(f"✅ Batch {batch.batch_id} anchored in block {int(receipt['blockNumber'], 16)}")
+        else:
+            await self._retry(batch, entry["attempt"], f"tx {tx_hash} reverted")
+
+    async def _root_registered(self, batch: MerkleBatch) -> bool:
+        result = await self.rpc.call(
+            "eth_call",
+            {"to": self.contract_address, "data": encode_project_merkle_roots(batch.batch_id)},
+            "latest"
+        )
+        return bytes.fromhex(result[2:]) == batch.tree.root
+
+
+async def _update_anchor_status(batch: MerkleBatch, status: str, tx_hash: Optional[str]):
+    from app.db.supabase_client import update_anchor_records
+    try:
+        await update_anchor_records(batch.batch_id, {"status": status, "transaction_hash": tx_hash})
+    except Exception as e:
+        logger.error(f"❌ Failed to record anchor status for batch {batch.batch_id}: {e}")
+
+
+# Singleton worker
+_worker: Optional[AnchorWorker] = None
+
+
+def create_rpc_client() -> JsonRpcClient:
+    """JSON-RPC client for BLOCKCHAIN_RPC_URL ('devchain' = in-process stand-in)"""
+    if settings.BLOCKCHAIN_RPC_URL == "devchain":
+        from app.services.devchain import get_dev_chain
+        return JsonRpcClient("http://devchain", transport=get_dev_chain().transport())
+    return JsonRpcClient(settings.BLOCKCHAIN_RPC_URL)
+
+
+def anchoring_configured() -> bool:
+    return bool(settings.BLOCKCHAIN_RPC_URL and (settings.MERKLE_TREE_UTILS_ADDRESS or settings.CONTRACT_ADDRESS))
+
+
+async def start_anchor_worker() -> AnchorWorker:
+    """Start the singleton worker (call once at startup)"""
+    global _worker
+    if _worker is None:
+        worker = AnchorWorker(
+            create_rpc_client(),
+            settings.MERKLE_TREE_UTILS_ADDRESS or settings.CONTRACT_ADDRESS,
+            private_key=settings.PRIVATE_KEY,
+            from_address=settings.ANCHOR_FROM_ADDRESS,
+            confirmations=settings.ANCHOR_CONFIRMATIONS,
+            max_retries=settings.ANCHOR_MAX_RETRIES,
+            poll_seconds=settings.ANCHOR_POLL_SECONDS,
+        )
+        await worker.start()
+        _worker = worker
+    return _worker
+
+
+def get_anchor_worker() -> Optional[AnchorWorker]:
+    """The running worker, or None when anchoring is not started"""
+    return _worker
+
+
+async def stop_anchor_worker():
+    global _worker
+    if _worker is not None:
+        await _worker.stop()
+        _worker = None
@@ -0,0 +1,119 @@
+"""
+Biomass Booster Features
+One feature builder for the XGBoost biomass booster, shared by
+BiomassRegressionModel and biomass_api
+
+The booster was trained on 29 named columns and predicts log1p(biomass).
+Requests usually carry only B2/B3/B4/B8 and a species name; everything else
+takes a fixed default:
+
+    missing Sentinel-2 bands          0.05 reflectance
+    VV / VH                           -15 / -22 dB
+    longitude, latitude,
+    agb, bgb, cagb, cbgb,
+    soil/total carbon stock           0.0
+    species not known to the encoder  code 0
+
+NaN/inf values that remain after that are filled from the training medians.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Training column order of the booster (booster.feature_names)
+BOOSTER_FEATURES = [
+    'longitude', 'latitude', 'agb', 'bgb', 'cagb', 'cbgb',
+    'soil_carbon_stock', 'total_carbon_stock', 'B1', 'B2', 'B3', 'B4',
+    'B5', 'B6', 'B7', 'B8', 'B8A', 'B9', 'B11', 'B12', 'VV', 'VH',
+    'ndvi', 'gndvi', 'ndbi', 'ndwi', 'vv_vh_ratio', 'vv_vh_diff', 'species_enc'
+]
+
+DEFAULT_BAND_REFLECTANCE = 0.05
+DEFAULT_SAR = {'VV': -15.0, 'VH': -22.0}
+DEFAULT_SITE_FEATURES = {
+    'longitude': 0.0, 'latitude': 0.0,
+    'agb': 0.0, 'bgb': 0.0, 'cagb': 0.0, 'cbgb': 0.0,
+    'soil_carbon_stock': 0.0, 'total_carbon_stock': 0.0,
+}
+UNKNOWN_SPECIES_CODE = 0
+
+
+def encode_species(species: pd.Series, encoder=None) -> np.ndarray:
+    """
+    Species codes for the booster's species_enc column
+
+    Numeric values are taken as already encoded; labels missing from the
+    encoder's classes_ get UNKNOWN_SPECIES_CODE.
+    """
+    if pd.api.types.is_numeric_dtype(species):
+        return species.astype(int).to_numpy()
+    if encoder is None:
+        return np.full(len(species), UNKNOWN_SPECIES_CODE, dtype=np.int64)
+    codes = {str(c): i for i, c in enumerate(encoder.classes_)}
+    return species.astype(str).map(codes).fillna(UNKNOWN_SPECIES_CODE).astype(np.int64).to_numpy()
+
+
+def engineer_booster_features(
+    df: pd.DataFrame,
+    species_encoder=None,
+    training_medians: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
+    """
+    Add every booster feature to a copy of the request frame
+
+    Args:
+        df: Request rows (band reflectances, optional SAR/site columns, species)
+        species_encoder: Fitted encoder exposing classes_ (CategoryEncoder)
+        training_medians: Fill values for NaN/inf features
+
+    Returns:
+        The input columns plus all BOOSTER_FEATURES
+    """
+    df = df.copy()
+
+    # Indices from the bands the request carries
+    if 'B8' in df.columns and 'B4' in df.columns:
+        df['ndvi'] = (df['B8'] - df['B4']) / (df['B8'] + df['B4'] + 1e-8)
+    if 'B3' in df.columns and 'B8' in df.columns:
+        df['gndvi'] = (df['B8'] - df['B3']) / (df['B8'] + df['B3'] + 1e-8)
+        df['ndwi'] = (df['B3'] - df['B8']) / (df['B3'] + df['B8'] + 1e-8)
+    if 'B8' in df.columns and 'B11' in df.columns:
+        df['ndbi'] = (df['B11'] - df['B8']) / (df['B11'] + df['B8'] + 1e-8)
+
+    for band in ['B1', 'B5', 'B6', 'B7', 'B8A', 'B9', 'B11', 'B12']:
+        if band not in df.columns:
+            df[band] = DEFAULT_BAND_REFLECTANCE
+    for col, value in DEFAULT_SAR.items():
+        if col not in df.columns:
+            df[col] = value
+    if 'vv_vh_ratio' not in df.columns:
+        df['vv_vh_ratio'] = df['VV'] / (df['VH'] + 1e-8)
+    if 'vv_vh_diff' not in df.columns:
+        df['vv_vh_diff'] = df['VV'] - df['VH']
+    for col, value in DEFAULT_SITE_FEATURES.items():
+        if col not in df.columns:
+            df[col] = value
+
+    if 'species' in df.columns:
+        df['species_enc'] = encode_species(df['species'], species_encoder)
+    else:
+        df['species_enc'] = UNKNOWN_SPECIES_CODE
+
+    df.replace([np.inf, -np.inf], np.nan, inplace=True)
+    if training_medians:
+        for col in df.columns:
+            if col in training_medians:
+                df[col] = df[col].fillna(training_medians[col])
+
+    # ndbi without B11 (and anything else still absent) is 0
+    for col in BOOSTER_FEATURES:
+        if col not in df.columns:
+            df[col] = 0.0
+    return df
+
+
+def booster_matrix(df: pd.DataFrame) -> pd.DataFrame:
+    """Booster input: the engineered frame's BOOSTER_FEATURES in training order"""
+    return df[BOOSTER_FEATURES]
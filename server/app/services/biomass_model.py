@@ -3,17 +3,30 @@ Biomass Regression Model Service
 Estimates biomass from satellite imagery features
 """
 
+import asyncio
+import time
 import numpy as np
 import pandas as pd
 import xgboost as xgb
 from pathlib import Path
 from typing import Dict, Optional
-import logging
 from app.utils.config import settings
-import pickle
-from sklearn.preprocessing import LabelEncoder
+from app.utils.log import get_logger
+from app.services.biomass_features import booster_matrix, encode_species, engineer_booster_features
+from app.services.model_bundle import (
+    CategoryEncoder,
+    DEFAULT_SPECIES_CLASSES,
+    DEFAULT_TRAINING_MEDIANS,
+    ModelBundle,
+    ModelBundleError,
+    find_bundle,
+    load_bundle,
+    load_legacy_medians,
+    load_legacy_species_encoder,
+    verify_bundle_registry,
+)
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 
 class BiomassRegressionModel:
@@ -24,91 +37,94 @@ class BiomassRegressionModel:
         self.species_encoder = None
         self.training_medians = None
         self.model_version = "v2.1.0"
+        self.bundle_hash = None
+        self.load_seconds = None
         self.initialized = False
     
     async def initialize(self):
-        """Load model from disk"""
+        """Load model from disk in a worker thread so the event loop stays free"""
+        start = time.perf_counter()
+        bundle = await asyncio.to_thread(self.load)
+        if bundle is not None and settings.VERIFY_MODEL_REGISTRY:
+            try:
+                verified = await verify_bundle_registry(bundle)
+            except Exception as e:
+                logger.warning(f"⚠ Could not verify biomass model against registry: {e}")
+                verified = None
+            if verified is False:
+                # Refuse the bundle: the pipeline fails readiness instead of serving it
+                self.booster = None
+                self.initialized = False
+                raise ModelBundleError(
+                    f"Biomass model {bundle.bundle_hash} does not match model_registry"
+                )
+        self.load_seconds = time.perf_counter() - start
+    
+    def load(self) -> Optional[ModelBundle]:
+        """Blocking model load (bundle format, falling back to legacy artifacts)"""
+        bundle = None
         try:
             models_dir = Path(settings.MODELS_DIR)
-            booster_path = models_dir / "xgb_biomass_booster.json"
-            
-            if booster_path.exists():
-                try:
-                    self.booster = xgb.Booster()
-                    self.booster.load_model(str(booster_path))
-                    logger.info(f"✅ Loaded biomass model from {booster_path}")
-                except Exception as e:
-                    logger.error(f"❌ Failed to load XGBoost model: {e}")
-                    logger.warning("Will use mock predictions instead")
-                    self.booster = None
-            else:
-                logger.warning(f"Biomass model not found at {booster_path}, using mock predictions")
-                self.booster = None
+            bundle_dir = find_bundle(models_dir, "biomass")
             
-            # Load species encoder (handle pickle compatibility)
-            encoder_path = models_dir / "species_encoder.pkl"
-            if encoder_path.exists():
-                try:
-                    with open(encoder_path, 'rb') as f:
-                        try:
-                            self.species_encoder = pickle.load(f)
-                        except (TypeError, ValueError, UnicodeDecodeError):
-                            # Try with latin1 encoding for Python 2/3 compatibility
-                            f.seek(0)
-                            self.species_encoder = pickle.load(f, encoding='latin1')
-                        except Exception:
-                            # Try with bytes encoding for Python 3.11+
-                            f.seek(0)
-                            self.species_encoder = pickle.load(f, encoding='bytes')
-                    logger.info(f"✅ Loaded species encoder from {encoder_path}")
-                except Exception as e:
-                    logger.warning(f"⚠ Could not load species encoder (will use default encoding): {e}")
-                    # Create a simple fallback encoder
-                    self.species_encoder = LabelEncoder()
-                    self.species_encoder.classes_ = np.array(['Mangrove', 'Seagrass', 'Coral', 'Other'])
-                    logger.info("✅ Created fallback species encoder")
+            if bundle_dir is not None:
+                bundle = self._load_bundle(bundle_dir)
             else:
-                # Create default encoder
-                self.species_encoder = LabelEncoder()
-                self.species_encoder.classes_ = np.array(['Mangrove', 'Seagrass', 'Coral', 'Other'])
-                logger.info("✅ Created default species encoder")
-            
-            # Load training medians
-            medians_path = models_dir / "training_medians.pkl"
-            if medians_path.exists():
-                try:
-                    with open(medians_path, 'rb') as f:
-                        try:
-                            self.training_medians = pickle.load(f)
-                        except (TypeError, ValueError, UnicodeDecodeError):
-                            # Try with latin1 encoding
-                            f.seek(0)
-                            self.training_medians = pickle.load(f, encoding='latin1')
-                        except Exception:
-                            # Try with bytes encoding
-                            f.seek(0)
-                            self.training_medians = pickle.load(f, encoding='bytes')
-                    logger.info(f"✅ Loaded training medians from {medians_path}")
-                except Exception as e:
-                    logger.warning(f"⚠ Could not load training medians (will use defaults): {e}")
-                    self.training_medians = {
-                        'B2': 0.05, 'B3': 0.06, 'B4': 0.04, 'B8': 0.3,
-                        'NDVI': 0.5, 'EVI': 0.4, 'SAVI': 0.45, 'NDWI': 0.2,
-                        'species_encoded': 0
-                    }
-            else:
-                self.training_medians = {
-                    'B2': 0.05, 'B3': 0.06, 'B4': 0.04, 'B8': 0.3,
-                    'NDVI': 0.5, 'EVI': 0.4, 'SAVI': 0.45, 'NDWI': 0.2,
-                    'species_encoded': 0
-                }
-                logger.info("✅ Created default training medians")
+                self._load_legacy(models_dir)
             
             self.initialized = True
         except Exception as e:
             logger.error(f"❌ Failed to load biomass model: {e}")
             self.booster = None
             self.initialized = True
+        return bundle
+    
+    def _load_bundle(self, bundle_dir: Path) -> ModelBundle:
+        """Load booster, species classes and medians from a model bundle"""
+        bundle = load_bundle(bundle_dir)
+        
+        self.booster = xgb.Booster()
+        self.booster.load_model(str(bundle.file_path("booster")))
+        self.species_encoder = CategoryEncoder(bundle.params.get("species_classes", DEFAULT_SPECIES_CLASSES))
+        self.training_medians = dict(bundle.params.get("training_medians", DEFAULT_TRAINING_MEDIANS))
+        self.model_version = bundle.version
+        self.bundle_hash = bundle.bundle_hash
+        return bundle
+    
+    def _load_legacy(self, models_dir: Path):
+        """Load the pre-bundle booster JSON and pickled encoder/medians"""
+        booster_path = models_dir / "xgb_biomass_booster.json"
+        
+        if booster_path.exists():
+            try:
+                self.booster = xgb.Booster()
+                self.booster.load_model(str(booster_path))
+                logger.info(f"✅ Loaded biomass model from {booster_path}")
+            except Exception as e:
+                logger.error(f"❌ Failed to load XGBoost model: {e}")
+                logger.warning("Will use mock predictions instead")
+                self.booster = None
+        else:
+            logger.warning(f"Biomass model not found at {booster_path}, using mock predictions")
+            self.booster = None
+        
+        # Load species encoder
+        encoder_path = models_dir / "species_encoder.pkl"
+        try:
+            self.species_encoder = load_legacy_species_encoder(encoder_path)
+            logger.info(f"✅ Loaded species encoder from {encoder_path}")
+        except Exception as e:
+            logger.warning(f"⚠ Could not load species encoder (will use default encoding): {e}")
+            self.species_encoder = CategoryEncoder(DEFAULT_SPECIES_CLASSES)
+        
+        # Load training medians
+        medians_path = models_dir / "training_medians.pkl"
+        try:
+            self.training_medians = load_legacy_medians(medians_path)
+            logger.info(f"✅ Loaded training medians from {medians_path}")
+        except Exception as e:
+            logger.warning(f"⚠ Could not load training medians (will use defaults): {e}")
+            self.training_medians = dict(DEFAULT_TRAINING_MEDIANS)
     
     def engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Engineer features for biomass prediction"""
@@ -119,8 +135,8 @@ class BiomassRegressionModel:
         df['NDWI'] = (df['B3'] - df['B8']) / (df['B3'] + df['B8'] + 1e-10)
         
         # Encode species
-        if 'species' in df.columns and self.species_encoder:
-            df['species_encoded'] = self.species_encoder.transform(df['species'])
+        if 'species' in df.columns:
+            df['species_encoded'] = encode_species(df['species'], self.species_encoder)
         else:
             df['species_encoded'] = 0
         
@@ -175,13 +191,19 @@ class BiomassRegressionModel:
                 upper_bound = biomass * 1.2
                 confidence_interval = 0.15
             else:
-                # Prepare features for XGBoost
-                feature_cols = ['B2', 'B3', 'B4', 'B8', 'NDVI', 'EVI', 'SAVI', 'NDWI', 'species_encoded']
-                X = features_df[feature_cols].values
-                
-                # Predict
-                dmatrix = xgb.DMatrix(X)
-                biomass = float(self.booster.predict(dmatrix)[0])
+                if self.booster.feature_names:
+                    # Named training features from the builder biomass_api also uses; predicts log1p(biomass)
+                    booster_df = engineer_booster_features(input_data, self.species_encoder, self.training_medians)
+                    dmatrix = xgb.DMatrix(booster_matrix(booster_df))
+                    biomass = float(np.expm1(self.booster.predict(dmatrix)[0]))
+                else:
+                    # Prepare features for XGBoost
+                    feature_cols = ['B2', 'B3', 'B4', 'B8', 'NDVI', 'EVI', 'SAVI', 'NDWI', 'species_encoded']
+                    X = features_df[feature_cols].values
+                    
+                    # Predict
+                    dmatrix = xgb.DMatrix(X)
+                    biomass = float(self.booster.predict(dmatrix)[0])
                 
                 # Calculate confidence bounds (using quantile regression or prediction intervals)
                 # For now, use a simple percentage-based approach
@@ -204,11 +226,14 @@ class BiomassRegressionModel:
                 }
             }
             
-            logger.info(f"Biomass prediction: {biomass:.2f} tonnes/ha (CI: {lower_bound:.2f}-{upper_bound:.2f})")
+            logger.info(
+                "Biomass prediction: %.2f tonnes/ha (CI: %.2f-%.2f)", biomass, lower_bound, upper_bound,
+                sample_every=settings.LOG_SAMPLE_EVERY
+            )
             return result
             
         except Exception as e:
-            logger.error(f"Error in biomass prediction: {e}")
+            logger.error("Error in biomass prediction: %s", e)
             raise
 
 
@@ -220,6 +245,7 @@ async def get_biomass_model() -> BiomassRegressionModel:
     """Get singleton biomass model instance"""
     global _biomass_model
     if _biomass_model is None:
-        _biomass_model = BiomassRegressionModel()
-        await _biomass_model.initialize()
+        model = BiomassRegressionModel()
+        await model.initialize()
+        _biomass_model = model
     return _biomass_model
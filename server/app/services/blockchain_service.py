@@ -1,83 +1,273 @@
 """
 Blockchain Service
 Anchors submission data to blockchain for tamper-proof verification
+
+Submission data hashes are accumulated into Merkle batches; only each batch
+root is anchored (one transaction per batch, sent by the anchor worker in
+app.services.anchoring) and every submission keeps its inclusion proof so it
+can be verified against the anchored root in O(log n).
+
+Queued leaves are persisted (anchor_queue) so a restart does not lose them.
+recover_pending_anchors() runs at startup and periodically. It reseals
+queued rows, and re-sends sealed batches whose records are still "pending",
+once they are older than any live process would leave them. Every process
+(each pre-fork worker included) runs the sweep; rows are claimed first, so
+each orphan is recovered by exactly one of them.
 """
 
 import hashlib
 import json
+import os
+import socket
+from datetime import datetime, timedelta, timezone
 from typing import Dict, Optional
-import logging
 from app.utils.config import settings
-from app.db.supabase_client import get_submission
+from app.utils.log import get_logger
+from app.db.supabase_client import (
+    get_submission,
+    create_anchor_records,
+    get_anchor_record,
+    get_anchor_records_by_status,
+    get_anchored_submission_ids,
+    claim_queued_anchors,
+    claim_anchor_batch,
+    queue_anchor,
+    delete_queued_anchors,
+    get_queued_anchors,
+)
+from app.services.merkle import MerkleBatch, MerkleBatcher, MerkleTree
+from app.services.anchoring import get_anchor_worker
+
+logger = get_logger(__name__)
+
+_batcher: Optional[MerkleBatcher] = None
+
+
+def get_anchor_batcher() -> MerkleBatcher:
+    """Get singleton Merkle batcher"""
+    global _batcher
+    if _batcher is None:
+        _batcher = MerkleBatcher(
+            max_leaves=settings.ANCHOR_BATCH_SIZE,
+            max_age_seconds=settings.ANCHOR_BATCH_SECONDS,
+            hash_name=settings.MERKLE_HASH_ALGORITHM
+        )
+    return _batcher
 
-logger = logging.getLogger(__name__)
 
+def compute_submission_hash(submission_id: str, submission: Dict) -> str:
+    """Deterministic SHA-256 over the anchored submission fields"""
+    data_to_hash = {
+        "submission_id": submission_id,
+        "project_id": str(submission["project_id"]),
+        "carbon_estimate": submission.get("carbon_estimate"),
+        "co2_equivalent": submission.get("co2_equivalent"),
+        "biomass_estimate": submission.get("biomass_estimate"),
+        "mangrove_score": submission.get("mangrove_score"),
+        "timestamp": submission.get("timestamp"),
+        "model_version": submission.get("model_version")
+    }
+    data_json = json.dumps(data_to_hash, sort_keys=True)
+    return hashlib.sha256(data_json.encode()).hexdigest()
 
-async def anchor_submission(submission_id: str) -> Dict:
+
+async def anchor_submission(submission_id: str, submission: Optional[Dict] = None) -> Dict:
     """
-    Anchor submission data hash to blockchain
+    Queue a submission's data hash for Merkle-batched anchoring
     
     Args:
         submission_id: UUID of the submission
+        submission: The submission row as just written (fetched when omitted)
         
     Returns:
-        Transaction hash and blockchain metadata
+        Data hash and batch status (the batch result once a window fills)
     """
     if not settings.BLOCKCHAIN_ENABLED:
         logger.info("Blockchain disabled, skipping anchor")
         return {"status": "skipped", "reason": "blockchain_disabled"}
     
     try:
-        # Fetch submission data
-        submission = await get_submission(submission_id)
+        if submission is None:
+            submission = await get_submission(submission_id)
         if not submission:
             raise ValueError(f"Submission {submission_id} not found")
         
-        # Create data hash
-        data_to_hash = {
-            "submission_id": submission_id,
-            "project_id": str(submission["project_id"]),
-            "carbon_estimate": submission.get("carbon_estimate"),
-            "co2_equivalent": submission.get("co2_equivalent"),
-            "biomass_estimate": submission.get("biomass_estimate"),
-            "mangrove_score": submission.get("mangrove_score"),
-            "timestamp": submission.get("timestamp"),
-            "model_version": submission.get("model_version")
-        }
-        
-        # Create hash
-        data_json = json.dumps(data_to_hash, sort_keys=True)
-        data_hash = hashlib.sha256(data_json.encode()).hexdigest()
+        data_hash = compute_submission_hash(submission_id, submission)
+        batcher = get_anchor_batcher()
+        # Persist the leaf first: the batcher only holds it in memory
+        await queue_anchor(submission_id, data_hash)
         
-        # In production, interact with CarbonRegistry (and optionally Oracle/Token) contracts
-        contract_address = settings.CARBON_REGISTRY_ADDRESS or settings.CONTRACT_ADDRESS
-        if contract_address and settings.PRIVATE_KEY and settings.BLOCKCHAIN_RPC_URL:
-            # TODO: Implement actual blockchain interaction
-            # Using Web3.py or similar library
-            logger.info(f"Would anchor hash {data_hash} to blockchain")
-            
-            # Mock transaction hash
-            tx_hash = f"0x{hashlib.sha256(data_hash.encode()).hexdigest()[:64]}"
-            
-            result = {
-                "status": "anchored",
-                "transaction_hash": tx_hash,
-                "data_hash": data_hash,
-                "contract_address": contract_address,
-                "blockchain": "ethereum"  # or "polygon", "arbitrum", etc.
-            }
-        else:
-            # Mock mode
-            logger.info(f"Mock: Would anchor hash {data_hash} to blockchain")
-            result = {
-                "status": "mock",
-                "data_hash": data_hash,
-                "message": "Blockchain credentials not configured"
-            }
+        if batcher.add(submission_id, bytes.fromhex(data_hash)):
+            result = await anchor_batch(batcher.drain())
+            return {**result, "data_hash": data_hash}
         
-        logger.info(f"✅ Blockchain anchor created for submission {submission_id}")
-        return result
+        logger.info(
+            "Queued anchor", submission_id=submission_id, pending=len(batcher),
+            sample_every=settings.LOG_SAMPLE_EVERY
+        )
+        return {"status": "queued", "data_hash": data_hash, "pending": len(batcher)}
         
     except Exception as e:
-        logger.error(f"❌ Blockchain anchor failed: {e}")
+        logger.error("❌ Blockchain anchor failed: %s", e)
         raise
+
+
+async def flush_pending_anchors() -> Optional[Dict]:
+    """Anchor whatever is pending, regardless of the batch window"""
+    batch = get_anchor_batcher().drain()
+    if batch is None:
+        return None
+    return await anchor_batch(batch)
+
+
+async def anchor_batch(batch: MerkleBatch) -> Dict:
+    """
+    Store every leaf's proof and hand the batch root to the anchor worker
+    
+    The worker submits MerkleTreeUtils.registerMerkleRoot(batch_id, root)
+    in the background and moves the records through
+    pending → submitted → confirmed (or failed). Without a configured
+    chain the records are stored with status "mock".
+    
+    Args:
+        batch: Sealed Merkle batch
+        
+    Returns:
+        Root and batch metadata
+    """
+    worker = get_anchor_worker()
+    status = "pending" if worker is not None else "mock"
+    if worker is None:
+        logger.info("Mock: Would anchor Merkle root %s (%d submissions)", batch.root_hex, len(batch))
+    
+    await create_anchor_records([
+        {
+            "submission_id": leaf["key"],
+            "data_hash": leaf["data_hash"],
+            "batch_id": batch.batch_id,
+            "merkle_root": batch.root_hex,
+            "leaf_index": leaf["leaf_index"],
+            "proof": leaf["proof"],
+            "hash_algorithm": batch.tree.hash_name,
+            "transaction_hash": None,
+            "status": status,
+        }
+        for leaf in batch.leaf_records()
+    ])
+    try:
+        await delete_queued_anchors(batch.keys)
+    except Exception as e:
+        # Harmless: the recovery sweep skips queued rows that already have records
+        logger.warning("⚠️ Could not clear anchor queue for batch %s: %s", batch.batch_id, e)
+    
+    if worker is not None:
+        worker.enqueue(batch)
+        logger.info("✅ Batch %s queued for anchoring (%d submissions)", batch.batch_id, len(batch))
+    return {
+        "status": status,
+        "batch_id": batch.batch_id,
+        "merkle_root": batch.root_hex,
+        "leaf_count": len(batch),
+        "contract_address": worker.contract_address if worker else None,
+        "blockchain": "ethereum"  # or "polygon", "arbitrum", etc.
+    }
+
+
+def orphan_age_seconds() -> float:
+    """Age after which a queued leaf or pending batch can no longer be in a live process"""
+    return 2 * settings.ANCHOR_BATCH_SECONDS + 60
+
+
+async def recover_pending_anchors() -> Dict[str, int]:
+    """
+    Reseal and resend anchoring work a stopped process left behind
+    
+    Queued leaves older than orphan_age_seconds() (a live process seals
+    within one batch window) are sealed into new batches, skipping any that
+    already have anchor records. Sealed batches still "pending" after that
+    age never reached the chain; they are rebuilt from their stored leaves
+    and queued on the anchor worker again. "submitted" batches are left to
+    the worker that sent them.
+    
+    Only rows this process claims are recovered; a claim older than the
+    same age (its holder died mid-recovery) may be taken over.
+    
+    Returns:
+        Number of leaves resealed and batches re-sent
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=orphan_age_seconds())).isoformat()
+    recovered = {"resealed": 0, "resent": 0}
+    claimant = f"{socket.gethostname()}:{os.getpid()}"
+    
+    queued = await get_queued_anchors(cutoff)
+    if queued:
+        queued = await claim_queued_anchors([str(row["submission_id"]) for row in queued], claimant, cutoff)
+    if queued:
+        ids = [str(row["submission_id"]) for row in queued]
+        anchored = await get_anchored_submission_ids(ids)
+        if anchored:
+            await delete_queued_anchors(sorted(anchored))
+        batcher = get_anchor_batcher()
+        for row in queued:
+            submission_id = str(row["submission_id"])
+            if submission_id in anchored:
+                continue
+            recovered["resealed"] += 1
+            if batcher.add(submission_id, bytes.fromhex(row["data_hash"])):
+                await anchor_batch(batcher.drain())
+        await flush_pending_anchors()
+    
+    worker = get_anchor_worker()
+    if worker is not None:
+        batch_ids = dict.fromkeys(r["batch_id"] for r in await get_anchor_records_by_status("pending", cutoff))
+        for batch_id in batch_ids:
+            records = await claim_anchor_batch(batch_id, "pending", claimant, cutoff)
+            if not records:
+                continue
+            records.sort(key=lambda r: r["leaf_index"])
+            tree = MerkleTree([bytes.fromhex(r["data_hash"]) for r in records], records[0]["hash_algorithm"])
+            if "0x" + tree.root.hex() != records[0]["merkle_root"]:
+                logger.error("❌ Stored leaves of batch %s do not rebuild its root; not re-sending", batch_id)
+                continue
+            worker.enqueue(MerkleBatch(batch_id, tree, [str(r["submission_id"]) for r in records]))
+            recovered["resent"] += 1
+    
+    if recovered["resealed"] or recovered["resent"]:
+        logger.info(
+            "✅ Recovered anchoring: %d queued submission(s) resealed, %d pending batch(es) re-sent",
+            recovered["resealed"], recovered["resent"]
+        )
+    return recovered
+
+
+async def verify_submission_anchor(submission_id: str) -> Dict:
+    """
+    Check a submission's current data against its anchored Merkle root
+    
+    Returns:
+        Whether the recomputed hash is included under the stored root
+    """
+    record = await get_anchor_record(submission_id)
+    if not record:
+        return {"submission_id": submission_id, "anchored": False}
+    
+    submission = await get_submission(submission_id)
+    if not submission:
+        raise ValueError(f"Submission {submission_id} not found")
+    
+    data_hash = compute_submission_hash(submission_id, submission)
+    included = MerkleTree.verify_proof(
+        bytes.fromhex(data_hash),
+        [bytes.fromhex(node[2:]) for node in record["proof"]],
+        bytes.fromhex(record["merkle_root"][2:]),
+        record["hash_algorithm"]
+    )
+    return {
+        "submission_id": submission_id,
+        "anchored": True,
+        "verified": included and data_hash == record["data_hash"],
+        "status": record.get("status"),
+        "batch_id": record["batch_id"],
+        "merkle_root": record["merkle_root"],
+        "transaction_hash": record.get("transaction_hash"),
+    }
@@ -3,11 +3,17 @@ Carbon Calculation Engine
 Deterministic carbon calculation from biomass estimates
 """
 
-from typing import Dict, Optional
-import logging
+from typing import Dict, Optional, Sequence, Union
+import numpy as np
 from app.utils.config import settings
+from app.utils.log import get_logger
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
+
+# z-score of a two-sided 95% interval; biomass bounds are treated as 95% CIs
+Z_95 = 1.96
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
 
 
 class CarbonEngine:
@@ -64,15 +70,126 @@ class CarbonEngine:
             }
             
             logger.info(
-                f"Carbon calculation: {carbon_estimate:.2f} tonnes C, "
-                f"{co2_equivalent:.2f} tonnes CO2eq"
+                "Carbon calculation: %.2f tonnes C, %.2f tonnes CO2eq", carbon_estimate, co2_equivalent,
+                sample_every=settings.LOG_SAMPLE_EVERY
+            )
+            
+            return result
+            
+        except Exception as e:
+            logger.error("Error in carbon calculation: %s", e)
+            raise
+
+    
+    def calculate_carbon_batch(
+        self,
+        biomass: ArrayLike,
+        area_hectares: ArrayLike = 1.0,
+        lower_bound: Optional[ArrayLike] = None,
+        upper_bound: Optional[ArrayLike] = None,
+        project_ids: Optional[Sequence] = None,
+        apply_buffer: bool = True
+    ) -> Dict:
+        """
+        Vectorized carbon calculation over many plots
+        
+        Per-plot uncertainty is derived from the biomass bounds (treated as a
+        95% interval, so sigma = (upper - lower) / (2 * 1.96)) and propagated
+        through the same linear factors as the estimate. Project totals assume
+        independent plot errors, so their sigmas add in quadrature.
+        
+        Args:
+            biomass: Biomass per plot in tonnes/ha (a scalar is one plot)
+            area_hectares: Area per plot in hectares (scalar or per plot)
+            lower_bound: Lower 95% biomass bound per plot in tonnes/ha
+            upper_bound: Upper 95% biomass bound per plot in tonnes/ha
+                (both bounds or neither; one alone raises ValueError)
+            project_ids: Project identifier per plot, for group-by-project totals
+            apply_buffer: Whether to apply risk buffer
+            
+        Returns:
+            Dictionary with per-plot columns ("plots"), per-project columns
+            ("projects", when project_ids is given) and batch totals ("totals")
+        """
+        if (lower_bound is None) != (upper_bound is None):
+            raise ValueError("lower_bound and upper_bound must be given together")
+        
+        try:
+            biomass = np.atleast_1d(np.asarray(biomass, dtype=np.float64))
+            area = np.broadcast_to(np.asarray(area_hectares, dtype=np.float64), biomass.shape)
+            
+            buffer = self.risk_buffer if apply_buffer else 0.0
+            carbon_factor = self.carbon_fraction * (1 - buffer)
+            co2_factor = carbon_factor * self.co2_equivalent
+            
+            total_biomass = biomass * area
+            carbon = total_biomass * self.carbon_fraction
+            carbon_buffered = total_biomass * carbon_factor
+            co2 = total_biomass * co2_factor
+            
+            if lower_bound is not None:
+                biomass_sigma = (
+                    np.asarray(upper_bound, dtype=np.float64) - np.asarray(lower_bound, dtype=np.float64)
+                ) / (2 * Z_95)
+                co2_sigma = biomass_sigma * area * co2_factor
+            else:
+                co2_sigma = np.zeros_like(co2)
+            
+            plots = {
+                "biomass_tonnes": total_biomass,
+                "carbon_tonnes": carbon,
+                "carbon_tonnes_buffered": carbon_buffered,
+                "co2_equivalent_tonnes": co2,
+                "co2_equivalent_sigma": co2_sigma,
+                "area_hectares": area,
+            }
+            
+            totals = self._aggregate(plots, np.zeros(biomass.shape, dtype=np.intp), 1)
+            
+            result = {
+                "plots": plots,
+                "totals": {key: values[0].item() for key, values in totals.items()},
+                "carbon_fraction": self.carbon_fraction,
+                "co2_conversion_factor": self.co2_equivalent,
+                "risk_buffer_percent": buffer,
+                "calculation_method": "IPCC Tier 1"
+            }
+            
+            if project_ids is not None:
+                projects, inverse = np.unique(np.atleast_1d(np.asarray(project_ids)), return_inverse=True)
+                result["projects"] = {
+                    "project_id": projects,
+                    **self._aggregate(plots, inverse, len(projects))
+                }
+            
+            logger.info(
+                "Carbon batch: %d plots, %d projects, %.2f ± %.2f tonnes CO2eq",
+                biomass.size,
+                len(result["projects"]["project_id"]) if project_ids is not None else 0,
+                result["totals"]["co2_equivalent_tonnes"],
+                Z_95 * result["totals"]["co2_equivalent_sigma"],
             )
             
             return result
             
         except Exception as e:
-            logger.error(f"Error in carbon calculation: {e}")
+            logger.error("Error in batch carbon calculation: %s", e)
             raise
+    
+    @staticmethod
+    def _aggregate(plots: Dict[str, np.ndarray], groups: np.ndarray, n_groups: int) -> Dict[str, np.ndarray]:
+        """Group-by sums (sigma in quadrature) with 95% CO2 bounds"""
+        sums = {
+            key: np.bincount(groups, weights=values, minlength=n_groups)
+            for key, values in plots.items()
+            if key != "co2_equivalent_sigma"
+        }
+        sigma = np.sqrt(np.bincount(groups, weights=plots["co2_equivalent_sigma"] ** 2, minlength=n_groups))
+        sums["co2_equivalent_sigma"] = sigma
+        sums["co2_equivalent_lower"] = np.maximum(0.0, sums["co2_equivalent_tonnes"] - Z_95 * sigma)
+        sums["co2_equivalent_upper"] = sums["co2_equivalent_tonnes"] + Z_95 * sigma
+        sums["plot_count"] = np.bincount(groups, minlength=n_groups)
+        return sums
 
 
 # Singleton instance
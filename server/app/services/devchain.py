@@ -0,0 +1,161 @@
+"""
+In-process Dev Chain
+JSON-RPC stand-in for a local node, served through an httpx transport
+
+Implements the subset of eth_* methods the anchoring worker uses and the
+MerkleTreeUtils storage it touches (registerMerkleRoot / projectMerkleRoots),
+including the "Merkle root already registered" revert. Every transaction is
+mined into its own block, as with Hardhat/Anvil automine. Used with
+BLOCKCHAIN_RPC_URL=devchain.
+
+By default a nonce above the account's next one is rejected ("nonce too
+high"). With queue_future_nonces=True the chain behaves like a real node's
+mempool instead: such a transaction is accepted and held, unmined and without
+a receipt, until the nonces below it have been used. drop_next_sends makes
+sends fail in transport (httpx.ConnectError) before the chain sees them.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional
+import logging
+
+import httpx
+
+from app.services.anchoring import PROJECT_MERKLE_ROOTS, decode_register_merkle_root
+
+logger = logging.getLogger(__name__)
+
+DEV_ACCOUNT = "0x" + "f39fd6e51aad88f6f4ce6ab8827279cfffb92266"
+DEV_CHAIN_ID = 31337
+
+
+class DevChain:
+    """Automining JSON-RPC stub with MerkleTreeUtils semantics"""
+
+    def __init__(self, accounts: Optional[List[str]] = None, fail_next_sends: int = 0,
+                 drop_next_sends: int = 0, queue_future_nonces: bool = False):
+        self.accounts = accounts or [DEV_ACCOUNT]
+        self.block_number = 0
+        self.nonces: Dict[str, int] = {}
+        self.receipts: Dict[str, Dict] = {}
+        self.merkle_roots: Dict[str, bytes] = {}
+        self.queue_future_nonces = queue_future_nonces
+        self.queued: Dict[str, Dict[int, Dict]] = {}   # sender → nonce → held transaction
+        # Fault injection: reject this many eth_sendTransaction calls
+        self.fail_next_sends = fail_next_sends
+        # Fault injection: lose this many sends in transport
+        self.drop_next_sends = drop_next_sends
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self._handle)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        with self._lock:
+            self.requests += 1
+            if self.drop_next_sends > 0 and payload["method"] == "eth_sendTransaction":
+                self.drop_next_sends -= 1
+                raise httpx.ConnectError("Dev chain: injected transport failure", request=request)
+            try:
+                result = self.dispatch(payload["method"], payload.get("params", []))
+                body = {"jsonrpc": "2.0", "id": payload["id"], "result": result}
+            except ValueError as e:
+                body = {"jsonrpc": "2.0", "id": payload["id"], "error": {"code": -32000, "message": str(e)}}
+        return httpx.Response(200, json=body)
+
+    def dispatch(self, method: str, params: List[Any]) -> Any:
+        if method == "eth_chainId":
+            return hex(DEV_CHAIN_ID)
+        if method == "eth_accounts":
+            return list(self.accounts)
+        if method == "eth_blockNumber":
+            return hex(self.block_number)
+        if method == "eth_gasPrice":
+            return hex(1_000_000_000)
+        if method == "eth_estimateGas":
+            return hex(120_000)
+        if method == "eth_getTransactionCount":
+            return hex(self.nonces.get(params[0].lower(), 0))
+        if method == "eth_sendTransaction":
+            return self._send(params[0])
+        if method == "eth_getTransactionReceipt":
+            return self.receipts.get(params[0])
+        if method == "eth_call":
+            return self._call(params[0])
+        raise ValueError(f"Method {method} not supported by the dev chain")
+
+    def _send(self, tx: Dict) -> str:
+        sender = tx["from"].lower()
+        if sender not in (a.lower() for a in self.accounts):
+            raise ValueError(f"Account {tx['from']} is not unlocked")
+        if self.fail_next_sends > 0:
+            self.fail_next_sends -= 1
+            raise ValueError("Dev chain: injected send failure")
+        expected = self.nonces.get(sender, 0)
+        nonce = int(tx["nonce"], 16) if "nonce" in tx else expected
+        if nonce > expected and self.queue_future_nonces:
+            self.queued.setdefault(sender, {})[nonce] = tx
+            return self._tx_hash(sender, nonce, tx)
+        if nonce != expected:
+            raise ValueError(f"Nonce too {'low' if nonce < expected else 'high'}: expected {expected}")
+
+        tx_hash = self._mine(sender, nonce, tx)
+        # The gap is filled: held transactions with the following nonces go in too
+        held = self.queued.get(sender, {})
+        while self.nonces[sender] in held:
+            self._mine(sender, self.nonces[sender], held.pop(self.nonces[sender]))
+        return tx_hash
+
+    @staticmethod
+    def _tx_hash(sender: str, nonce: int, tx: Dict) -> str:
+        return "0x" + hashlib.sha256(f"{sender}:{nonce}:{tx['data']}".encode()).hexdigest()
+
+    def _mine(self, sender: str, nonce: int, tx: Dict) -> str:
+        self.nonces[sender] = nonce + 1
+        status = 1
+        try:
+            project_id, root = decode_register_merkle_root(tx["data"])
+            if project_id in self.merkle_roots:
+                status = 0     # require(...): "Merkle root already registered"
+            else:
+                self.merkle_roots[project_id] = root
+        except ValueError:
+            status = 0
+
+        self.block_number += 1
+        tx_hash = self._tx_hash(sender, nonce, tx)
+        self.receipts[tx_hash] = {
+            "transactionHash": tx_hash,
+            "blockNumber": hex(self.block_number),
+            "from": tx["from"],
+            "to": tx.get("to"),
+            "status": hex(status),
+        }
+        return tx_hash
+
+    def _call(self, call: Dict) -> str:
+        data = bytes.fromhex(call["data"][2:])
+        if data[:4] != PROJECT_MERKLE_ROOTS:
+            raise ValueError("Dev chain only answers projectMerkleRoots(string)")
+        args = data[4:]
+        offset = int.from_bytes(args[:32], "big")
+        length = int.from_bytes(args[offset:offset + 32], "big")
+        project_id = args[offset + 32:offset + 32 + length].decode("utf-8")
+        return "0x" + self.merkle_roots.get(project_id, b"\x00" * 32).hex()
+
+
+# Singleton dev chain
+_dev_chain: Optional[DevChain] = None
+
+
+def get_dev_chain() -> DevChain:
+    """Get singleton dev chain"""
+    global _dev_chain
+    if _dev_chain is None:
+        _dev_chain = DevChain()
+        logger.info("⚠️ Using the in-process dev chain (BLOCKCHAIN_RPC_URL=devchain)")
+    return _dev_chain
@@ -0,0 +1,138 @@
+"""
+In-process Event Bus
+Topic-based pub/sub for pushing submission stage transitions to watchers
+
+Each subscriber owns a bounded queue. A slow subscriber whose queue is full
+loses its oldest pending events, never the newest, so the final stage of a
+submission is always delivered. The last event per topic is retained for a
+while, so a watcher that subscribes late starts from the current stage.
+"""
+
+import asyncio
+import itertools
+import time
+from typing import Any, Dict, Optional, Set
+import logging
+
+from app.utils.cache import TTLCache
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Stages after which a submission publishes nothing more
+TERMINAL_STAGES = {"verified", "rejected", "error"}
+
+
+class Subscription:
+    """One watcher's bounded event queue"""
+
+    def __init__(self, bus: "EventBus", topic: str, maxsize: int):
+        self.bus = bus
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def _offer(self, event: Dict):
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except asyncio.QueueFull:
+                self.queue.get_nowait()
+                self.dropped += 1
+                self.bus.dropped += 1
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Next event, or None after timeout seconds without one"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventBus:
+    """Fan-out of published events to every subscriber of a topic"""
+
+    def __init__(self, queue_size: int = 32, retain_seconds: float = 300, max_retained: int = 10000):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._retained = TTLCache(retain_seconds, max_retained)
+        self._sequence = itertools.count(1)
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, topic: str, maxsize: Optional[int] = None) -> Subscription:
+        subscription = Subscription(self, topic, maxsize or self.queue_size)
+        self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        watchers = self._subscribers.get(subscription.topic)
+        if watchers is not None:
+            watchers.discard(subscription)
+            if not watchers:
+                del self._subscribers[subscription.topic]
+
+    def publish(self, topic: str, event: Dict[str, Any]) -> Dict:
+        """Deliver an event to every subscriber of topic (never blocks; call from the event loop)"""
+        event = {"id": next(self._sequence), "timestamp": time.time(), **event}
+        self._retained.set(topic, event)
+        self.published += 1
+        for subscription in self._subscribers.get(topic, ()):
+            subscription._offer(event)
+        return event
+
+    def last_event(self, topic: str) -> Optional[Dict]:
+        return self._retained.get(topic)
+
+    def stats(self) -> Dict:
+        return {
+            "topics": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "retained": len(self._retained),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+def submission_topic(submission_id: str) -> str:
+    return f"submission:{submission_id}"
+
+
+def publish_submission_stage(submission_id: str, stage: str, **data) -> Dict:
+    """
+    Publish a pipeline stage transition for a submission
+
+    Args:
+        submission_id: Submission being processed
+        stage: processing, mangrove_done, temporal_done, verified, rejected or error
+        **data: Small JSON-serializable details (scores, error message)
+
+    Returns:
+        The published event
+    """
+    return get_event_bus().publish(
+        submission_topic(submission_id),
+        {"submission_id": submission_id, "stage": stage, "terminal": stage in TERMINAL_STAGES, **data},
+    )
+
+
+# Singleton event bus
+_event_bus: Optional[EventBus] = None
+
+
+def get_event_bus() -> EventBus:
+    """Get singleton event bus"""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = EventBus(settings.EVENT_QUEUE_SIZE, settings.EVENT_RETAIN_SECONDS)
+    return _event_bus
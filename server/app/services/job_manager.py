@@ -0,0 +1,167 @@
+"""
+Pipeline Job Manager
+Runs MRV pipelines as background jobs with one in-flight job per submission
+
+Triggers return a job handle immediately; a second trigger for a submission
+that is already queued or running gets the existing job. Per-stage progress
+comes from the stage events run_pipeline publishes on the event bus.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import logging
+
+from app.services.event_bus import get_event_bus, submission_topic
+from app.utils.cache import TTLCache
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """One pipeline run for a submission"""
+
+    def __init__(self, submission_id: str):
+        self.id = uuid.uuid4().hex
+        self.submission_id = submission_id
+        self.status = "queued"            # queued → running → succeeded | failed
+        self.stages: List[Dict] = []
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._subscription = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def _collect_stages(self):
+        subscription = self._subscription
+        while subscription is not None and not subscription.queue.empty():
+            event = subscription.queue.get_nowait()
+            self.stages.append({k: v for k, v in event.items() if k not in ("id", "submission_id")})
+
+    def to_dict(self) -> Dict:
+        self._collect_stages()
+        return {
+            "job_id": self.id,
+            "submission_id": self.submission_id,
+            "status": self.status,
+            "stage": self.stages[-1]["stage"] if self.stages else None,
+            "stages": self.stages,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Deduplicating background runner for pipeline jobs"""
+
+    def __init__(self, runner: Callable[[str], Awaitable[Dict]], concurrency: int = 2,
+                 retain_seconds: float = 3600):
+        self.runner = runner
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._active: Dict[str, Job] = {}                 # submission_id → queued/running job
+        self._jobs: Dict[str, Job] = {}                   # job_id → queued/running job
+        self._finished = TTLCache(retain_seconds, max_entries=10000)
+        self.deduplicated = 0
+
+    def submit(self, submission_id: str) -> Tuple[Job, bool]:
+        """
+        Enqueue a pipeline run unless one is already in flight
+
+        Returns:
+            (job, created) — created is False when an in-flight job was reused
+        """
+        submission_id = str(submission_id)
+        job = self._active.get(submission_id)
+        if job is not None:
+            self.deduplicated += 1
+            return job, False
+
+        job = Job(submission_id)
+        # Subscribe before the job starts so no stage event is missed
+        job._subscription = get_event_bus().subscribe(submission_topic(submission_id), maxsize=64)
+        self._active[submission_id] = job
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job))
+        return job, True
+
+    async def _run(self, job: Job):
+        try:
+            async with self._semaphore:
+                job.status = "running"
+                job.started_at = time.time()
+                result = await self.runner(job.submission_id)
+            job.result = {
+                "status": result.get("status"),
+                "processing_time_seconds": result.get("processing_time_seconds"),
+            }
+            job.status = "succeeded"
+        except asyncio.CancelledError:
+            job.status, job.error = "failed", "cancelled"
+            raise
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+            logger.error(f"❌ Job {job.id} for submission {job.submission_id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            job._collect_stages()
+            job._subscription.close()
+            job._subscription = None
+            self._active.pop(job.submission_id, None)
+            self._jobs.pop(job.id, None)
+            self._finished.set(job.id, job)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id) or self._finished.get(job_id)
+
+    async def wait(self, job: Job, timeout: Optional[float] = None) -> Job:
+        """Wait for a job to finish (the job keeps running if the waiter is cancelled)"""
+        if not job.done:
+            await asyncio.wait_for(asyncio.shield(job.task), timeout)
+        return job
+
+    async def stop(self):
+        """Cancel queued and running jobs"""
+        tasks = [job.task for job in self._jobs.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "queued": sum(job.status == "queued" for job in self._jobs.values()),
+            "running": sum(job.status == "running" for job in self._jobs.values()),
+            "retained": len(self._finished),
+            "deduplicated": self.deduplicated,
+        }
+
+
+# Singleton job manager
+_job_manager: Optional[JobManager] = None
+
+
+def get_job_manager(runner: Optional[Callable[[str], Awaitable[Dict]]] = None) -> JobManager:
+    """Get singleton job manager (the first call must supply the pipeline runner)"""
+    global _job_manager
+    if _job_manager is None:
+        if runner is None:
+            raise RuntimeError("Job manager has not been started")
+        _job_manager = JobManager(runner, settings.JOB_CONCURRENCY, settings.JOB_RETAIN_SECONDS)
+    return _job_manager
+
+
+async def stop_job_manager():
+    global _job_manager
+    if _job_manager is not None:
+        await _job_manager.stop()
+        _job_manager = None
@@ -3,16 +3,32 @@ Mangrove Verification Model Service
 Spatial validation model to verify mangrove presence in images
 """
 
+import asyncio
+import time
 import numpy as np
 import cv2
 from PIL import Image
-import pickle
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Sequence, Union
 import logging
 from app.utils.config import settings
+from app.utils.log import get_logger
+from app.services.feature_extraction import SpectralFeatureExtractor
+from app.services.model_bundle import (
+    LinearClassifier,
+    ModelBundle,
+    ModelBundleError,
+    find_bundle,
+    load_bundle,
+    load_legacy_pickle,
+    verify_bundle_registry,
+)
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
+
+# An image source is either a path on disk or an already-decoded tile
+ImageSource = Union[str, np.ndarray]
 
 
 class MangroveVerificationModel:
@@ -21,30 +37,53 @@ class MangroveVerificationModel:
     def __init__(self):
         self.model = None
         self.model_version = "v1.0.3"
+        self.bundle_hash = None
         self.threshold = settings.MANGROVE_THRESHOLD
+        self.feature_extractor = SpectralFeatureExtractor(input_size=224)
+        self.load_seconds = None
         self.initialized = False
     
     async def initialize(self):
-        """Load model from disk"""
+        """Load model from disk in a worker thread so the event loop stays free"""
+        start = time.perf_counter()
+        bundle = await asyncio.to_thread(self.load)
+        if bundle is not None and settings.VERIFY_MODEL_REGISTRY:
+            try:
+                verified = await verify_bundle_registry(bundle)
+            except Exception as e:
+                logger.warning(f"⚠ Could not verify mangrove model against registry: {e}")
+                verified = None
+            if verified is False:
+                # Refuse the bundle: the pipeline fails readiness instead of serving it
+                self.model = None
+                self.initialized = False
+                raise ModelBundleError(
+                    f"Mangrove model {bundle.bundle_hash} does not match model_registry"
+                )
+        self.load_seconds = time.perf_counter() - start
+    
+    def load(self) -> Optional[ModelBundle]:
+        """Blocking model load (bundle format, falling back to a legacy pickle)"""
+        bundle = None
         try:
+            bundle_dir = find_bundle(settings.MODELS_DIR, "mangrove")
             model_path = Path(settings.MANGROVE_MODEL_PATH)
             
-            if not model_path.exists():
+            if bundle_dir is not None:
+                bundle = load_bundle(bundle_dir)
+                self.model = LinearClassifier(
+                    bundle.arrays["coef"],
+                    bundle.arrays["intercept"],
+                    bundle.params.get("classes")
+                )
+                self.model_version = bundle.version
+                self.bundle_hash = bundle.bundle_hash
+            elif not model_path.exists():
                 logger.warning(f"Model file not found at {model_path}, using mock model")
                 self.model = None  # Will use mock predictions
             else:
                 try:
-                    with open(model_path, 'rb') as f:
-                        try:
-                            self.model = pickle.load(f)
-                        except (TypeError, ValueError, UnicodeDecodeError):
-                            # Try with latin1 encoding for compatibility
-                            f.seek(0)
-                            self.model = pickle.load(f, encoding='latin1')
-                        except Exception:
-                            # Try with bytes encoding for Python 3.11+
-                            f.seek(0)
-                            self.model = pickle.load(f, encoding='bytes')
+                    self.model = load_legacy_pickle(model_path)
                     logger.info(f"✅ Loaded mangrove verification model from {model_path}")
                 except Exception as e:
                     logger.error(f"❌ Failed to load mangrove model: {e}")
@@ -56,56 +95,60 @@ class MangroveVerificationModel:
             logger.error(f"❌ Failed to load mangrove model: {e}")
             self.model = None  # Fallback to mock
             self.initialized = True
+        return bundle
+    
+    def _load_image(self, image: ImageSource) -> np.ndarray:
+        """Decode an image path to BGR, or pass an in-memory BGR tile through unchanged"""
+        if isinstance(image, np.ndarray):
+            return image
+        
+        img = cv2.imread(image)
+        if img is None:
+            # Try PIL if OpenCV fails
+            img = np.array(Image.open(image))
+            if len(img.shape) == 3 and img.shape[2] == 4:
+                img = cv2.cvtColor(img, cv2.COLOR_RGBA2BGR)
+            elif len(img.shape) == 3:
+                img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+        return img
+    
+    @staticmethod
+    def split_into_tiles(image: np.ndarray, tile_size: int = 224) -> List[np.ndarray]:
+        """
+        Split a large scene into non-overlapping square tiles
+        
+        Edge tiles smaller than half a tile are dropped so that slivers do not
+        skew the per-tile probabilities.
+        
+        Args:
+            image: Decoded scene array (H x W or H x W x C)
+            tile_size: Tile edge length in pixels
+            
+        Returns:
+            List of tile views into the scene array (no copies)
+        """
+        height, width = image.shape[:2]
+        min_edge = tile_size // 2
+        tiles = []
+        for y in range(0, height, tile_size):
+            for x in range(0, width, tile_size):
+                tile = image[y:y + tile_size, x:x + tile_size]
+                if tile.shape[0] >= min_edge and tile.shape[1] >= min_edge:
+                    tiles.append(tile)
+        return tiles
     
-    def preprocess_image(self, image_path: str) -> np.ndarray:
-        """Preprocess image for model input"""
+    def preprocess_image(self, image_path: ImageSource) -> np.ndarray:
+        """Preprocess image (path or decoded tile) for model input"""
         try:
             # Load image
-            img = cv2.imread(image_path)
-            if img is None:
-                # Try PIL if OpenCV fails
-                img = np.array(Image.open(image_path))
-                if len(img.shape) == 3 and img.shape[2] == 4:
-                    img = cv2.cvtColor(img, cv2.COLOR_RGBA2RGB)
-            
-            # Resize to model input size (adjust based on your model)
-            img_resized = cv2.resize(img, (224, 224))
-            
-            # Normalize
-            img_normalized = img_resized.astype(np.float32) / 255.0
-            
-            # Extract features (NDVI, NDWI, etc.)
-            if len(img_normalized.shape) == 3:
-                # Convert to grayscale for feature extraction
-                gray = cv2.cvtColor((img_normalized * 255).astype(np.uint8), cv2.COLOR_RGB2GRAY)
-            else:
-                gray = (img_normalized * 255).astype(np.uint8)
-            
-            # Calculate vegetation indices (mock - replace with actual satellite bands)
-            # In production, use actual multispectral bands
-            ndvi = self._calculate_ndvi_mock(img_normalized)
-            ndwi = self._calculate_ndwi_mock(img_normalized)
+            img = self._load_image(image_path)
             
-            # Combine features
-            features = np.array([ndvi, ndwi])
-            
-            return features
+            # Resize and extract spectral, texture and colour features in one pass
+            return self.feature_extractor.extract(img)
         except Exception as e:
-            logger.error(f"Error preprocessing image: {e}")
+            logger.error("Error preprocessing image: %s", e)
             raise
     
-    def _calculate_ndvi_mock(self, img: np.ndarray) -> float:
-        """Mock NDVI calculation (replace with actual multispectral data)"""
-        # In production, use actual NIR and Red bands
-        # NDVI = (NIR - Red) / (NIR + Red)
-        return 0.6  # Mock value
-    
-    def _calculate_ndwi_mock(self, img: np.ndarray) -> float:
-        """Mock NDWI calculation (replace with actual multispectral data)"""
-        # In production, use actual Green and NIR bands
-        # NDWI = (Green - NIR) / (Green + NIR)
-        return 0.3  # Mock value
-    
     async def predict(self, image_path: str) -> Dict:
         """
         Predict mangrove presence probability
@@ -120,33 +163,96 @@ class MangroveVerificationModel:
             # Preprocess image
             features = self.preprocess_image(image_path)
             
-            if self.model is None:
-                # Mock prediction for development
-                probability = 0.85 + np.random.normal(0, 0.1)
-                probability = np.clip(probability, 0.0, 1.0)
-                confidence = 0.9
-            else:
-                # Real model prediction
-                features_reshaped = features.reshape(1, -1)
-                probability = self.model.predict_proba(features_reshaped)[0][1]
-                confidence = 0.95 if probability > self.threshold else 0.7
+            probabilities = self._predict_probabilities(features.reshape(1, -1))
+            result = self._build_result(features, probabilities[0])
             
-            result = {
-                "probability": float(probability),
-                "model_version": self.model_version,
-                "confidence": float(confidence),
-                "features": {
-                    "ndvi": float(features[0]) if len(features) > 0 else None,
-                    "ndwi": float(features[1]) if len(features) > 1 else None,
-                }
-            }
-            
-            logger.info(f"Mangrove verification: probability={probability:.3f}, threshold={self.threshold}")
+            logger.info(
+                "Mangrove verification: probability=%.3f, threshold=%s", result["probability"], self.threshold,
+                sample_every=settings.LOG_SAMPLE_EVERY
+            )
             return result
             
         except Exception as e:
-            logger.error(f"Error in mangrove prediction: {e}")
+            logger.error("Error in mangrove prediction: %s", e)
             raise
+    
+    async def predict_batch(
+        self,
+        images: Sequence[ImageSource],
+        max_workers: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Predict mangrove presence for many images or tiles in one model call
+        
+        Feature extraction runs in a thread pool (OpenCV releases the GIL while
+        decoding and resizing), the feature vectors are stacked into a single
+        matrix and the classifier is invoked once for the whole batch.
+        
+        Args:
+            images: Image paths and/or decoded tile arrays
+            max_workers: Feature extraction threads (defaults to MANGROVE_BATCH_WORKERS)
+            
+        Returns:
+            One result dictionary per input, in input order, shaped like predict()
+        """
+        if not images:
+            return []
+        
+        try:
+            workers = max(1, min(max_workers or settings.MANGROVE_BATCH_WORKERS, len(images)))
+            features = await asyncio.to_thread(self._extract_batch_features, images, workers)
+            
+            probabilities = self._predict_probabilities(features)
+            results = [
+                self._build_result(features[i], probabilities[i])
+                for i in range(len(images))
+            ]
+            
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Mangrove batch verification: %d items, mean probability=%.3f, passed=%d",
+                    len(results), float(np.mean(probabilities)), int(np.sum(probabilities >= self.threshold))
+                )
+            return results
+            
+        except Exception as e:
+            logger.error("Error in batch mangrove prediction: %s", e)
+            raise
+    
+    def _extract_batch_features(self, images: Sequence[ImageSource], workers: int) -> np.ndarray:
+        """Extract feature vectors concurrently and stack them row-wise"""
+        if workers == 1:
+            rows = [self.preprocess_image(image) for image in images]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mangrove-features") as pool:
+                rows = list(pool.map(self.preprocess_image, images))
+        return np.vstack(rows)
+    
+    def _predict_probabilities(self, features: np.ndarray) -> np.ndarray:
+        """Mangrove-class probabilities for a (n_samples, n_features) matrix"""
+        if self.model is None:
+            # Mock prediction for development
+            return np.clip(0.85 + np.random.normal(0, 0.1, size=features.shape[0]), 0.0, 1.0)
+        # Real model prediction (older classifiers were trained on NDVI/NDWI only)
+        n_features = getattr(self.model, "n_features_in_", features.shape[1])
+        return self.model.predict_proba(features[:, :n_features])[:, 1]
+    
+    def _build_result(self, features: np.ndarray, probability: float) -> Dict:
+        """Shape a single prediction into the service's result dictionary"""
+        if self.model is None:
+            confidence = 0.9
+        else:
+            confidence = 0.95 if probability > self.threshold else 0.7
+        
+        return {
+            "probability": float(probability),
+            "model_version": self.model_version,
+            "confidence": float(confidence),
+            "features": {
+                name: float(features[i])
+                for i, name in enumerate(SpectralFeatureExtractor.SCALAR_FEATURES)
+            }
+        }
 
 
 # Singleton instance
@@ -157,6 +263,7 @@ async def get_mangrove_model() -> MangroveVerificationModel:
     """Get singleton mangrove model instance"""
     global _mangrove_model
     if _mangrove_model is None:
-        _mangrove_model = MangroveVerificationModel()
-        await _mangrove_model.initialize()
+        model = MangroveVerificationModel()
+        await model.initialize()
+        _mangrove_model = model
     return _mangrove_model
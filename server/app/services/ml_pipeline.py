@@ -6,7 +6,6 @@ Orchestrates the complete MRV pipeline: Mangrove → Temporal → Biomass → Ca
 import asyncio
 import time
 from typing import Dict, Optional
-import logging
 from pathlib import Path
 import tempfile
 import requests
@@ -22,10 +21,20 @@ from app.db.supabase_client import (
     get_latest_verified_submission,
     create_temporal_history
 )
+from app.services.event_bus import publish_submission_stage
 from app.utils.config import settings
+from app.utils.log import bind_context, get_logger, reset_context
+from app.utils.metrics import (
+    MODEL_SECONDS,
+    PIPELINE_ERRORS_TOTAL,
+    PIPELINE_STAGE_SECONDS,
+    SUBMISSIONS_IN_FLIGHT,
+    SUBMISSIONS_TOTAL,
+    StageClock,
+)
 from app.utils.storage import download_from_supabase, get_image_path
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 
 class MLPipelineOrchestrator:
@@ -37,28 +46,116 @@ class MLPipelineOrchestrator:
         self.temporal_model = None
         self.carbon_engine = None
         self.initialized = False
+        self.init_error: Optional[str] = None
+        self.load_seconds: Dict[str, float] = {}
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._anchor_task: Optional[asyncio.Task] = None
     
     async def initialize(self):
-        """Initialize all ML models"""
+        """
+        Initialize all ML models
+        
+        With ML_LAZY_INIT enabled the models warm up in a background task and
+        this returns immediately; run_pipeline waits for warm-up to finish.
+        """
         logger.info("Initializing ML Pipeline Orchestrator...")
         
+        if settings.BLOCKCHAIN_ENABLED:
+            from app.services.anchoring import anchoring_configured, start_anchor_worker
+            if anchoring_configured():
+                try:
+                    await start_anchor_worker()
+                except Exception as e:
+                    logger.error(f"❌ Anchor worker failed to start, anchoring in mock mode: {e}")
+            self._anchor_task = asyncio.create_task(self._anchor_flush_loop())
+        
+        if settings.ML_LAZY_INIT:
+            self._warmup_task = asyncio.create_task(self._load_models())
+            logger.info("ML models warming up in the background")
+        else:
+            await self._load_models()
+    
+    async def _load_models(self):
+        """Load all models concurrently (each load runs in its own worker thread)"""
+        start_time = time.perf_counter()
+        
         try:
             # Initialize all models in parallel
-            self.mangrove_model = await get_mangrove_model()
-            self.biomass_model = await get_biomass_model()
-            self.temporal_model = await get_temporal_model()
+            self.mangrove_model, self.biomass_model, self.temporal_model = await asyncio.gather(
+                get_mangrove_model(),
+                get_biomass_model(),
+                get_temporal_model()
+            )
             self.carbon_engine = get_carbon_engine()
             
+            self.load_seconds = {
+                "mangrove_model": self.mangrove_model.load_seconds,
+                "biomass_model": self.biomass_model.load_seconds,
+                "temporal_model": self.temporal_model.load_seconds,
+                "total": time.perf_counter() - start_time,
+            }
             self.initialized = True
-            logger.info("✅ ML Pipeline Orchestrator initialized")
+            logger.info(f"✅ ML Pipeline Orchestrator initialized in {self.load_seconds['total']:.2f}s")
         except Exception as e:
+            self.init_error = str(e)
             logger.error(f"❌ Failed to initialize ML Pipeline: {e}")
             raise
     
+    @property
+    def ready(self) -> bool:
+        """Whether every model has finished loading"""
+        return self.initialized
+    
+    async def wait_until_ready(self):
+        """Block until background warm-up completes (no-op once ready)"""
+        if self.initialized:
+            return
+        if self._warmup_task is None:
+            raise RuntimeError("ML Pipeline has not been initialized")
+        # shield: a cancelled request must not cancel the shared warm-up
+        await asyncio.shield(self._warmup_task)
+    
+    async def _anchor_flush_loop(self):
+        """
+        Anchor partially filled Merkle batches once their time window expires,
+        and sweep up anchoring work a stopped process left behind (at startup,
+        then once per orphan age)
+        """
+        from app.services.blockchain_service import (
+            get_anchor_batcher, flush_pending_anchors, orphan_age_seconds, recover_pending_anchors
+        )
+        
+        batcher = get_anchor_batcher()
+        interval = max(1.0, min(settings.ANCHOR_BATCH_SECONDS / 4, 15.0))
+        next_recovery = time.monotonic()
+        while True:
+            if time.monotonic() >= next_recovery:
+                next_recovery = time.monotonic() + orphan_age_seconds()
+                try:
+                    await recover_pending_anchors()
+                except Exception as e:
+                    logger.error(f"❌ Anchor recovery failed: {e}")
+            await asyncio.sleep(interval)
+            if batcher.due():
+                try:
+                    await flush_pending_anchors()
+                except Exception as e:
+                    logger.error(f"❌ Scheduled blockchain anchor failed: {e}")
+    
     async def cleanup(self):
         """Cleanup resources"""
         logger.info("Cleaning up ML Pipeline Orchestrator...")
-        # Add any cleanup logic here
+        if self._warmup_task and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        if self._anchor_task:
+            self._anchor_task.cancel()
+            try:
+                from app.services.blockchain_service import flush_pending_anchors
+                from app.services.anchoring import stop_anchor_worker
+                await flush_pending_anchors()
+                await stop_anchor_worker()
+            except Exception as e:
+                logger.error(f"❌ Failed to anchor pending submissions on shutdown: {e}")
     
     async def run_pipeline(self, submission_id: str) -> Dict:
         """
@@ -80,39 +177,58 @@ class MLPipelineOrchestrator:
             Complete pipeline result
         """
         start_time = time.time()
+        clock = StageClock(PIPELINE_STAGE_SECONDS)
+        SUBMISSIONS_IN_FLIGHT.inc()
+        log_token = bind_context(submission_id=submission_id)
         
         try:
-            # Fetch submission
-            submission = await get_submission(submission_id)
-            if not submission:
-                raise ValueError(f"Submission {submission_id} not found")
+            # A failed warm-up goes through the error path below like any other failure
+            await self.wait_until_ready()
             
-            # Update status to processing
-            await update_submission(submission_id, {"status": "processing"})
+            # Fetch submission
+            with clock.stage("fetch"):
+                submission = await get_submission(submission_id)
+                if not submission:
+                    raise ValueError(f"Submission {submission_id} not found")
+                
+                # Update status to processing
+                await update_submission(submission_id, {"status": "processing"})
+            publish_submission_stage(submission_id, "processing", status="processing")
             
             # Download image from Supabase Storage
             image_url = submission["image_url"]
-            image_path = await get_image_path(image_url)
+            with clock.stage("download"):
+                image_path = await get_image_path(image_url)
             
-            logger.info(f"Processing submission {submission_id}")
+            logger.info("Processing submission")
             
             # ========== STEP 1: MANGROVE VERIFICATION ==========
-            logger.info("Step 1: Running Mangrove Verification...")
-            mangrove_result = await self.mangrove_model.predict(image_path)
+            logger.debug("Step 1: Running Mangrove Verification...")
+            with clock.stage("mangrove"):
+                model_start = time.perf_counter()
+                mangrove_result = await self.mangrove_model.predict(image_path)
+                MODEL_SECONDS.labels("mangrove", mangrove_result["model_version"]).observe(time.perf_counter() - model_start)
             
             # Check threshold
             if mangrove_result["probability"] < settings.MANGROVE_THRESHOLD:
                 # Reject submission
-                await update_submission(
-                    submission_id,
-                    {
-                        "status": "rejected",
-                        "mangrove_score": mangrove_result["probability"],
-                        "model_version": mangrove_result["model_version"],
-                        "error_message": f"Mangrove verification failed: probability {mangrove_result['probability']:.3f} < threshold {settings.MANGROVE_THRESHOLD}"
-                    }
+                with clock.stage("db_write"):
+                    await update_submission(
+                        submission_id,
+                        {
+                            "status": "rejected",
+                            "mangrove_score": mangrove_result["probability"],
+                            "model_version": mangrove_result["model_version"],
+                            "error_message": f"Mangrove verification failed: probability {mangrove_result['probability']:.3f} < threshold {settings.MANGROVE_THRESHOLD}"
+                        }
+                    )
+                SUBMISSIONS_TOTAL.labels("rejected").inc()
+                PIPELINE_STAGE_SECONDS.labels("total").observe(time.time() - start_time)
+                publish_submission_stage(
+                    submission_id, "rejected", status="rejected",
+                    mangrove_score=mangrove_result["probability"], reason="mangrove_verification_failed"
                 )
-                logger.warning(f"Submission {submission_id} rejected: mangrove verification failed")
+                logger.warning("Submission rejected: mangrove verification failed", mangrove_score=mangrove_result["probability"])
                 return {
                     "submission_id": submission_id,
                     "status": "rejected",
@@ -120,76 +236,97 @@ class MLPipelineOrchestrator:
                     "reason": "mangrove_verification_failed"
                 }
             
-            logger.info(f"✅ Mangrove verification passed: {mangrove_result['probability']:.3f}")
+            logger.info("✅ Mangrove verification passed: %.3f", mangrove_result["probability"])
+            publish_submission_stage(
+                submission_id, "mangrove_done", status="processing", mangrove_score=mangrove_result["probability"]
+            )
             
             # ========== STEP 2: TEMPORAL CHANGE DETECTION ==========
             temporal_result = None
             project_id = submission["project_id"]
             
             # Check if there's a previous verified submission
-            previous_submission = await get_latest_verified_submission(project_id)
+            with clock.stage("fetch"):
+                previous_submission = await get_latest_verified_submission(project_id)
             
             if previous_submission and previous_submission["id"] != submission_id:
-                logger.info("Step 2: Running Temporal Change Detection...")
+                logger.debug("Step 2: Running Temporal Change Detection...")
                 
                 # Download previous image
                 prev_image_url = previous_submission["image_url"]
-                prev_image_path = await get_image_path(prev_image_url)
+                with clock.stage("download"):
+                    prev_image_path = await get_image_path(prev_image_url)
                 
                 # Run temporal comparison
-                temporal_result = await self.temporal_model.compare(
-                    prev_image_path,
-                    image_path
-                )
+                with clock.stage("temporal"):
+                    model_start = time.perf_counter()
+                    temporal_result = await self.temporal_model.compare(
+                        prev_image_path,
+                        image_path
+                    )
+                    MODEL_SECONDS.labels("temporal", temporal_result["model_version"]).observe(time.perf_counter() - model_start)
                 
                 # Create temporal history record
-                await create_temporal_history({
-                    "project_id": project_id,
-                    "previous_submission_id": previous_submission["id"],
-                    "current_submission_id": submission_id,
-                    "growth_detected": temporal_result["growth_detected"],
-                    "growth_score": temporal_result["growth_score"],
-                    "change_metrics": temporal_result["comparison_metrics"]
-                })
+                with clock.stage("db_write"):
+                    await create_temporal_history({
+                        "project_id": project_id,
+                        "previous_submission_id": previous_submission["id"],
+                        "current_submission_id": submission_id,
+                        "growth_detected": temporal_result["growth_detected"],
+                        "growth_score": temporal_result["growth_score"],
+                        "change_metrics": temporal_result["comparison_metrics"]
+                    })
                 
-                logger.info(f"✅ Temporal change detected: growth={temporal_result['growth_detected']}, score={temporal_result['growth_score']:.3f}")
+                logger.info(
+                    "✅ Temporal change detected: growth=%s, score=%.3f",
+                    temporal_result["growth_detected"], temporal_result["growth_score"]
+                )
             else:
-                logger.info("Step 2: Skipping temporal change detection (no previous submission)")
+                logger.debug("Step 2: Skipping temporal change detection (no previous submission)")
+            publish_submission_stage(
+                submission_id, "temporal_done", status="processing", skipped=temporal_result is None,
+                growth_score=temporal_result["growth_score"] if temporal_result else None
+            )
             
             # ========== STEP 3: BIOMASS REGRESSION ==========
-            logger.info("Step 3: Running Biomass Regression...")
+            logger.debug("Step 3: Running Biomass Regression...")
             
             # Extract satellite band values from image
             # In production, these would come from actual satellite data
             # For now, using mock values extracted from image
-            bands = await self._extract_satellite_bands(image_path)
+            with clock.stage("decode"):
+                bands = await self._extract_satellite_bands(image_path)
             
-            biomass_result = await self.biomass_model.predict(
-                B2=bands["B2"],
-                B3=bands["B3"],
-                B4=bands["B4"],
-                B8=bands["B8"],
-                species="Mangrove"
-            )
+            with clock.stage("biomass"):
+                model_start = time.perf_counter()
+                biomass_result = await self.biomass_model.predict(
+                    B2=bands["B2"],
+                    B3=bands["B3"],
+                    B4=bands["B4"],
+                    B8=bands["B8"],
+                    species="Mangrove"
+                )
+                MODEL_SECONDS.labels("biomass", biomass_result["model_version"]).observe(time.perf_counter() - model_start)
             
-            logger.info(f"✅ Biomass estimate: {biomass_result['biomass']:.2f} tonnes/ha")
+            logger.info("✅ Biomass estimate: %.2f tonnes/ha", biomass_result["biomass"])
             
             # ========== STEP 4: CARBON CALCULATION ==========
-            logger.info("Step 4: Calculating Carbon...")
+            logger.debug("Step 4: Calculating Carbon...")
             
             # Get area from project metadata (default to 1 hectare if not available)
             area_hectares = submission.get("metadata", {}).get("area_hectares", 1.0)
             
-            carbon_result = self.carbon_engine.calculate_carbon(
-                biomass=biomass_result["biomass"],
-                area_hectares=area_hectares,
-                apply_buffer=True
-            )
+            with clock.stage("carbon"):
+                carbon_result = self.carbon_engine.calculate_carbon(
+                    biomass=biomass_result["biomass"],
+                    area_hectares=area_hectares,
+                    apply_buffer=True
+                )
             
-            logger.info(f"✅ Carbon estimate: {carbon_result['carbon_tonnes_buffered']:.2f} tonnes C")
+            logger.info("✅ Carbon estimate: %.2f tonnes C", carbon_result["carbon_tonnes_buffered"])
             
             # ========== STEP 5: UPDATE DATABASE ==========
-            logger.info("Step 5: Updating database...")
+            logger.debug("Step 5: Updating database...")
             
             update_data = {
                 "status": "verified",
@@ -205,20 +342,30 @@ class MLPipelineOrchestrator:
                 "processed_at": time.strftime("%Y-%m-%dT%H:%M:%S")
             }
             
-            await update_submission(submission_id, update_data)
+            with clock.stage("db_write"):
+                updated = await update_submission(submission_id, update_data)
+            publish_submission_stage(
+                submission_id, "verified", status="verified",
+                carbon_estimate=update_data["carbon_estimate"], co2_equivalent=update_data["co2_equivalent"]
+            )
             
             # ========== STEP 6: BLOCKCHAIN ANCHOR (if enabled) ==========
             if settings.BLOCKCHAIN_ENABLED:
-                logger.info("Step 6: Triggering blockchain anchor...")
+                logger.debug("Step 6: Triggering blockchain anchor...")
                 try:
                     from app.services.blockchain_service import anchor_submission
-                    await anchor_submission(submission_id)
-                    logger.info("✅ Blockchain anchor created")
+                    # Hash the row as just written instead of fetching it again
+                    with clock.stage("anchor"):
+                        anchor = await anchor_submission(submission_id, updated or {**submission, **update_data})
+                    logger.info("✅ Blockchain anchor %s", anchor["status"])
                 except Exception as e:
-                    logger.error(f"❌ Blockchain anchor failed: {e}")
+                    PIPELINE_ERRORS_TOTAL.labels("anchor").inc()
+                    logger.error("❌ Blockchain anchor failed: %s", e)
                     # Don't fail the pipeline if blockchain fails
             
             processing_time = time.time() - start_time
+            SUBMISSIONS_TOTAL.labels("verified").inc()
+            PIPELINE_STAGE_SECONDS.labels("total").observe(processing_time)
             
             result = {
                 "submission_id": submission_id,
@@ -230,22 +377,33 @@ class MLPipelineOrchestrator:
                 "processing_time_seconds": processing_time
             }
             
-            logger.info(f"✅ Pipeline completed successfully in {processing_time:.2f}s")
+            logger.info("✅ Pipeline completed successfully in %.2fs", processing_time)
             return result
             
         except Exception as e:
-            logger.error(f"❌ Pipeline failed for submission {submission_id}: {e}")
+            logger.error("❌ Pipeline failed: %s", e)
+            SUBMISSIONS_TOTAL.labels("error").inc()
+            PIPELINE_ERRORS_TOTAL.labels(clock.current or "unknown").inc()
+            PIPELINE_STAGE_SECONDS.labels("total").observe(time.time() - start_time)
             
-            # Update submission with error
-            await update_submission(
-                submission_id,
-                {
-                    "status": "error",
-                    "error_message": str(e)
-                }
-            )
+            # Publish first: the failure is often the database itself, and
+            # watchers must still see the terminal stage
+            publish_submission_stage(submission_id, "error", status="error", error_message=str(e))
+            try:
+                await update_submission(
+                    submission_id,
+                    {
+                        "status": "error",
+                        "error_message": str(e)
+                    }
+                )
+            except Exception as write_error:
+                logger.error("❌ Failed to record pipeline error: %s", write_error)
             
             raise
+        finally:
+            SUBMISSIONS_IN_FLIGHT.dec()
+            reset_context(log_token)
     
     async def _extract_satellite_bands(self, image_path: str) -> Dict:
         """
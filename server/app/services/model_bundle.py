@@ -0,0 +1,418 @@
+"""
+Model Bundle Format and Loader
+Pickle-free model artifacts shared by the MRV services and biomass_api
+
+A bundle is a directory holding a ``manifest.json`` plus the files it lists:
+
+    models/biomass/
+        manifest.json            name, version, params, per-file SHA-256, bundle hash
+        xgb_biomass_booster.json XGBoost booster (native JSON format)
+    models/mangrove/
+        manifest.json
+        coef.npy, intercept.npy  classifier arrays, memory-mapped on load
+
+Small objects (species classes, training medians) live inline in the manifest
+as plain JSON, so loading them needs neither sklearn nor pickle.
+"""
+
+import argparse
+import hashlib
+import json
+import shutil
+import time
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+
+DEFAULT_SPECIES_CLASSES = ["Mangrove", "Seagrass", "Coral", "Other"]
+DEFAULT_TRAINING_MEDIANS = {
+    'B2': 0.05, 'B3': 0.06, 'B4': 0.04, 'B8': 0.3,
+    'NDVI': 0.5, 'EVI': 0.4, 'SAVI': 0.45, 'NDWI': 0.2,
+    'species_encoded': 0
+}
+
+
+class ModelBundleError(Exception):
+    """Raised when a bundle is missing, malformed or fails hash verification"""
+
+
+class CategoryEncoder:
+    """Minimal LabelEncoder replacement backed by a plain class list"""
+
+    def __init__(self, classes: Iterable[str], unknown_value: Optional[int] = None):
+        self.classes_ = np.asarray(list(classes))
+        self.unknown_value = unknown_value
+        self._index = {str(c): i for i, c in enumerate(self.classes_)}
+
+    def transform(self, values: Iterable) -> np.ndarray:
+        """Map labels to integer codes; unseen labels raise ValueError unless unknown_value is set"""
+        if self.unknown_value is not None:
+            return np.fromiter((self._index.get(str(v), self.unknown_value) for v in values), dtype=np.int64)
+        try:
+            return np.fromiter((self._index[str(v)] for v in values), dtype=np.int64)
+        except KeyError as e:
+            raise ValueError(f"y contains previously unseen labels: {e}") from None
+
+
+class LinearClassifier:
+    """predict_proba for a logistic-regression model exported as arrays"""
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, classes: Optional[List] = None):
+        self.coef_ = np.atleast_2d(coef)
+        self.intercept_ = np.atleast_1d(intercept)
+        self.classes_ = np.asarray(classes if classes is not None else [0, 1])
+        self.n_features_in_ = self.coef_.shape[1]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        scores = X @ self.coef_.T + self.intercept_
+        if scores.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        scores = scores - scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+class ModelBundle:
+    """A loaded, hash-verified model bundle"""
+
+    def __init__(self, path: Path, manifest: Dict, arrays: Dict[str, np.ndarray], load_seconds: float):
+        self.path = path
+        self.manifest = manifest
+        self.arrays = arrays
+        self.load_seconds = load_seconds
+
+    @property
+    def name(self) -> str:
+        return self.manifest["name"]
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    @property
+    def bundle_hash(self) -> str:
+        return self.manifest["bundle_hash"]
+
+    @property
+    def params(self) -> Dict:
+        return self.manifest.get("params", {})
+
+    def file_path(self, key: str) -> Path:
+        """Absolute path of a file listed in the manifest"""
+        try:
+            return self.path / self.manifest["files"][key]["path"]
+        except KeyError:
+            raise ModelBundleError(f"Bundle {self.name} has no file '{key}'") from None
+
+    def registry_record(self) -> Dict:
+        """Row for the model_registry table describing this bundle"""
+        return {
+            "model_name": self.name,
+            "version": self.version,
+            "hash": self.bundle_hash,
+            "metadata": {"format_version": self.manifest.get("format_version", FORMAT_VERSION)},
+        }
+
+
+def sha256_file(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in fixed-size chunks into a reused buffer"""
+    digest = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb") as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+def _bundle_hash(files: Dict[str, Dict], params: Dict) -> str:
+    """Hash over the per-file hashes and the inline params"""
+    payload = {
+        "files": {key: entry["sha256"] for key, entry in sorted(files.items())},
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def find_bundle(models_dir: Union[str, Path], name: str) -> Optional[Path]:
+    """Bundle directory for ``name`` under ``models_dir``, if one exists"""
+    path = Path(models_dir) / name
+    return path if (path / MANIFEST_NAME).exists() else None
+
+
+def load_bundle(path: Union[str, Path], verify: bool = True, max_workers: int = 4) -> ModelBundle:
+    """
+    Load a bundle directory
+
+    File hashes are checked concurrently (hashlib releases the GIL on large
+    buffers); ``.npy`` arrays are memory-mapped read-only.
+
+    Args:
+        path: Bundle directory containing manifest.json
+        verify: Check every file against its manifest SHA-256
+        max_workers: Threads used for hash verification
+
+    Returns:
+        Loaded ModelBundle
+    """
+    start = time.perf_counter()
+    path = Path(path)
+    manifest_path = path / MANIFEST_NAME
+    if not manifest_path.exists():
+        raise ModelBundleError(f"No {MANIFEST_NAME} in {path}")
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    files = manifest.get("files", {})
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ModelBundleError(f"Unsupported bundle format {manifest.get('format_version')} in {path}")
+
+    if verify:
+        if _bundle_hash(files, manifest.get("params", {})) != manifest.get("bundle_hash"):
+            raise ModelBundleError(f"Bundle hash mismatch in {manifest_path}")
+
+        def check(item):
+            key, entry = item
+            actual = sha256_file(path / entry["path"])
+            if actual != entry["sha256"]:
+                raise ModelBundleError(f"Hash mismatch for {key} in {path}: {actual} != {entry['sha256']}")
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(files) or 1))) as pool:
+            list(pool.map(check, files.items()))
+
+    arrays = {
+        key: np.load(path / entry["path"], mmap_mode="r")
+        for key, entry in files.items()
+        if entry["path"].endswith(".npy")
+    }
+
+    bundle = ModelBundle(path, manifest, arrays, time.perf_counter() - start)
+    logger.info(f"✅ Loaded model bundle {bundle.name}@{bundle.version} from {path} in {bundle.load_seconds * 1000:.1f}ms")
+    return bundle
+
+
+def load_bundles(paths: Iterable[Union[str, Path]], verify: bool = True) -> Dict[str, ModelBundle]:
+    """Load several bundles concurrently, keyed by bundle name"""
+    paths = list(paths)
+    if not paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+        bundles = list(pool.map(lambda p: load_bundle(p, verify=verify), paths))
+    return {bundle.name: bundle for bundle in bundles}
+
+
+def write_bundle(
+    out_dir: Union[str, Path],
+    name: str,
+    version: str,
+    files: Optional[Dict[str, Union[str, Path]]] = None,
+    arrays: Optional[Dict[str, np.ndarray]] = None,
+    params: Optional[Dict] = None
+) -> Path:
+    """
+    Write a bundle directory
+
+    Args:
+        out_dir: Destination directory (created if needed)
+        name: Model name as recorded in model_registry
+        version: Model version
+        files: Existing files to copy in, keyed by manifest key
+        arrays: NumPy arrays to store as .npy, keyed by manifest key
+        params: Small JSON-serialisable parameters stored inline
+
+    Returns:
+        Path of the written manifest
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    params = params or {}
+    entries = {}
+
+    for key, src in (files or {}).items():
+        src = Path(src)
+        dest = out_dir / src.name
+        if src.resolve() != dest.resolve():
+            shutil.copyfile(src, dest)
+        entries[key] = {"path": dest.name, "sha256": sha256_file(dest)}
+
+    for key, array in (arrays or {}).items():
+        dest = out_dir / f"{key}.npy"
+        np.save(dest, np.ascontiguousarray(array))
+        entries[key] = {"path": dest.name, "sha256": sha256_file(dest)}
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "name": name,
+        "version": version,
+        "files": entries,
+        "params": params,
+        "bundle_hash": _bundle_hash(entries, params),
+    }
+    manifest_path = out_dir / MANIFEST_NAME
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest_path
+
+
+def load_legacy_pickle(path: Union[str, Path]):
+    """
+    Load a legacy pickle artifact
+
+    ``encoding='latin1'`` only affects Python 2 ``str`` payloads, so one call
+    covers both Python 2 and Python 3 pickles. Artifacts written with
+    ``joblib.dump`` (numpy array wrappers) are handed to joblib instead.
+    """
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f, encoding="latin1")
+    except pickle.UnpicklingError:
+        import joblib
+        return joblib.load(path)
+
+
+def _encoder_classes(encoder) -> List:
+    """Class list of a fitted LabelEncoder or single-column OrdinalEncoder"""
+    if hasattr(encoder, "classes_"):
+        return list(encoder.classes_)
+    return list(encoder.categories_[0])
+
+
+def load_legacy_species_encoder(path: Union[str, Path]) -> CategoryEncoder:
+    """
+    Load a pickled sklearn species encoder as a CategoryEncoder
+
+    The pickles hold a LabelEncoder or a single-column OrdinalEncoder; the
+    latter wants a 2-D input, so callers get the same 1-D ``transform`` the
+    bundle path provides. An OrdinalEncoder fitted with
+    ``handle_unknown='use_encoded_value'`` keeps its unknown code.
+    """
+    encoder = load_legacy_pickle(path)
+    unknown_value = None
+    if getattr(encoder, "handle_unknown", None) == "use_encoded_value":
+        unknown_value = int(encoder.unknown_value)
+    return CategoryEncoder((str(c) for c in _encoder_classes(encoder)), unknown_value=unknown_value)
+
+
+def load_legacy_medians(path: Union[str, Path]) -> Dict[str, float]:
+    """Load pickled training medians (a pandas Series or dict) as a plain dict"""
+    return {str(k): float(v) for k, v in dict(load_legacy_pickle(path)).items()}
+
+
+async def verify_bundle_registry(bundle: ModelBundle) -> Optional[bool]:
+    """
+    Compare a bundle hash with the latest model_registry row for its name
+
+    Returns:
+        True/False for match/mismatch, None if the model is not registered
+    """
+    from app.db.supabase_client import get_model_version
+
+    record = await get_model_version(bundle.name)
+    if not record:
+        logger.warning(f"⚠ Model {bundle.name} is not registered in model_registry")
+        return None
+    if record.get("hash") != bundle.bundle_hash:
+        logger.error(
+            f"❌ Model {bundle.name} hash {bundle.bundle_hash} does not match "
+            f"registry version {record.get('version')} ({record.get('hash')})"
+        )
+        return False
+    return True
+
+
+# ==================== EXPORT / BENCHMARK CLI ====================
+
+def export_biomass_bundle(models_dir: Path, out_dir: Path, version: str) -> Path:
+    """Convert the legacy biomass pickles into a bundle"""
+    encoder = load_legacy_species_encoder(models_dir / "species_encoder.pkl")
+    medians = load_legacy_medians(models_dir / "training_medians.pkl")
+    return write_bundle(
+        out_dir,
+        name="biomass_regression",
+        version=version,
+        files={"booster": models_dir / "xgb_biomass_booster.json"},
+        params={
+            "species_classes": [str(c) for c in encoder.classes_],
+            "training_medians": medians,
+        },
+    )
+
+
+def export_mangrove_bundle(model_path: Path, out_dir: Path, version: str) -> Path:
+    """Convert a pickled linear sklearn classifier into a bundle"""
+    model = load_legacy_pickle(model_path)
+    if not hasattr(model, "coef_"):
+        raise ModelBundleError(f"{type(model).__name__} is not a linear classifier; cannot export as arrays")
+    return write_bundle(
+        out_dir,
+        name="mangrove_verification",
+        version=version,
+        arrays={"coef": model.coef_, "intercept": model.intercept_},
+        params={"classes": [c.item() if hasattr(c, "item") else c for c in model.classes_]},
+    )
+
+
+def _benchmark(models_dir: Path, repeat: int) -> Dict:
+    """Time legacy pickle loading against bundle loading"""
+    results = {}
+
+    def timed(fn):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        return {"min_ms": min(samples) * 1000.0, "mean_ms": sum(samples) / len(samples) * 1000.0}
+
+    legacy = [models_dir / "species_encoder.pkl", models_dir / "training_medians.pkl"]
+    if all(p.exists() for p in legacy):
+        results["legacy_pickles"] = timed(lambda: [load_legacy_pickle(p) for p in legacy])
+
+    bundle_paths = [p for p in (find_bundle(models_dir, "biomass"), find_bundle(models_dir, "mangrove")) if p]
+    if bundle_paths:
+        results["bundles_verified"] = timed(lambda: load_bundles(bundle_paths))
+        results["bundles_unverified"] = timed(lambda: load_bundles(bundle_paths, verify=False))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model bundle tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_bio = sub.add_parser("export-biomass", help="Convert legacy biomass pickles into a bundle")
+    p_bio.add_argument("--models-dir", default="./models")
+    p_bio.add_argument("--version", default="v2.1.0")
+
+    p_man = sub.add_parser("export-mangrove", help="Convert a pickled linear classifier into a bundle")
+    p_man.add_argument("--model-path", default="./models/mangrove_verification.pkl")
+    p_man.add_argument("--models-dir", default="./models")
+    p_man.add_argument("--version", default="v1.0.3")
+
+    p_bench = sub.add_parser("bench", help="Compare legacy and bundle load times")
+    p_bench.add_argument("--models-dir", default="./models")
+    p_bench.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "export-biomass":
+        models_dir = Path(args.models_dir)
+        print(export_biomass_bundle(models_dir, models_dir / "biomass", args.version))
+    elif args.command == "export-mangrove":
+        print(export_mangrove_bundle(Path(args.model_path), Path(args.models_dir) / "mangrove", args.version))
+    else:
+        print(json.dumps(_benchmark(Path(args.models_dir), args.repeat), indent=2))
@@ -0,0 +1,430 @@
+"""
+Project Spatial Index
+In-memory grid index over project coordinates for bbox and k-nearest queries
+
+Coordinates live in NumPy arrays sorted by grid cell (cell_degrees squares,
+row-major), so a bounding box resolves to one contiguous slice per grid row
+and nearest-neighbour search expands ring by ring around the query cell.
+New and updated projects go to a small delta buffer that every query scans;
+the arrays are rebuilt once the delta grows past a fraction of the index.
+
+Changes are polled by (updated_at, id) with a lookback window, since a
+transaction that commits late can carry an updated_at older than rows already
+seen. Polling cannot see deletes: a deleted project stays searchable until
+the next full reload (SPATIAL_INDEX_RELOAD_SECONDS).
+"""
+
+import asyncio
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+INDEX_COLUMNS = "id,name,region,latitude,longitude,updated_at"
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to many, in km"""
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons - lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class ProjectSpatialIndex:
+    """Grid-bucketed NumPy index of project points"""
+
+    def __init__(self, cell_degrees: float = 0.5, rebuild_fraction: float = 0.05):
+        self.cell_degrees = cell_degrees
+        self.rebuild_fraction = rebuild_fraction
+        self.n_rows = int(math.ceil(180.0 / cell_degrees))
+        self.n_cols = int(math.ceil(360.0 / cell_degrees))
+        self._lock = threading.RLock()
+        self._meta: Dict[str, Dict] = {}          # id → {name, region}
+        self._clear_arrays()
+        self._delta: Dict[str, Tuple[float, float]] = {}
+        self.watermark: Optional[Tuple[str, str]] = None   # (updated_at, id) of the newest row seen
+        self.built_at: Optional[float] = None
+
+    def _clear_arrays(self):
+        self._lats = np.empty(0)
+        self._lons = np.empty(0)
+        self._ids = np.empty(0, dtype=object)
+        self._keys = np.empty(0, dtype=np.int64)
+        self._live = np.empty(0, dtype=bool)
+        self._position: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._meta)
+
+    # ---------- building ----------
+
+    def _cell_keys(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        rows = np.clip(((lats + 90.0) // self.cell_degrees).astype(np.int64), 0, self.n_rows - 1)
+        cols = np.clip(((lons + 180.0) // self.cell_degrees).astype(np.int64), 0, self.n_cols - 1)
+        return rows * self.n_cols + cols
+
+    def build(self, ids: List[str], lats, lons, meta: Optional[List[Dict]] = None):
+        """Replace the index contents with these points"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        ids = np.asarray(ids, dtype=object)
+        keys = self._cell_keys(lats, lons)
+        order = np.argsort(keys, kind="stable")
+        with self._lock:
+            self._lats, self._lons, self._ids, self._keys = lats[order], lons[order], ids[order], keys[order]
+            self._live = np.ones(len(order), dtype=bool)
+            self._position = {pid: i for i, pid in enumerate(self._ids.tolist())}
+            self._delta = {}
+            if meta is not None:
+                self._meta = {pid: m for pid, m in zip(ids.tolist(), meta)}
+            self.built_at = time.time()
+
+    def upsert(self, project: Dict) -> bool:
+        """Add or move one project (visible to queries immediately); False if nothing changed"""
+        pid = str(project["id"])
+        point = (float(project["latitude"]), float(project["longitude"]))
+        meta = {"name": project.get("name"), "region": project.get("region")}
+        with self._lock:
+            if self._meta.get(pid) == meta and self._point(pid) == point:
+                return False
+            position = self._position.pop(pid, None)
+            if position is not None:
+                self._live[position] = False
+            self._delta[pid] = point
+            self._meta[pid] = meta
+            if len(self._delta) > max(1024, self.rebuild_fraction * len(self._ids)):
+                self._compact()
+            return True
+
+    def _point(self, pid: str) -> Optional[Tuple[float, float]]:
+        if pid in self._delta:
+            return self._delta[pid]
+        position = self._position.get(pid)
+        if position is None:
+            return None
+        return float(self._lats[position]), float(self._lons[position])
+
+    def _compact(self):
+        """Fold the delta buffer into the sorted arrays"""
+        live = self._live
+        ids = self._ids[live].tolist() + list(self._delta)
+        lats = np.concatenate([self._lats[live], [p[0] for p in self._delta.values()]])
+        lons = np.concatenate([self._lons[live], [p[1] for p in self._delta.values()]])
+        self.build(ids, lats, lons)
+
+    # ---------- queries ----------
+
+    def _row_slices(self, row: int, col_start: int, col_end: int) -> slice:
+        base = row * self.n_cols
+        start = np.searchsorted(self._keys, base + col_start, side="left")
+        stop = np.searchsorted(self._keys, base + col_end, side="right")
+        return slice(start, stop)
+
+    def _candidates(self, row_range: Tuple[int, int], col_ranges: List[Tuple[int, int]]) -> np.ndarray:
+        """Array positions of live points in the given cell rows × column ranges"""
+        parts = [
+            np.arange(s.start, s.stop)
+            for row in range(row_range[0], row_range[1] + 1)
+            for c0, c1 in col_ranges
+            for s in (self._row_slices(row, c0, c1),)
+            if s.stop > s.start
+        ]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        positions = np.concatenate(parts)
+        return positions[self._live[positions]]
+
+    def _col(self, lon: float) -> int:
+        return min(max(int((lon + 180.0) // self.cell_degrees), 0), self.n_cols - 1)
+
+    def _row(self, lat: float) -> int:
+        return min(max(int((lat + 90.0) // self.cell_degrees), 0), self.n_rows - 1)
+
+    def _result(self, pid: str, lat: float, lon: float, distance_km: Optional[float] = None) -> Dict:
+        meta = self._meta.get(pid, {})
+        result = {"id": pid, "name": meta.get("name"), "region": meta.get("region"),
+                  "latitude": lat, "longitude": lon}
+        if distance_km is not None:
+            result["distance_km"] = round(distance_km, 3)
+        return result
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+             limit: Optional[int] = None) -> List[Dict]:
+        """Projects inside a box (min_lon > max_lon means it crosses the antimeridian)"""
+        with self._lock:
+            rows = (self._row(min_lat), self._row(max_lat))
+            if min_lon <= max_lon:
+                cols = [(self._col(min_lon), self._col(max_lon))]
+                in_lon = lambda lons: (lons >= min_lon) & (lons <= max_lon)
+            else:
+                cols = [(self._col(min_lon), self.n_cols - 1), (0, self._col(max_lon))]
+                in_lon = lambda lons: (lons >= min_lon) | (lons <= max_lon)
+
+            positions = self._candidates(rows, cols)
+            lats, lons = self._lats[positions], self._lons[positions]
+            mask = (lats >= min_lat) & (lats <= max_lat) & in_lon(lons)
+            positions = positions[mask]
+            results = [self._result(pid, lat, lon) for pid, lat, lon in
+                       zip(self._ids[positions].tolist(), self._lats[positions].tolist(), self._lons[positions].tolist())]
+            for pid, (lat, lon) in self._delta.items():
+                if min_lat <= lat <= max_lat and ((min_lon <= lon <= max_lon) if min_lon <= max_lon
+                                                  else (lon >= min_lon or lon <= max_lon)):
+                    results.append(self._result(pid, lat, lon))
+        return results[:limit] if limit else results
+
+    def nearest(self, lat: float, lon: float, k: int = 10, max_km: Optional[float] = None) -> List[Dict]:
+        """k nearest projects by great-circle distance, optionally within max_km"""
+        with self._lock:
+            n = int(self._live.sum())
+            positions = np.empty(0, dtype=np.int64)
+            row, col = self._row(lat), self._col(lon)
+            ring = 0
+            while True:
+                r0, r1 = max(row - ring, 0), min(row + ring, self.n_rows - 1)
+                if 2 * ring + 1 >= self.n_cols:
+                    cols = [(0, self.n_cols - 1)]
+                else:
+                    c0, c1 = (col - ring) % self.n_cols, (col + ring) % self.n_cols
+                    cols = [(c0, c1)] if c0 <= c1 else [(c0, self.n_cols - 1), (0, c1)]
+                positions = self._candidates((r0, r1), cols)
+
+                # Every point within `covered_km` of the query is inside this square
+                edge_lat = min(abs(lat) + (ring + 1) * self.cell_degrees, 90.0)
+                covered_km = ring * self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(edge_lat))
+                whole_grid = r0 == 0 and r1 == self.n_rows - 1 and cols == [(0, self.n_cols - 1)]
+                if whole_grid or len(positions) >= n:
+                    break
+                if len(positions) >= k:
+                    dist = haversine_km(lat, lon, self._lats[positions], self._lons[positions])
+                    kth = np.partition(dist, k - 1)[k - 1]
+                    if kth <= covered_km:
+                        break
+                if max_km is not None and covered_km >= max_km:
+                    break
+                ring = ring + 1 if ring < 4 else ring * 2
+
+            ids = self._ids[positions].tolist()
+            lats = self._lats[positions]
+            lons = self._lons[positions]
+            if self._delta:
+                ids += list(self._delta)
+                lats = np.concatenate([lats, [p[0] for p in self._delta.values()]])
+                lons = np.concatenate([lons, [p[1] for p in self._delta.values()]])
+            if not ids:
+                return []
+            dist = haversine_km(lat, lon, lats, lons)
+            if max_km is not None:
+                keep = np.nonzero(dist <= max_km)[0]
+            else:
+                keep = np.arange(len(dist))
+            if len(keep) > k:
+                keep = keep[np.argpartition(dist[keep], k - 1)[:k]]
+            keep = keep[np.argsort(dist[keep])]
+            return [self._result(ids[i], float(lats[i]), float(lons[i]), float(dist[i])) for i in keep]
+
+    def stats(self) -> Dict:
+        return {
+            "projects": len(self),
+            "delta": len(self._delta),
+            "cell_degrees": self.cell_degrees,
+            "built_at": self.built_at,
+            "watermark": self.watermark,
+        }
+
+
+# ==================== Loading ====================
+
+def _fetch_page(after: Optional[Tuple[str, str]], limit: int) -> List[Dict]:
+    from app.db.supabase_client import get_supabase_client
+    query = get_supabase_client().table("projects").select(INDEX_COLUMNS)
+    updated_at, project_id = after or (None, None)
+    if updated_at is not None and not project_id:
+        # Lookback start: a timestamp bound only
+        query = query.gte("updated_at", updated_at)
+    elif updated_at is not None:
+        query = query.or_(
+            f'updated_at.gt."{updated_at}",'
+            f'and(updated_at.eq."{updated_at}",id.gt.{project_id})'
+        )
+    return query.order("updated_at").order("id").limit(limit).execute().data
+
+
+def load_from_supabase(index: ProjectSpatialIndex, page_size: int = 1000) -> int:
+    """Full load, keyset-paged by (updated_at, id); runs in a worker thread"""
+    ids, lats, lons, meta = [], [], [], []
+    after = None
+    while True:
+        rows = _fetch_page(after, page_size)
+        for row in rows:
+            ids.append(str(row["id"]))
+            lats.append(row["latitude"])
+            lons.append(row["longitude"])
+            meta.append({"name": row.get("name"), "region": row.get("region")})
+        if rows:
+            after = (rows[-1]["updated_at"], str(rows[-1]["id"]))
+        if len(rows) < page_size:
+            break
+    index.build(ids, lats, lons, meta)
+    index.watermark = after
+    return len(ids)
+
+
+def _lookback_start(watermark: Optional[Tuple[str, str]], seconds: float) -> Optional[Tuple[str, str]]:
+    if watermark is None or seconds <= 0:
+        return watermark
+    start = datetime.fromisoformat(watermark[0]) - timedelta(seconds=seconds)
+    return start.isoformat(), ""
+
+
+def refresh_from_supabase(index: ProjectSpatialIndex, page_size: int = 1000,
+                          lookback_seconds: Optional[float] = None) -> int:
+    """
+    Apply rows created or updated since the watermark, minus the lookback window
+
+    Rows re-read from the window are upserted again, which is a no-op when
+    they are unchanged. Deleted rows are not detected (see the module docstring).
+
+    Returns:
+        Number of projects added or changed
+    """
+    if lookback_seconds is None:
+        lookback_seconds = settings.SPATIAL_INDEX_LOOKBACK_SECONDS
+    changed = 0
+    after = _lookback_start(index.watermark, lookback_seconds)
+    while True:
+        rows = _fetch_page(after, page_size)
+        for row in rows:
+            changed += index.upsert(row)
+        if rows:
+            after = (rows[-1]["updated_at"], str(rows[-1]["id"]))
+            if index.watermark is None or _mark_key(after) > _mark_key(index.watermark):
+                index.watermark = after
+        if len(rows) < page_size:
+            return changed
+
+
+def _mark_key(mark: Tuple[str, str]) -> Tuple[datetime, str]:
+    return datetime.fromisoformat(mark[0]), mark[1]
+
+
+# Singleton index
+_index: Optional[ProjectSpatialIndex] = None
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def get_spatial_index() -> ProjectSpatialIndex:
+    """Get singleton spatial index"""
+    global _index
+    if _index is None:
+        _index = ProjectSpatialIndex(settings.SPATIAL_INDEX_CELL_DEGREES)
+    return _index
+
+
+async def start_spatial_index():
+    """Load the index in the background, then poll for project changes"""
+    global _refresh_task
+    _refresh_task = asyncio.create_task(_maintain(get_spatial_index()))
+
+
+async def stop_spatial_index():
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+
+
+async def _maintain(index: ProjectSpatialIndex):
+    try:
+        start = time.perf_counter()
+        count = await asyncio.to_thread(load_from_supabase, index)
+        logger.info(f"✅ Spatial index loaded {count} projects in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        logger.error(f"❌ Spatial index load failed: {e}")
+        return
+    loaded_at = time.monotonic()
+    while True:
+        await asyncio.sleep(settings.SPATIAL_INDEX_REFRESH_SECONDS)
+        reload_seconds = settings.SPATIAL_INDEX_RELOAD_SECONDS
+        if reload_seconds > 0 and time.monotonic() - loaded_at >= reload_seconds:
+            # Full reload: the only way deleted projects leave the index
+            loaded_at = time.monotonic()
+            try:
+                start = time.perf_counter()
+                count = await asyncio.to_thread(load_from_supabase, index)
+                logger.info(f"Spatial index reloaded {count} projects in {time.perf_counter() - start:.2f}s")
+            except Exception as e:
+                logger.warning(f"⚠️ Spatial index reload failed: {e}")
+            continue
+        try:
+            changed = await asyncio.to_thread(refresh_from_supabase, index)
+            if changed:
+                logger.info(f"Spatial index applied {changed} project change(s)")
+        except Exception as e:
+            logger.warning(f"⚠️ Spatial index refresh failed: {e}")
+
+
+# ==================== Benchmark ====================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Spatial index benchmark")
+    parser.add_argument("--projects", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.projects
+    # Mangrove-like distribution: tropical/subtropical coastal belt
+    lats = np.clip(rng.normal(0, 15, n), -38, 32)
+    lons = rng.uniform(-180, 180, n)
+    ids = [f"p{i}" for i in range(n)]
+
+    index = ProjectSpatialIndex()
+    start = time.perf_counter()
+    index.build(ids, lats, lons, [{"name": None, "region": None}] * n)
+    print(f"{n:,} projects: build {time.perf_counter() - start:.2f}s")
+
+    qlat = rng.uniform(-30, 30, args.queries)
+    qlon = rng.uniform(-180, 180, args.queries)
+
+    def timed(label, fn, check=None):
+        start = time.perf_counter()
+        results = [fn(a, b) for a, b in zip(qlat, qlon)]
+        per = (time.perf_counter() - start) / args.queries * 1e3
+        hits = sum(len(r) for r in results) / args.queries
+        print(f"  {label:<28}: {per:7.3f} ms/query (avg {hits:,.1f} results)")
+        return results
+
+    timed("bbox 1°x1°", lambda a, b: index.bbox(a, b, a + 1, b + 1))
+    timed("bbox 5°x5°", lambda a, b: index.bbox(a, b, a + 5, b + 5))
+    knn = timed("nearest k=10", lambda a, b: index.nearest(a, b, 10))
+
+    start = time.perf_counter()
+    for a, b in zip(qlat[:50], qlon[:50]):
+        dist = haversine_km(a, b, lats, lons)
+        np.argpartition(dist, 9)[:10]
+    print(f"  {'brute-force k=10 (baseline)':<28}: {(time.perf_counter() - start) / 50 * 1e3:7.3f} ms/query")
+
+    exact = all(
+        sorted(r["id"] for r in knn[i])
+        == sorted(np.array(ids, dtype=object)[np.argsort(haversine_km(qlat[i], qlon[i], lats, lons))[:10]].tolist())
+        for i in range(20)
+    )
+    print(f"  nearest matches brute force on 20 samples: {exact}")
+
+    start = time.perf_counter()
+    for i in range(60_000):
+        index.upsert({"id": f"new{i}", "latitude": float(qlat[i % args.queries]), "longitude": float(qlon[i % args.queries])})
+    print(f"  60,000 upserts (incl. compaction): {time.perf_counter() - start:.2f}s")
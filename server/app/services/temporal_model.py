@@ -3,15 +3,17 @@ Temporal Change Detection Model Service
 Detects growth and changes between time-series images
 """
 
+import asyncio
+import time
 import numpy as np
 import cv2
 from PIL import Image
 from pathlib import Path
 from typing import Dict, Optional, Tuple
-import logging
 from app.utils.config import settings
+from app.utils.log import get_logger
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 
 class TemporalChangeDetectionModel:
@@ -21,10 +23,17 @@ class TemporalChangeDetectionModel:
         self.model = None
         self.model_version = "v1.2.0"
         self.growth_threshold = settings.TEMPORAL_GROWTH_THRESHOLD
+        self.load_seconds = None
         self.initialized = False
     
     async def initialize(self):
-        """Load model from disk"""
+        """Load model from disk in a worker thread so the event loop stays free"""
+        start = time.perf_counter()
+        await asyncio.to_thread(self.load)
+        self.load_seconds = time.perf_counter() - start
+    
+    def load(self):
+        """Blocking model load"""
         try:
             model_path = Path(settings.TEMPORAL_MODEL_PATH)
             
@@ -63,7 +72,7 @@ class TemporalChangeDetectionModel:
             
             return gray
         except Exception as e:
-            logger.error(f"Error preprocessing image: {e}")
+            logger.error("Error preprocessing image: %s", e)
             raise
     
     def calculate_vegetation_metrics(self, image: np.ndarray) -> Dict:
@@ -161,11 +170,14 @@ class TemporalChangeDetectionModel:
                 }
             }
             
-            logger.info(f"Temporal comparison: growth_detected={growth_detected}, score={growth_score:.3f}")
+            logger.info(
+                "Temporal comparison: growth_detected=%s, score=%.3f", growth_detected, growth_score,
+                sample_every=settings.LOG_SAMPLE_EVERY
+            )
             return result
             
         except Exception as e:
-            logger.error(f"Error in temporal comparison: {e}")
+            logger.error("Error in temporal comparison: %s", e)
             raise
 
 
@@ -0,0 +1,135 @@
+"""
+In-process response cache
+Small TTL cache with an LRU bound for short-lived API responses, and a
+read-through variant that coalesces concurrent loads of the same key
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Thread-safe TTL cache bounded by entry count
+
+    Entries expire ttl_seconds after they are set; when max_entries is
+    reached the least recently used entry is evicted.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class ReadThroughCache(TTLCache):
+    """
+    TTL cache that loads misses itself and coalesces concurrent loads
+
+    Callers awaiting a key that is already being loaded share that load
+    instead of issuing their own. None results are not cached. Must be used
+    from a single event loop.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        super().__init__(ttl_seconds, max_entries)
+        self._loading: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        task = self._loading.get(key)
+        if task is None:
+            # The load runs as its own task so a cancelled caller (client
+            # disconnect) doesn't fail everyone coalesced onto it
+            task = asyncio.ensure_future(self._load(key, loader))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._loading[key] = task
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        task = asyncio.current_task()
+        try:
+            value = await loader()
+        finally:
+            # An invalidate() during the load drops this task: the value may
+            # predate the write, so hand it to waiters but don't cache it
+            current = self._loading.get(key) is task
+            if current:
+                del self._loading[key]
+        if current and value is not None:
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable):
+        super().invalidate(key)
+        self._loading.pop(key, None)
+
+    def clear(self):
+        super().clear()
+        self._loading.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["coalesced"] = self.coalesced
+        stats["loading"] = len(self._loading)
+        return stats
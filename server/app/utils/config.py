@@ -23,11 +23,19 @@ class Settings(BaseSettings):
     MANGROVE_MODEL_PATH: str = os.getenv("MANGROVE_MODEL_PATH", "./models/mangrove_verification.pkl")
     BIOMASS_MODEL_PATH: str = os.getenv("BIOMASS_MODEL_PATH", "./models/xgb_biomass_booster.json")
     TEMPORAL_MODEL_PATH: str = os.getenv("TEMPORAL_MODEL_PATH", "./models/temporal_change.pkl")
+    # Check model bundle hashes against the model_registry table on load; a mismatch fails readiness
+    VERIFY_MODEL_REGISTRY: bool = os.getenv("VERIFY_MODEL_REGISTRY", "false").lower() == "true"
     
     # ML Thresholds
     MANGROVE_THRESHOLD: float = 0.7  # Minimum probability for mangrove verification
     TEMPORAL_GROWTH_THRESHOLD: float = 0.1  # Minimum growth score to consider positive
     
+    # Load models in the background so the API accepts requests while warming up
+    ML_LAZY_INIT: bool = os.getenv("ML_LAZY_INIT", "false").lower() == "true"
+    
+    # Batch inference
+    MANGROVE_BATCH_WORKERS: int = int(os.getenv("MANGROVE_BATCH_WORKERS", "4"))  # Feature extraction threads
+    
     # Carbon Calculation Constants
     CARBON_FRACTION: float = 0.47  # Fraction of biomass that is carbon
     CO2_EQUIVALENT: float = 3.67  # CO2 equivalent multiplier
@@ -50,6 +58,46 @@ class Settings(BaseSettings):
     PRIVATE_KEY: str = os.getenv("PRIVATE_KEY", "")
     # Legacy alias
     CONTRACT_ADDRESS: str = os.getenv("CONTRACT_ADDRESS", "")
+    # Merkle-batched anchoring: one root per batch of submissions
+    ANCHOR_BATCH_SIZE: int = int(os.getenv("ANCHOR_BATCH_SIZE", "256"))
+    ANCHOR_BATCH_SECONDS: float = float(os.getenv("ANCHOR_BATCH_SECONDS", "60"))
+    MERKLE_HASH_ALGORITHM: str = os.getenv("MERKLE_HASH_ALGORITHM", "keccak256")  # or "sha256"
+    # MerkleTreeUtils contract (registerMerkleRoot); BLOCKCHAIN_RPC_URL=devchain for the in-process stand-in
+    MERKLE_TREE_UTILS_ADDRESS: str = os.getenv("MERKLE_TREE_UTILS_ADDRESS", "")
+    # Sender for eth_sendTransaction when no PRIVATE_KEY signer is available (default: first node account)
+    ANCHOR_FROM_ADDRESS: str = os.getenv("ANCHOR_FROM_ADDRESS", "")
+    ANCHOR_CONFIRMATIONS: int = int(os.getenv("ANCHOR_CONFIRMATIONS", "1"))
+    ANCHOR_MAX_RETRIES: int = int(os.getenv("ANCHOR_MAX_RETRIES", "5"))
+    ANCHOR_POLL_SECONDS: float = float(os.getenv("ANCHOR_POLL_SECONDS", "2"))
+    
+    # Projects listing (keyset pages, short-lived response cache)
+    PROJECTS_PAGE_SIZE: int = int(os.getenv("PROJECTS_PAGE_SIZE", "100"))
+    PROJECTS_MAX_PAGE_SIZE: int = int(os.getenv("PROJECTS_MAX_PAGE_SIZE", "1000"))
+    PROJECTS_CACHE_TTL_SECONDS: float = float(os.getenv("PROJECTS_CACHE_TTL_SECONDS", "5"))
+    # Read-through cache for get_submission / get_latest_verified_submission
+    DB_CACHE_TTL_SECONDS: float = float(os.getenv("DB_CACHE_TTL_SECONDS", "5"))
+    DB_CACHE_MAX_ENTRIES: int = int(os.getenv("DB_CACHE_MAX_ENTRIES", "4096"))
+    # Background pipeline jobs (POST /mrv/process, uploads): parallel runs, status retention
+    JOB_CONCURRENCY: int = int(os.getenv("JOB_CONCURRENCY", "2"))
+    JOB_RETAIN_SECONDS: float = float(os.getenv("JOB_RETAIN_SECONDS", "3600"))
+    # Submission event stream (SSE): per-watcher buffer, keepalive, retained last event
+    EVENT_QUEUE_SIZE: int = int(os.getenv("EVENT_QUEUE_SIZE", "32"))
+    EVENT_HEARTBEAT_SECONDS: float = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+    EVENT_RETAIN_SECONDS: float = float(os.getenv("EVENT_RETAIN_SECONDS", "300"))
+    # Request sampling profiler (/debug/profile); disabled unless PROFILE_TOKEN is set
+    PROFILE_TOKEN: str = os.getenv("PROFILE_TOKEN", "")
+    PROFILE_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+    PROFILE_MAX_PROFILES: int = int(os.getenv("PROFILE_MAX_PROFILES", "200"))
+    # In-memory spatial index behind /projects/search (grid cell size in degrees)
+    SPATIAL_INDEX_CELL_DEGREES: float = float(os.getenv("SPATIAL_INDEX_CELL_DEGREES", "0.5"))
+    SPATIAL_INDEX_REFRESH_SECONDS: float = float(os.getenv("SPATIAL_INDEX_REFRESH_SECONDS", "30"))
+    # Re-read changes this far behind the watermark (late commits); full reload drops deleted projects
+    SPATIAL_INDEX_LOOKBACK_SECONDS: float = float(os.getenv("SPATIAL_INDEX_LOOKBACK_SECONDS", "30"))
+    SPATIAL_INDEX_RELOAD_SECONDS: float = float(os.getenv("SPATIAL_INDEX_RELOAD_SECONDS", "3600"))
+    # Pre-fork server (python -m app.utils.prefork): workers share the parent's preloaded models
+    PREFORK_WORKERS: int = int(os.getenv("PREFORK_WORKERS", "0"))  # 0 = one per available core
+    PREFORK_GRACEFUL_TIMEOUT: float = float(os.getenv("PREFORK_GRACEFUL_TIMEOUT", "30"))
+    PREFORK_MEMORY_REPORT_SECONDS: float = float(os.getenv("PREFORK_MEMORY_REPORT_SECONDS", "0"))
     
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -62,8 +110,12 @@ class Settings(BaseSettings):
     RATE_LIMIT_ENABLED: bool = True
     MAX_UPLOAD_SIZE_MB: int = 100
     
-    # Logging
+    # Logging (records go through a bounded queue; a full queue drops new records)
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text")  # or "json"
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Per-prediction model/carbon INFO logs: keep the first and every Nth
+    LOG_SAMPLE_EVERY: int = int(os.getenv("LOG_SAMPLE_EVERY", "20"))
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,89 @@
+"""
+Keccak-256 (the Ethereum variant, not NIST SHA3-256)
+
+Uses pycryptodome or pysha3 when installed and falls back to a pure-Python
+Keccak-f[1600] permutation otherwise.
+"""
+
+from typing import Callable
+
+_RATE = 136  # bytes absorbed per permutation for a 256-bit output
+_MASK = (1 << 64) - 1
+
+_ROUND_CONSTANTS = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+]
+
+# Rotation offsets indexed [x][y]
+_ROTATIONS = [
+    [0, 36, 3, 41, 18],
+    [1, 44, 10, 45, 2],
+    [62, 6, 43, 15, 61],
+    [28, 55, 25, 21, 56],
+    [27, 20, 39, 8, 14],
+]
+
+
+def _rotl(value: int, shift: int) -> int:
+    return ((value << shift) | (value >> (64 - shift))) & _MASK if shift else value
+
+
+def _keccak_f(lanes: list) -> None:
+    """Keccak-f[1600] permutation over 25 lanes indexed x + 5 * y, in place"""
+    for rc in _ROUND_CONSTANTS:
+        # theta
+        c = [lanes[x] ^ lanes[x + 5] ^ lanes[x + 10] ^ lanes[x + 15] ^ lanes[x + 20] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ _rotl(c[(x + 1) % 5], 1) for x in range(5)]
+        for i in range(25):
+            lanes[i] ^= d[i % 5]
+        # rho + pi
+        b = [0] * 25
+        for x in range(5):
+            for y in range(5):
+                b[y + 5 * ((2 * x + 3 * y) % 5)] = _rotl(lanes[x + 5 * y], _ROTATIONS[x][y])
+        # chi
+        for y in range(0, 25, 5):
+            row = b[y:y + 5]
+            for x in range(5):
+                lanes[y + x] = row[x] ^ ((~row[(x + 1) % 5]) & row[(x + 2) % 5])
+        # iota
+        lanes[0] ^= rc
+
+
+def _keccak256_pure(data: bytes) -> bytes:
+    padded = bytearray(data)
+    padded.append(0x01)
+    padded.extend(b"\x00" * (-len(padded) % _RATE))
+    padded[-1] |= 0x80
+
+    lanes = [0] * 25
+    for offset in range(0, len(padded), _RATE):
+        block = padded[offset:offset + _RATE]
+        for i in range(_RATE // 8):
+            lanes[i] ^= int.from_bytes(block[8 * i:8 * i + 8], "little")
+        _keccak_f(lanes)
+    return b"".join(lane.to_bytes(8, "little") for lane in lanes[:4])
+
+
+def _select_backend() -> Callable[[bytes], bytes]:
+    try:
+        from Crypto.Hash import keccak as _pycryptodome_keccak
+
+        return lambda data: _pycryptodome_keccak.new(digest_bits=256, data=data).digest()
+    except ImportError:
+        pass
+    try:
+        import sha3 as _pysha3
+
+        return lambda data: _pysha3.keccak_256(data).digest()
+    except ImportError:
+        pass
+    return _keccak256_pure
+
+
+keccak256: Callable[[bytes], bytes] = _select_backend()
@@ -0,0 +1,240 @@
+"""
+Structured Logging
+Non-blocking, lazily formatted logging with context fields and sampling
+
+configure_logging() routes every record through a bounded in-memory queue;
+a listener thread formats and writes them, so the calling thread only pays
+for building the LogRecord. Messages use %-style arguments and are formatted
+on the listener thread, and only if a handler keeps the record.
+
+    logger = get_logger(__name__)
+    logger.info("Biomass prediction", biomass=12.3, model_version="v2")
+    logger.info("Mangrove verification", probability=p, sample_every=50)
+
+    with log_context(submission_id=submission_id):
+        ...  # every record logged in here carries submission_id
+
+Keyword arguments other than the stdlib ones become structured fields.
+sample_every=N keeps the first and then every Nth record of a message
+(the record carries sampled=N so counts can be scaled back up).
+"""
+
+import atexit
+import contextlib
+import contextvars
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import time
+from collections.abc import Mapping
+from typing import Any, Dict, Optional
+
+_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("log_context", default={})
+
+_STDLIB_KWARGS = {"exc_info", "stack_info", "stacklevel", "extra"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+
+
+# ==================== Context ====================
+
+def bind_context(**fields) -> contextvars.Token:
+    """Add fields to every record logged from this context; pass the token to reset_context"""
+    return _context.set({**_context.get(), **fields})
+
+
+def reset_context(token: contextvars.Token):
+    _context.reset(token)
+
+
+@contextlib.contextmanager
+def log_context(**fields):
+    token = bind_context(**fields)
+    try:
+        yield
+    finally:
+        reset_context(token)
+
+
+# ==================== Logger ====================
+
+class _Sampler:
+    """Per-message counters for sample_every"""
+
+    def __init__(self):
+        self._counters: Dict[Any, itertools.count] = {}
+
+    def keep(self, key, every: int) -> bool:
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters.setdefault(key, itertools.count())
+        return next(counter) % every == 0
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Logger adapter taking structured fields as keyword arguments"""
+
+    _sampler = _Sampler()
+
+    def __init__(self, logger: logging.Logger):
+        super().__init__(logger, {})
+
+    def log(self, level: int, msg: str, *args, sample_every: int = 0, **kwargs):
+        if not self.logger.isEnabledFor(level):
+            return
+        if sample_every > 1:
+            if not self._sampler.keep((self.logger.name, msg), sample_every):
+                return
+            kwargs["sampled"] = sample_every
+        fields = {k: kwargs.pop(k) for k in list(kwargs) if k not in _STDLIB_KWARGS}
+        if fields:
+            kwargs["extra"] = {**kwargs.get("extra", {}), "fields": fields}
+        kwargs.setdefault("stacklevel", 3)
+        self.logger.log(level, msg, *args, **kwargs)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(logging.getLogger(name))
+
+
+# ==================== Handlers ====================
+
+_IMMUTABLE_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+def _immutable_args(args) -> bool:
+    values = args.values() if isinstance(args, Mapping) else args
+    return all(isinstance(v, _IMMUTABLE_TYPES) for v in values)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks the caller
+
+    Context fields are captured here, on the logging thread; formatting is
+    left to the listener unless an argument is mutable. When the queue is
+    full the record is dropped and counted.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting later is only safe while the arguments cannot change in
+        # the meantime; anything mutable is formatted now, as the stdlib does
+        if record.args and not _immutable_args(record.args):
+            record = copy.copy(record)
+            record.msg = record.getMessage()
+            record.args = None
+        context = _context.get()
+        if context:
+            record.context = context
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _record_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    fields = dict(getattr(record, "context", None) or {})
+    fields.update(getattr(record, "fields", None) or {})
+    return fields
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **_record_fields(record),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """The existing human-readable format, with fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        fields = _record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+def configure_logging(level: str = "INFO", fmt: str = "text", queue_size: int = 10000):
+    """
+    Install the queue handler on the root logger (idempotent)
+
+    Args:
+        level: Root log level
+        fmt: "text" (existing format + key=value fields) or "json"
+        queue_size: Records buffered before new ones are dropped
+    """
+    global _listener, _queue_handler
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    if _listener is not None:
+        return
+
+    # Record fields no formatter here uses (see "Optimization" in the logging docs)
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """
+    Flush queued records and stop the listener thread
+
+    The root logger then writes through the listener's stream handler
+    directly, so records logged afterwards are not lost; configure_logging()
+    re-arms the queue.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    if _queue_handler is not None:
+        root.removeHandler(_queue_handler)
+    for handler in _listener.handlers:
+        root.addHandler(handler)
+    _listener = None
+    _queue_handler = None
+
+
+def logging_stats() -> Dict[str, Any]:
+    return {
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+    }
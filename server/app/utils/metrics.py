@@ -0,0 +1,338 @@
+"""
+Metrics
+Counters, gauges and histograms with Prometheus text exposition
+
+Children are resolved once per label set and cached, so an observation is
+a bisect plus two additions under a lock (well under 1 µs). Hot paths
+should keep the child returned by labels() rather than resolving it per call.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds: 1 ms … 2 min, covers DB calls through full pipeline runs
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Timer:
+    """Context manager observing elapsed seconds into a histogram child"""
+
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: "_HistogramChild"):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._start
+        child = self._child
+        index = bisect_left(child.bounds, elapsed)
+        with child._lock:
+            child.counts[index] += 1
+            child.sum += elapsed
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ("function",)
+
+    def __init__(self):
+        super().__init__()
+        self.function: Optional[Callable[[], float]] = None
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from function at exposition time"""
+        self.function = function
+
+    def get(self) -> float:
+        return float(self.function()) if self.function is not None else self.value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)     # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class _Metric:
+    """A metric family: one child per label-value tuple"""
+
+    kind = ""
+    child_class = None
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lookup: Dict[tuple, object] = {}          # raw label values → child (fast path)
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        return self.child_class()
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        child = self._lookup.get(values)
+        if child is None:
+            key = tuple(map(str, values))
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+                self._lookup[values] = child
+        return child
+
+    def _label_text(self, key: Tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{self._label_text(key)} {_format_value(child.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    child_class = _CounterChild
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    child_class = _GaugeChild
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+    def _render_child(self, key, child) -> List[str]:
+        try:
+            value = child.get()
+        except Exception:
+            return []
+        return [f"{self.name}{self._label_text(key)} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self, *values) -> _Timer:
+        return _Timer(self.labels(*values) if values else self._default)
+
+    def _render_child(self, key, child) -> List[str]:
+        counts, total = child.snapshot()
+        lines, cumulative = [], 0
+        for bound, count in zip(self.bounds + (float("inf"),), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{self._label_text(key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(key)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{self._label_text(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together on /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class StageClock:
+    """
+    Times consecutive stages of one pipeline run
+
+    Remembers the stage in progress so an error can be attributed to it.
+    """
+
+    __slots__ = ("histogram", "current")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self.current: Optional[str] = None
+
+    def stage(self, name: str) -> _Timer:
+        self.current = name
+        return self.histogram.time(name)
+
+
+def timed(child: _HistogramChild):
+    """Decorator observing the duration of a sync or async function"""
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    child.observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# ==================== MRV metrics ====================
+
+REGISTRY = Registry()
+
+PIPELINE_STAGE_SECONDS = REGISTRY.histogram(
+    "mrv_pipeline_stage_seconds", "Time spent in each MRV pipeline stage", ["stage"])
+MODEL_SECONDS = REGISTRY.histogram(
+    "mrv_model_inference_seconds", "Model inference latency", ["model", "version"])
+DB_SECONDS = REGISTRY.histogram(
+    "mrv_db_call_seconds", "Supabase call latency", ["operation"])
+SUBMISSIONS_TOTAL = REGISTRY.counter(
+    "mrv_submissions_total", "Pipeline runs by outcome", ["outcome"])
+PIPELINE_ERRORS_TOTAL = REGISTRY.counter(
+    "mrv_pipeline_errors_total", "Pipeline failures by the stage that raised", ["stage"])
+SUBMISSIONS_IN_FLIGHT = REGISTRY.gauge(
+    "mrv_submissions_in_flight", "Pipeline runs currently executing")
+
+
+if __name__ == "__main__":
+    n = 1_000_000
+    child = PIPELINE_STAGE_SECONDS.labels("bench")
+    start = time.perf_counter()
+    for i in range(n):
+        child.observe(0.003)
+    per_observe = (time.perf_counter() - start) / n * 1e9
+
+    start = time.perf_counter()
+    for i in range(n):
+        PIPELINE_STAGE_SECONDS.labels("bench").observe(0.003)
+    per_labelled = (time.perf_counter() - start) / n * 1e9
+
+    start = time.perf_counter()
+    for i in range(n):
+        with child.time():
+            pass
+    per_timer = (time.perf_counter() - start) / n * 1e9
+
+    counter = SUBMISSIONS_TOTAL.labels("bench")
+    start = time.perf_counter()
+    for i in range(n):
+        counter.inc()
+    per_inc = (time.perf_counter() - start) / n * 1e9
+
+    print(f"histogram observe (cached child) : {per_observe:6.0f} ns")
+    print(f"histogram labels().observe       : {per_labelled:6.0f} ns")
+    print(f"histogram timer context          : {per_timer:6.0f} ns")
+    print(f"counter inc                      : {per_inc:6.0f} ns")
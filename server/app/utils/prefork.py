@@ -0,0 +1,294 @@
+"""
+Pre-fork Server
+Load the models once, then fork uvicorn workers that share them copy-on-write
+
+    python -m app.utils.prefork app.main:app --port 8000
+    python -m app.utils.prefork biomass_api:app --port 8001 --workers 4
+
+The parent imports the app module and calls its module-level preload() (the
+MRV app loads its ML models, biomass_api its booster, encoder and SHAP
+explainer), collects and freezes the garbage collector (gc.freeze) so
+collections in the workers never write to the shared objects' headers, then
+binds the socket and forks the workers. Each worker runs uvicorn on the
+inherited socket; its lifespan finds the models already loaded. Dead workers
+are replaced; SIGTERM/SIGINT drains them gracefully; SIGUSR1 logs a memory
+table.
+
+Every worker logs its memory right after fork ("before") and once serving
+("after"); PSS (proportional set size) is the honest per-worker number as
+shared pages are split between the processes that map them.
+
+Only the models are shared. Job status, the event bus, the caches and the
+spatial index stay per worker, as with `uvicorn --workers`. Linux/macOS only
+(os.fork).
+"""
+
+import argparse
+import gc
+import importlib
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+from app.utils.config import settings
+from app.utils.log import configure_logging, shutdown_logging
+
+logger = logging.getLogger(__name__)
+
+
+def available_cores() -> int:
+    """Cores this process may run on (respects CPU affinity / cpusets)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def memory_usage(pid: Optional[int] = None) -> Dict[str, float]:
+    """RSS, PSS, shared and private memory of a process in MB (Linux /proc; empty elsewhere)"""
+    fields: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid or 'self'}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                parts = rest.split()
+                if len(parts) == 2 and parts[1] == "kB":
+                    fields[key] = int(parts[0])
+    except OSError:
+        return {}
+
+    def mb(*keys) -> float:
+        return round(sum(fields.get(k, 0) for k in keys) / 1024, 1)
+
+    return {
+        "rss_mb": mb("Rss"),
+        "pss_mb": mb("Pss"),
+        "shared_mb": mb("Shared_Clean", "Shared_Dirty"),
+        "private_mb": mb("Private_Clean", "Private_Dirty"),
+    }
+
+
+def _format_memory(usage: Dict[str, float]) -> str:
+    if not usage:
+        return "memory n/a"
+    return (f"rss={usage['rss_mb']}MB pss={usage['pss_mb']}MB "
+            f"shared={usage['shared_mb']}MB private={usage['private_mb']}MB")
+
+
+def _load_target(target: str):
+    """Import 'module:attribute', returning (module, app)"""
+    module_name, _, attribute = target.partition(":")
+    module = importlib.import_module(module_name)
+    return module, getattr(module, attribute or "app")
+
+
+class PreforkServer:
+    """Supervisor owning the listening socket and the worker processes"""
+
+    def __init__(self, target: str, host: str = "0.0.0.0", port: int = 8000, workers: int = 0,
+                 graceful_timeout: float = 30.0, memory_report_seconds: float = 0.0, backlog: int = 2048):
+        self.target = target
+        self.host = host
+        self.port = port
+        self.workers = workers if workers > 0 else available_cores()
+        self.graceful_timeout = graceful_timeout
+        self.memory_report_seconds = memory_report_seconds
+        self.backlog = backlog
+        self.app = None
+        self.sock: Optional[socket.socket] = None
+        self.children: Dict[int, float] = {}          # pid → fork time
+        self._stopping = False
+        self._report_requested = False
+
+    # ---------- parent ----------
+
+    def preload(self):
+        """Import the app and load its models, then freeze everything allocated so far"""
+        before = memory_usage()
+        # The gc docs' recipe: no collections while loading (no holes in the pages
+        # about to be shared), one collection, then freeze the survivors
+        gc.disable()
+        start = time.perf_counter()
+        try:
+            module, self.app = _load_target(self.target)
+            preload = getattr(module, "preload", None)
+            if preload is not None:
+                preload()
+            else:
+                logger.warning(f"⚠ {self.target} has no preload(); workers will load their own models")
+        finally:
+            # Frozen objects are never collected again; the supervisor itself keeps
+            # allocating (logging, respawns) and needs the collector back on
+            gc.collect()
+            gc.freeze()
+            gc.enable()
+        logger.info(f"✅ Preloaded {self.target} in {time.perf_counter() - start:.2f}s "
+                    f"({gc.get_freeze_count():,} objects frozen)")
+        logger.info(f"Parent memory before preload: {_format_memory(before)}")
+        logger.info(f"Parent memory after preload:  {_format_memory(memory_usage())}")
+
+    def bind(self):
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(self.backlog)
+        self.sock.set_inheritable(True)
+        self.port = self.sock.getsockname()[1]
+
+    def spawn(self) -> int:
+        # The log listener thread would not survive fork(): stop it (flushing
+        # pending records) so the child starts its own, then restart ours
+        shutdown_logging()
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()              # never returns
+        configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT, settings.LOG_QUEUE_SIZE)
+        self.children[pid] = time.monotonic()
+        return pid
+
+    def run(self) -> int:
+        self.preload()
+        self.bind()
+        logger.info(f"🚀 Pre-fork server on {self.host}:{self.port}: {self.workers} worker(s) "
+                    f"({available_cores()} core(s) available)")
+
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGUSR1, self._on_report)
+
+        for _ in range(self.workers):
+            self.spawn()
+
+        next_report = time.monotonic() + self.memory_report_seconds if self.memory_report_seconds > 0 else None
+        while not self._stopping:
+            self._reap(respawn=True)
+            if self._report_requested or (next_report and time.monotonic() >= next_report):
+                self._report_requested = False
+                self.report_memory()
+                if next_report:
+                    next_report = time.monotonic() + self.memory_report_seconds
+            time.sleep(0.2)
+
+        self._shutdown()
+        return 0
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+
+    def _on_report(self, signum, frame):
+        self._report_requested = True
+
+    def _reap(self, respawn: bool):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            started = self.children.pop(pid, None)
+            if started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if respawn and not self._stopping:
+                logger.error(f"❌ Worker {pid} exited ({code}); starting a replacement")
+                if time.monotonic() - started < 5.0:
+                    time.sleep(1.0)         # crashing at startup: don't fork in a tight loop
+                self.spawn()
+
+    def _shutdown(self):
+        logger.info(f"🛑 Stopping {len(self.children)} worker(s)...")
+        for pid in list(self.children):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            self._reap(respawn=False)
+            time.sleep(0.1)
+        for pid in list(self.children):
+            logger.warning(f"⚠ Worker {pid} did not stop in {self.graceful_timeout:.0f}s, killing it")
+            self._signal(pid, signal.SIGKILL)
+        self._reap(respawn=False)
+        if self.sock is not None:
+            self.sock.close()
+        logger.info("✅ Pre-fork server stopped")
+
+    @staticmethod
+    def _signal(pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def report_memory(self) -> Dict[int, Dict[str, float]]:
+        """Log and return memory per worker (and the parent)"""
+        usage = {pid: memory_usage(pid) for pid in sorted(self.children)}
+        logger.info(f"Memory, parent {os.getpid()}: {_format_memory(memory_usage())}")
+        for pid, worker in usage.items():
+            logger.info(f"Memory, worker {pid}: {_format_memory(worker)}")
+        known = [u for u in usage.values() if u]
+        if known:
+            logger.info(f"Memory, {len(known)} worker(s) total: "
+                        f"rss={sum(u['rss_mb'] for u in known):.1f}MB pss={sum(u['pss_mb'] for u in known):.1f}MB")
+        return usage
+
+    # ---------- worker ----------
+
+    def _run_worker(self):
+        import uvicorn
+
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1):
+            signal.signal(signum, signal.SIG_DFL)
+        gc.enable()
+        configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT, settings.LOG_QUEUE_SIZE)
+        logger.info(f"Worker {os.getpid()} memory before startup: {_format_memory(memory_usage())}")
+
+        class WorkerServer(uvicorn.Server):
+            async def startup(self, sockets=None):
+                await super().startup(sockets=sockets)
+                if not self.should_exit:
+                    logger.info(f"Worker {os.getpid()} memory after startup: {_format_memory(memory_usage())}")
+
+        config = uvicorn.Config(self.app, lifespan="on", log_config=None)
+        code = 0
+        try:
+            WorkerServer(config).run(sockets=[self.sock])
+        except BaseException as e:
+            logger.error(f"❌ Worker {os.getpid()} failed: {e}")
+            code = 1
+        finally:
+            shutdown_logging()
+            os._exit(code)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-fork server: load models once, fork uvicorn workers")
+    parser.add_argument("target", help="App as module:attribute, e.g. app.main:app or biomass_api:app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.PREFORK_WORKERS,
+                        help="Worker processes (0 = one per available core)")
+    parser.add_argument("--graceful-timeout", type=float, default=settings.PREFORK_GRACEFUL_TIMEOUT)
+    parser.add_argument("--memory-report-seconds", type=float, default=settings.PREFORK_MEMORY_REPORT_SECONDS,
+                        help="Log per-worker memory this often (0 = only on SIGUSR1)")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        print("Pre-fork mode needs os.fork(); run uvicorn directly on this platform", file=sys.stderr)
+        return 2
+    configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT, settings.LOG_QUEUE_SIZE)
+    server = PreforkServer(args.target, args.host, args.port, args.workers,
+                           args.graceful_timeout, args.memory_report_seconds)
+    try:
+        return server.run()
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Request Sampling Profiler
+Opt-in statistical profiling of live requests, exported as collapsed stacks
+
+A request is profiled when it carries `X-Profile-Token: <PROFILE_TOKEN>`, or
+while the profiler is armed for the next N requests / T seconds through
+/debug/profile/start. While at least one profiled request is in flight a
+daemon thread samples every thread's Python stack (sys._current_frames) and
+charges each sample to the request whose middleware frame is on the stack;
+worker-thread samples (asyncio.to_thread, threadpool endpoints) are charged
+to the request when it is the only one being profiled. Profiles are kept as
+collapsed stacks ("frame;frame;frame count"), the input format of
+flamegraph.pl and speedscope.
+
+When nothing is armed the middleware costs one attribute check plus a
+header scan when PROFILE_TOKEN is set; no thread runs.
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Deque, Dict, List, Optional
+import logging
+
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile-token"
+
+# Leaf frames of idle pool threads (waiting for work, not doing any)
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("selectors.py", "select"),
+}
+
+
+class RequestProfile:
+    """Samples collected for one request"""
+
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.reason = reason                 # "header" or "armed"
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.status: Optional[int] = None
+        self.stacks: collections.Counter = collections.Counter()
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        stacks = collections.Counter(dict(self.stacks))
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "duration_seconds": self.duration,
+            "status": self.status,
+            "samples": self.samples,
+        }
+
+
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Arms, samples and stores request profiles"""
+
+    def __init__(self, interval_ms: float = 5.0, max_profiles: int = 200):
+        self.interval = interval_ms / 1000.0
+        self.armed = False
+        self._armed_requests = 0
+        self._armed_until = 0.0
+        self._active: Dict[object, RequestProfile] = {}     # middleware frame → profile
+        self._loop_threads: set = set()                     # threads running the middleware itself
+        self._profiles: Deque[RequestProfile] = collections.deque(maxlen=max_profiles)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.samples_taken = 0
+
+    # ---------- arming ----------
+
+    def arm(self, requests: int = 0, seconds: float = 0.0):
+        """Profile the next `requests` requests and/or every request for `seconds`"""
+        with self._lock:
+            self._armed_requests = max(0, requests)
+            self._armed_until = time.monotonic() + seconds if seconds > 0 else 0.0
+            self.armed = self._armed_requests > 0 or self._armed_until > 0
+        logger.info(f"Profiler armed: requests={requests}, seconds={seconds}")
+
+    def disarm(self):
+        with self._lock:
+            self._armed_requests = 0
+            self._armed_until = 0.0
+            self.armed = False
+
+    def _claim_armed(self) -> bool:
+        """Whether this request is covered by the armed window (consumes one request slot)"""
+        with self._lock:
+            if self._armed_until and time.monotonic() < self._armed_until:
+                return True
+            self._armed_until = 0.0
+            if self._armed_requests > 0:
+                self._armed_requests -= 1
+                self.armed = self._armed_requests > 0
+                return True
+            self.armed = False
+            return False
+
+    # ---------- request lifecycle ----------
+
+    def begin(self, frame, method: str, path: str, reason: str) -> RequestProfile:
+        profile = RequestProfile(method, path, reason)
+        with self._lock:
+            self._active[frame] = profile
+            self._loop_threads.add(threading.get_ident())
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+                self._thread.start()
+        return profile
+
+    def end(self, frame, profile: RequestProfile):
+        profile.duration = time.time() - profile.started_at
+        with self._lock:
+            self._active.pop(frame, None)
+            self._profiles.append(profile)
+
+    # ---------- sampling ----------
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                active = dict(self._active)
+                loop_threads = set(self._loop_threads)
+            sole = next(iter(active.values())) if len(active) == 1 else None
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                    continue
+                stack: List[str] = []
+                owner = None
+                while frame is not None:
+                    if owner is None:
+                        owner = active.get(frame)
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if owner is None:
+                    # The event loop running some other task is not this request's time
+                    if ident in loop_threads or sole is None:
+                        continue
+                    owner = sole
+                stack.reverse()
+                owner.stacks[";".join(stack)] += 1
+                self.samples_taken += 1
+
+    # ---------- export ----------
+
+    def profiles(self) -> List[RequestProfile]:
+        with self._lock:
+            return list(self._profiles)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return next((p for p in self.profiles() if p.id == profile_id), None)
+
+    def collapsed(self, path: Optional[str] = None) -> str:
+        """Collapsed stacks summed over retained profiles, each rooted at its route"""
+        merged: collections.Counter = collections.Counter()
+        for profile in self.profiles():
+            if path and profile.path != path:
+                continue
+            root = f"{profile.method} {profile.path}"
+            for stack, count in dict(profile.stacks).items():
+                merged[f"{root};{stack}"] += count
+        return "".join(f"{stack} {count}\n" for stack, count in merged.most_common())
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": bool(settings.PROFILE_TOKEN),
+            "armed": self.armed,
+            "armed_requests": self._armed_requests,
+            "armed_seconds_left": max(0.0, self._armed_until - time.monotonic()) if self._armed_until else 0.0,
+            "in_flight": len(self._active),
+            "profiles": len(self._profiles),
+            "samples_taken": self.samples_taken,
+            "interval_ms": self.interval * 1000,
+        }
+
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware deciding per request whether to profile it"""
+
+    def __init__(self, app, profiler: Optional["SamplingProfiler"] = None):
+        self.app = app
+        self.profiler = profiler or get_profiler()
+        self.token = settings.PROFILE_TOKEN.encode() if settings.PROFILE_TOKEN else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.token is None or scope["path"].startswith("/debug/"):
+            return await self.app(scope, receive, send)
+
+        reason = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                reason = "header" if value == self.token else None
+                break
+        if reason is None and self.profiler.armed:
+            reason = "armed" if self.profiler._claim_armed() else None
+        if reason is None:
+            return await self.app(scope, receive, send)
+
+        frame = sys._getframe()
+        profile = self.profiler.begin(frame, scope["method"], scope["path"], reason)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            self.profiler.end(frame, profile)
+
+
+# Singleton profiler
+_profiler: Optional[SamplingProfiler] = None
+
+
+def get_profiler() -> SamplingProfiler:
+    """Get singleton profiler"""
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler(settings.PROFILE_SAMPLE_INTERVAL_MS, settings.PROFILE_MAX_PROFILES)
+    return _profiler
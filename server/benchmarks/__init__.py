@@ -0,0 +1,8 @@
+"""
+Benchmark suite for the MRV backend
+
+fake_supabase  in-memory PostgREST + Storage server
+synthetic      seeded images and band rasters
+scenarios      upload → verified, /predict-biomass, bulk reprocessing, ledger append
+run            CLI: JSON throughput and p50/p95/p99 latency, baseline regression gate
+"""
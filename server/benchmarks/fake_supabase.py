@@ -0,0 +1,400 @@
+"""
+Fake Supabase
+In-memory PostgREST + Storage subset served over real HTTP for benchmarks
+
+Covers what the backend actually sends through supabase-py:
+
+    GET    /rest/v1/{table}?select=&col=op.value&or=(...)&order=&limit=&offset=
+    POST   /rest/v1/{table}                  insert (object or list), returns rows
+    PATCH  /rest/v1/{table}?col=op.value     update matching rows, returns rows
+    DELETE /rest/v1/{table}?col=op.value
+    POST   /storage/v1/object/{bucket}/{path}          upload (multipart or raw)
+    GET    /storage/v1/object/public/{bucket}/{path}   public download
+    GET    /storage/v1/object/{bucket}/{path}          authenticated download
+
+Operators: eq, neq, gt, gte, lt, lte, in, is, plus or=(...) with nested and(...).
+Inserted rows get an id and created_at/updated_at when missing. latency_ms adds
+a fixed delay per request to stand in for the network round trip.
+
+    with FakeSupabase(latency_ms=2) as fake:
+        os.environ["SUPABASE_URL"] = fake.url
+        ...
+
+    python -m benchmarks.fake_supabase --port 54321
+"""
+
+import argparse
+import email.parser
+import email.policy
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+# Any three dot-separated segments pass supabase-py's key check
+SERVICE_KEY = "bench.service.key"
+
+
+# ==================== Filters ====================
+
+def _split_top(expr: str) -> List[str]:
+    """Split on commas outside parentheses and double quotes"""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, ch in enumerate(expr):
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append(expr[start:i])
+            start = i + 1
+    parts.append(expr[start:])
+    return [p for p in parts if p]
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _coerce(value: str, like: Any) -> Any:
+    """Parse a filter operand to the type of the stored value"""
+    if isinstance(like, bool):
+        return value.lower() == "true"
+    if isinstance(like, (int, float)):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _compare(row_value: Any, op: str, operand: str) -> bool:
+    if op == "is":
+        target = {"null": None, "true": True, "false": False}.get(operand.lower(), operand)
+        return row_value is target
+    if op == "in":
+        options = [_unquote(v) for v in _split_top(operand.strip("()"))]
+        return row_value is not None and str(row_value) in options
+    if row_value is None:
+        return op == "neq"
+    value = _coerce(_unquote(operand), row_value)
+    if isinstance(value, str):
+        row_value = str(row_value)
+    try:
+        return {
+            "eq": row_value == value,
+            "neq": row_value != value,
+            "gt": row_value > value,
+            "gte": row_value >= value,
+            "lt": row_value < value,
+            "lte": row_value <= value,
+        }[op]
+    except (KeyError, TypeError):
+        return False
+
+
+def _condition(column: str, expr: str):
+    op, _, operand = expr.partition(".")
+    negate = op == "not"
+    if negate:
+        op, _, operand = operand.partition(".")
+    return lambda row: _compare(row.get(column), op, operand) != negate
+
+
+def _logic(expr: str, conjunction: bool):
+    """Predicate for the body of or=(...) / and(...)"""
+    predicates = []
+    for part in _split_top(expr):
+        if part.startswith(("and(", "or(")):
+            name, _, body = part.partition("(")
+            predicates.append(_logic(body[:-1], name == "and"))
+        else:
+            column, _, rest = part.partition(".")
+            predicates.append(_condition(column, rest))
+    combine = all if conjunction else any
+    return lambda row: combine(p(row) for p in predicates)
+
+
+class _Query:
+    """Parsed PostgREST query string"""
+
+    _RESERVED = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+    def __init__(self, query: str):
+        self.select: Optional[List[str]] = None
+        self.order: List[Tuple[str, bool]] = []
+        self.limit: Optional[int] = None
+        self.offset = 0
+        self.predicates = []
+        for key, value in parse_qsl(query, keep_blank_values=True):
+            if key == "select":
+                self.select = None if value in ("", "*") else [c.strip() for c in value.split(",")]
+            elif key == "order":
+                for term in value.split(","):
+                    column, *mods = term.split(".")
+                    self.order.append((column, "desc" in mods))
+            elif key == "limit":
+                self.limit = int(value)
+            elif key == "offset":
+                self.offset = int(value)
+            elif key in ("or", "and"):
+                self.predicates.append(_logic(value.strip()[1:-1], key == "and"))
+            elif key not in self._RESERVED:
+                self.predicates.append(_condition(key, value))
+
+    def matches(self, row: Dict) -> bool:
+        return all(p(row) for p in self.predicates)
+
+    def apply(self, rows: List[Dict]) -> List[Dict]:
+        out = [r for r in rows if self.matches(r)]
+        # Stable sorts from the last key to the first; NULLs sort last like Postgres
+        for column, desc in reversed(self.order):
+            present = [r for r in out if r.get(column) is not None]
+            missing = [r for r in out if r.get(column) is None]
+            present.sort(key=lambda r: r[column], reverse=desc)
+            out = present + missing
+        out = out[self.offset:]
+        if self.limit is not None:
+            out = out[:self.limit]
+        return [self.project(r) for r in out]
+
+    def project(self, row: Dict) -> Dict:
+        if self.select is None:
+            return dict(row)
+        return {c: row.get(c) for c in self.select}
+
+
+# ==================== Server ====================
+
+class FakeSupabase:
+    """Thread-hosted fake; tables and buckets are plain dicts the caller may seed"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0):
+        self.tables: Dict[str, List[Dict]] = {}
+        self.objects: Dict[Tuple[str, str], Tuple[bytes, str]] = {}
+        self.latency = latency_ms / 1000.0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeSupabase":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-supabase", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------- direct access ----------
+
+    def seed(self, table: str, rows: List[Dict]) -> List[Dict]:
+        with self._lock:
+            stored = [self._fill(table, dict(r)) for r in rows]
+            self.tables.setdefault(table, []).extend(stored)
+        return stored
+
+    def put_object(self, bucket: str, path: str, data: bytes, content_type: str = "image/jpeg") -> str:
+        """Store an object and return its public URL"""
+        with self._lock:
+            self.objects[(bucket, path)] = (data, content_type)
+        return f"{self.url}/storage/v1/object/public/{bucket}/{path}"
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "rows": {name: len(rows) for name, rows in self.tables.items()},
+                "objects": len(self.objects),
+            }
+
+    @staticmethod
+    def _fill(table: str, row: Dict) -> Dict:
+        now = datetime.now(timezone.utc).isoformat()
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", now)
+        if table == "projects":
+            row.setdefault("updated_at", now)
+        return row
+
+    # ---------- PostgREST ----------
+
+    def select(self, table: str, query: str) -> List[Dict]:
+        with self._lock:
+            return _Query(query).apply(self.tables.get(table, []))
+
+    def insert(self, table: str, payload: Any) -> List[Dict]:
+        rows = payload if isinstance(payload, list) else [payload]
+        return [dict(r) for r in self.seed(table, rows)]
+
+    def update(self, table: str, query: str, changes: Dict) -> List[Dict]:
+        parsed = _Query(query)
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            updated = []
+            for row in self.tables.get(table, []):
+                if parsed.matches(row):
+                    row.update(changes)
+                    if "updated_at" in row and "updated_at" not in changes:
+                        row["updated_at"] = now
+                    updated.append(parsed.project(row))
+            return updated
+
+    def delete(self, table: str, query: str) -> List[Dict]:
+        parsed = _Query(query)
+        with self._lock:
+            rows = self.tables.get(table, [])
+            removed = [r for r in rows if parsed.matches(r)]
+            self.tables[table] = [r for r in rows if not parsed.matches(r)]
+            return removed
+
+
+def _read_upload(content_type: str, body: bytes) -> Tuple[bytes, str]:
+    """File bytes and type from a storage upload (storage3 sends multipart/form-data)"""
+    if not content_type.startswith("multipart/"):
+        return body, content_type or "application/octet-stream"
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == "file":
+            return part.get_payload(decode=True), part.get_content_type()
+    raise ValueError("multipart upload without a 'file' part")
+
+
+def _make_handler(fake: FakeSupabase):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _body(self) -> bytes:
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _send(self, status: int, body: bytes = b"", content_type: str = "application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, status: int, payload: Any):
+            self._send(status, json.dumps(payload, default=str).encode())
+
+        def _rows(self, status: int, rows: List[Dict]):
+            # Prefer: return=minimal → no body; single-object Accept header → one row
+            if "return=minimal" in (self.headers.get("Prefer") or ""):
+                return self._send(204 if status == 200 else status)
+            if "vnd.pgrst.object" in (self.headers.get("Accept") or ""):
+                if len(rows) != 1:
+                    return self._json(406, {"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned"})
+                return self._json(status, rows[0])
+            self._json(status, rows)
+
+        def _route(self) -> Tuple[str, List[str], str]:
+            split = urlsplit(self.path)
+            parts = [unquote(p) for p in split.path.split("/") if p]
+            return split.path, parts, split.query
+
+        def _handle(self, method: str):
+            if fake.latency:
+                time.sleep(fake.latency)
+            with fake._lock:
+                fake.requests += 1
+            path, parts, query = self._route()
+            try:
+                if parts[:2] == ["rest", "v1"] and len(parts) == 3:
+                    return self._rest(method, parts[2], query)
+                if parts[:3] == ["storage", "v1", "object"]:
+                    return self._storage(method, parts[3:])
+                self._json(404, {"message": f"no route for {method} {path}"})
+            except Exception as e:
+                self._json(400, {"message": str(e)})
+
+        def _rest(self, method: str, table: str, query: str):
+            if method == "GET":
+                return self._rows(200, fake.select(table, query))
+            if method == "POST":
+                return self._rows(201, fake.insert(table, json.loads(self._body() or b"[]")))
+            if method == "PATCH":
+                return self._rows(200, fake.update(table, query, json.loads(self._body() or b"{}")))
+            if method == "DELETE":
+                self._body()                # postgrest sends "{}"; unread it would poison the keep-alive stream
+                return self._rows(200, fake.delete(table, query))
+            self._json(405, {"message": method})
+
+        def _storage(self, method: str, parts: List[str]):
+            if method == "GET":
+                if parts and parts[0] in ("public", "authenticated"):
+                    parts = parts[1:]
+                bucket, key = parts[0], "/".join(parts[1:])
+                with fake._lock:
+                    stored = fake.objects.get((bucket, key))
+                if stored is None:
+                    return self._json(404, {"statusCode": "404", "error": "not_found", "message": "Object not found"})
+                return self._send(200, stored[0], stored[1])
+            if method in ("POST", "PUT"):
+                bucket, key = parts[0], "/".join(parts[1:])
+                data, content_type = _read_upload(self.headers.get("Content-Type", ""), self._body())
+                fake.put_object(bucket, key, data, content_type)
+                return self._json(200, {"Key": f"{bucket}/{key}", "Id": str(uuid.uuid4())})
+            if method == "DELETE":
+                bucket, key = parts[0], "/".join(parts[1:])
+                with fake._lock:
+                    fake.objects.pop((bucket, key), None)
+                return self._json(200, {"message": "Successfully deleted"})
+            self._json(405, {"message": method})
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def do_PATCH(self):
+            self._handle("PATCH")
+
+        def do_PUT(self):
+            self._handle("PUT")
+
+        def do_DELETE(self):
+            self._handle("DELETE")
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the fake Supabase until interrupted")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake = FakeSupabase(args.host, args.port, args.latency_ms)
+    print(f"Fake Supabase on {fake.url}  (SUPABASE_SERVICE_KEY={SERVICE_KEY})")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
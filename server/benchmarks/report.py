@@ -0,0 +1,117 @@
+"""
+Benchmark Results
+Latency recording, JSON summaries and baseline comparison
+
+A scenario result is plain JSON:
+
+    {
+        "count": 200, "errors": 0, "wall_seconds": 4.1, "throughput_per_s": 48.8,
+        "unit": "request",
+        "latency_ms": {"p50": 18.2, "p95": 31.0, "p99": 44.9, "mean": 19.7, "max": 52.3},
+        "params": {...}, "extra": {...}
+    }
+
+compare() flags a scenario when its p95 latency rises or its throughput falls
+by more than the allowed fraction against a baseline run, or when it starts
+producing errors. p95 rises smaller than min_delta_ms are ignored so that
+microsecond-scale scenarios do not fail on scheduler noise.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class Recorder:
+    """Collects per-operation latencies for one scenario"""
+
+    def __init__(self, unit: str = "request", **params):
+        self.unit = unit
+        self.params = params
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.extra: Dict = {}
+        self._start: Optional[float] = None
+        self._stop: Optional[float] = None
+        self.items = 0                      # work items when one operation covers several (batches)
+
+    def start(self):
+        self._start = time.perf_counter()
+
+    def stop(self):
+        self._stop = time.perf_counter()
+
+    @contextmanager
+    def measure(self, items: int = 1):
+        """Time one operation; an exception counts as an error and is swallowed"""
+        began = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.errors += 1
+            self.extra.setdefault("first_error", repr(e))
+        else:
+            self.latencies.append(time.perf_counter() - began)
+            self.items += items
+
+    def add(self, seconds: float, items: int = 1):
+        self.latencies.append(seconds)
+        self.items += items
+
+    def fail(self, reason: str):
+        self.errors += 1
+        self.extra.setdefault("first_error", reason)
+
+    def summary(self) -> Dict:
+        wall = (self._stop or time.perf_counter()) - (self._start or time.perf_counter())
+        lat = np.asarray(self.latencies, dtype=np.float64) * 1000.0
+        if lat.size:
+            p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+            latency = {"p50": p50, "p95": p95, "p99": p99, "mean": lat.mean(), "max": lat.max()}
+            latency = {k: round(float(v), 3) for k, v in latency.items()}
+        else:
+            latency = {k: None for k in ("p50", "p95", "p99", "mean", "max")}
+        return {
+            "count": len(self.latencies),
+            "errors": self.errors,
+            "wall_seconds": round(wall, 4),
+            "throughput_per_s": round(self.items / wall, 3) if wall > 0 else None,
+            "unit": self.unit,
+            "latency_ms": latency,
+            "params": self.params,
+            "extra": self.extra,
+        }
+
+
+def compare(current: Dict, baseline: Dict, max_regression: float, min_delta_ms: float = 1.0) -> List[str]:
+    """Regressions of `current` against `baseline` (both full run documents)"""
+    problems = []
+    for name, base in baseline.get("scenarios", {}).items():
+        cur = current.get("scenarios", {}).get(name)
+        if cur is None:
+            continue
+        if cur.get("params", {}).get("target") != base.get("params", {}).get("target"):
+            continue   # e.g. HTTP vs in-process model numbers are not comparable
+        if cur["errors"] > base["errors"]:
+            problems.append(f"{name}: errors {base['errors']} → {cur['errors']}")
+        base_p95, cur_p95 = base["latency_ms"]["p95"], cur["latency_ms"]["p95"]
+        if base_p95 and cur_p95 and cur_p95 > base_p95 * (1 + max_regression) and cur_p95 - base_p95 >= min_delta_ms:
+            problems.append(f"{name}: p95 {base_p95:.2f} ms → {cur_p95:.2f} ms "
+                            f"(+{(cur_p95 / base_p95 - 1) * 100:.0f}%)")
+        base_tp, cur_tp = base.get("throughput_per_s"), cur.get("throughput_per_s")
+        if base_tp and cur_tp is not None and cur_tp < base_tp * (1 - max_regression):
+            problems.append(f"{name}: throughput {base_tp:.2f} → {cur_tp:.2f} {cur['unit']}/s "
+                            f"({(cur_tp / base_tp - 1) * 100:.0f}%)")
+    return problems
+
+
+def format_table(results: Dict) -> str:
+    lines = [f"  {'scenario':<24} {'n':>6} {'err':>4} {'thru/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+    for name, r in results.get("scenarios", {}).items():
+        lat = r["latency_ms"]
+        fmt = lambda v: f"{v:9.2f}" if v is not None else f"{'-':>9}"
+        lines.append(f"  {name:<24} {r['count']:>6} {r['errors']:>4} {r['throughput_per_s'] or 0:>10.2f} "
+                     f"{fmt(lat['p50'])} {fmt(lat['p95'])} {fmt(lat['p99'])}")
+    return "\n".join(lines)
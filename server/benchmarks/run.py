@@ -0,0 +1,138 @@
+"""
+Benchmark Runner
+Runs the scenarios against a fresh fake Supabase and writes one JSON document
+
+    cd server
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --scenario upload_to_verified --scenario ledger_append --scale 0.25
+    python -m benchmarks.run --baseline bench-main.json --max-regression 0.2   # exit 1 on regression
+
+--scale multiplies every scenario's operation count (quick smoke runs in CI,
+longer runs for release numbers). Inputs are generated from --seed, so two
+runs upload identical bytes and send identical requests.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks import scenarios
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.report import compare, format_table
+
+MRV_SCENARIOS = ["upload_to_verified", "bulk_reprocess"]
+BIOMASS_SCENARIOS = ["predict_single", "predict_batch"]
+LEDGER_SCENARIOS = ["ledger_append", "ledger_append_batch"]
+ALL_SCENARIOS = MRV_SCENARIOS + BIOMASS_SCENARIOS + LEDGER_SCENARIOS
+
+
+def _scaled(n: int, scale: float) -> int:
+    return max(1, int(round(n * scale)))
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+async def run(selected: List[str], scale: float, seed: int, concurrency: int, latency_ms: float) -> Dict:
+    results: Dict[str, Dict] = {}
+    with FakeSupabase(latency_ms=latency_ms) as fake:
+        scenarios.use_fake_supabase(fake)
+
+        if any(name in selected for name in MRV_SCENARIOS):
+            async with scenarios.mrv_client() as client:
+                if "upload_to_verified" in selected:
+                    results["upload_to_verified"] = await scenarios.upload_to_verified(
+                        client, fake, n=_scaled(40, scale), concurrency=concurrency, seed=seed)
+                if "bulk_reprocess" in selected:
+                    results["bulk_reprocess"] = await scenarios.bulk_reprocess(
+                        client, fake, n=_scaled(100, scale), seed=seed + 1000)
+
+        if "predict_single" in selected:
+            results["predict_single"] = await scenarios.predict_single(n=_scaled(200, scale), seed=seed)
+        if "predict_batch" in selected:
+            results["predict_batch"] = await scenarios.predict_batch(n=_scaled(400, scale), seed=seed + 1)
+
+        if "ledger_append" in selected:
+            results["ledger_append"] = scenarios.ledger_append(n=_scaled(20_000, scale), seed=seed)
+        if "ledger_append_batch" in selected:
+            results["ledger_append_batch"] = scenarios.ledger_append_batch(n=_scaled(20_000, scale), seed=seed)
+
+        fake_stats = fake.stats()
+
+    from app.utils.config import settings
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": seed,
+            "scale": scale,
+            "fake_supabase": {"latency_ms": latency_ms, **fake_stats},
+            "settings": {
+                "JOB_CONCURRENCY": settings.JOB_CONCURRENCY,
+                "DB_CACHE_TTL_SECONDS": settings.DB_CACHE_TTL_SECONDS,
+                "LOG_LEVEL": settings.LOG_LEVEL,
+            },
+        },
+        "scenarios": {name: results[name] for name in selected if name in results},
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="MRV backend benchmark suite")
+    parser.add_argument("--scenario", action="append", choices=ALL_SCENARIOS,
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier on every scenario's operation count")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent uploads in upload_to_verified")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0,
+                        help="Delay added to every fake Supabase request")
+    parser.add_argument("--out", help="Write the JSON results here (default: stdout)")
+    parser.add_argument("--baseline", help="Earlier results to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed p95 increase / throughput drop as a fraction (default 0.2)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Ignore p95 increases smaller than this (default 1 ms)")
+    args = parser.parse_args(argv)
+
+    selected = args.scenario or ALL_SCENARIOS
+    results = asyncio.run(run(selected, args.scale, args.seed, args.concurrency, args.db_latency_ms))
+
+    document = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(document + "\n")
+        print(format_table(results), file=sys.stderr)
+        print(f"\n  Results written to {args.out}", file=sys.stderr)
+    else:
+        print(document)
+        print(format_table(results), file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        problems = compare(results, baseline, args.max_regression, args.min_delta_ms)
+        if problems:
+            print(f"\n  ❌ {len(problems)} regression(s) beyond {args.max_regression:.0%}:", file=sys.stderr)
+            for problem in problems:
+                print(f"     {problem}", file=sys.stderr)
+            return 1
+        print(f"\n  ✅ No regression beyond {args.max_regression:.0%} against {args.baseline}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
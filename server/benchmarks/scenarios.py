@@ -0,0 +1,286 @@
+"""
+Benchmark Scenarios
+Drivers for the hot paths, each returning a report.Recorder summary
+
+    upload_to_verified   POST /api/v1/upload → pipeline job finished (verified/rejected)
+    predict_single       /predict-biomass, one request at a time
+    predict_batch        /predict-biomass, bursts of concurrent requests
+    bulk_reprocess       POST /api/v1/mrv/process for many stored submissions
+    ledger_append        hashing/blockchain.py add_block, and add_blocks in batches
+
+The MRV app and biomass_api run in-process behind httpx.ASGITransport with
+their lifespans entered; every database and storage call goes over HTTP to
+the fake Supabase. The environment must point at the fake before anything
+under app/ is imported (see use_fake_supabase).
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+import httpx
+
+from benchmarks import synthetic
+from benchmarks.fake_supabase import SERVICE_KEY, FakeSupabase
+from benchmarks.report import Recorder
+
+AUTH = {"Authorization": "Bearer benchmark"}
+HASHING_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "hashing")
+
+
+def use_fake_supabase(fake: FakeSupabase):
+    """Point the backend at the fake; call before importing app modules"""
+    os.environ["SUPABASE_URL"] = fake.url
+    os.environ["SUPABASE_KEY"] = SERVICE_KEY
+    os.environ["SUPABASE_SERVICE_KEY"] = SERVICE_KEY
+    # Anchoring talks to a chain, not Supabase; keep it out of the measured path
+    os.environ["BLOCKCHAIN_ENABLED"] = "false"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("ML_LAZY_INIT", "false")
+
+
+def seed_projects(fake: FakeSupabase, n: int) -> List[str]:
+    rows = fake.seed("projects", [
+        {
+            "name": f"Bench project {i}",
+            "region": "bench",
+            "latitude": -8.0 + (i % 50) * 0.1,
+            "longitude": 115.0 + (i // 50) * 0.1,
+            "area_hectares": 10.0 + i,
+        }
+        for i in range(n)
+    ])
+    return [row["id"] for row in rows]
+
+
+def seed_submissions(fake: FakeSupabase, project_ids: List[str], n: int, seed: int, size: int) -> List[str]:
+    """Stored images plus 'uploaded' submission rows, as if /upload had run"""
+    from app.utils.config import settings
+    rows = []
+    for i in range(n):
+        url = fake.put_object(settings.STORAGE_BUCKET, f"bench/{seed}-{i}.jpg", synthetic.image_bytes(seed + i, size))
+        rows.append({
+            "project_id": project_ids[i % len(project_ids)],
+            "image_url": url,
+            "timestamp": f"2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}",
+            "status": "uploaded",
+            "metadata": {"source": "benchmark"},
+        })
+    return [row["id"] for row in fake.seed("submissions", rows)]
+
+
+@asynccontextmanager
+async def mrv_client():
+    """httpx client on the MRV app with its lifespan (models, job manager, spatial index) running"""
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://mrv", headers=AUTH, timeout=300) as client:
+            yield client
+
+
+def _outcomes(fake: FakeSupabase, submission_ids: List[str]) -> Dict[str, int]:
+    wanted = set(submission_ids)
+    counts: Dict[str, int] = {}
+    for row in fake.tables.get("submissions", []):
+        if row["id"] in wanted:
+            counts[row["status"]] = counts.get(row["status"], 0) + 1
+    return counts
+
+
+async def _gather_limited(concurrency: int, coros):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(c) for c in coros))
+
+
+# ==================== MRV pipeline ====================
+
+async def upload_to_verified(client: httpx.AsyncClient, fake: FakeSupabase, n: int = 40, concurrency: int = 4,
+                             size: int = 512, seed: int = 1, warmup: int = 2) -> Dict:
+    """Upload → job finished, timed per submission from the first request byte"""
+    from app.services.job_manager import get_job_manager
+    from app.utils.config import settings
+
+    # A few submissions per project so later uploads take the temporal path
+    project_ids = seed_projects(fake, max(1, n // 4))
+    images = [synthetic.image_bytes(seed + i, size) for i in range(n + warmup)]
+    rec = Recorder("submission", n=n, concurrency=concurrency, image_size=size,
+                   job_concurrency=settings.JOB_CONCURRENCY, target="http")
+    submission_ids: List[str] = []
+
+    async def one(i: int, record: bool):
+        began = time.perf_counter()
+        response = await client.post(
+            "/api/v1/upload", params={"project_id": project_ids[i % len(project_ids)]},
+            files={"file": (f"scene-{i}.jpg", images[i], "image/jpeg")},
+        )
+        if response.status_code != 200:
+            return rec.fail(f"upload HTTP {response.status_code}") if record else None
+        body = response.json()
+        job = await get_job_manager().wait(get_job_manager().get(body["job_id"]))
+        if not record:
+            return
+        submission_ids.append(body["submission_id"])
+        if job.status != "succeeded":
+            return rec.fail(f"job {job.status}: {job.error}")
+        rec.add(time.perf_counter() - began)
+
+    await _gather_limited(concurrency, [one(n + i, False) for i in range(warmup)])
+    rec.start()
+    await _gather_limited(concurrency, [one(i, True) for i in range(n)])
+    rec.stop()
+
+    rec.extra["outcomes"] = _outcomes(fake, submission_ids)
+    return rec.summary()
+
+
+async def bulk_reprocess(client: httpx.AsyncClient, fake: FakeSupabase, n: int = 100, size: int = 256,
+                         seed: int = 1000) -> Dict:
+    """Queue every stored submission at once; latency is queue → finished per job"""
+    from app.services.job_manager import get_job_manager
+    from app.utils.config import settings
+
+    project_ids = seed_projects(fake, max(1, n // 10))
+    submission_ids = seed_submissions(fake, project_ids, n, seed, size)
+    rec = Recorder("submission", n=n, image_size=size, job_concurrency=settings.JOB_CONCURRENCY, target="http")
+
+    rec.start()
+    jobs = []
+    for submission_id in submission_ids:
+        queued = time.perf_counter()
+        response = await client.post(f"/api/v1/mrv/process/{submission_id}")
+        if response.status_code != 202:
+            rec.fail(f"process HTTP {response.status_code}")
+            continue
+        jobs.append((queued, get_job_manager().get(response.json()["job_id"])))
+
+    async def finish(queued, job):
+        await get_job_manager().wait(job)
+        if job.status != "succeeded":
+            return rec.fail(f"job {job.status}: {job.error}")
+        rec.add(time.perf_counter() - queued)
+
+    await asyncio.gather(*(finish(q, job) for q, job in jobs))
+    rec.stop()
+
+    rec.extra["outcomes"] = _outcomes(fake, submission_ids)
+    return rec.summary()
+
+
+# ==================== Biomass prediction ====================
+
+@asynccontextmanager
+async def _biomass_target():
+    """
+    POST /predict-biomass on biomass_api when it imports (it needs shap);
+    otherwise the same booster in-process through BiomassModel.predict
+    """
+    try:
+        import biomass_api
+    except ImportError as e:
+        from app.services.biomass_model import get_biomass_model
+        model = await get_biomass_model()
+
+        async def predict(body: Dict):
+            await model.predict(**body)
+
+        yield "model", f"biomass_api unavailable ({e.name} not installed)", model.species_encoder.classes_, predict
+        return
+
+    async with biomass_api.app.router.lifespan_context(biomass_api.app):
+        transport = httpx.ASGITransport(app=biomass_api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://biomass", timeout=60) as client:
+
+            async def predict(body: Dict):
+                response = await client.post("/predict-biomass", json=body)
+                response.raise_for_status()
+
+            yield "http", None, biomass_api.species_encoder.classes_, predict
+
+
+async def predict_single(n: int = 200, seed: int = 7, warmup: int = 5) -> Dict:
+    async with _biomass_target() as (target, note, species, predict):
+        bodies = synthetic.band_samples(seed, n + warmup, species)
+        for body in bodies[:warmup]:
+            await predict(body)
+        rec = Recorder("request", n=n, target=target)
+        rec.start()
+        for body in bodies[warmup:]:
+            with rec.measure():
+                await predict(body)
+        rec.stop()
+    if note:
+        rec.extra["note"] = note
+    return rec.summary()
+
+
+async def predict_batch(n: int = 400, batch: int = 16, seed: int = 8, warmup: int = 5) -> Dict:
+    """Bursts of `batch` concurrent requests; latency is per request"""
+    async with _biomass_target() as (target, note, species, predict):
+        bodies = synthetic.band_samples(seed, n + warmup, species)
+        for body in bodies[:warmup]:
+            await predict(body)
+        rec = Recorder("request", n=n, batch=batch, target=target)
+
+        async def one(body):
+            with rec.measure():
+                await predict(body)
+
+        rec.start()
+        for i in range(warmup, n + warmup, batch):
+            await asyncio.gather(*(one(body) for body in bodies[i:i + batch]))
+        rec.stop()
+    if note:
+        rec.extra["note"] = note
+    return rec.summary()
+
+
+# ==================== Ledger ====================
+
+def _blockchain_class():
+    if HASHING_DIR not in sys.path:
+        sys.path.insert(0, HASHING_DIR)
+    from blockchain import Blockchain
+    return Blockchain
+
+
+def ledger_append(n: int = 20_000, seed: int = 3) -> Dict:
+    """One add_block per submission (fsync batched every SYNC_EVERY blocks)"""
+    Blockchain = _blockchain_class()
+    entries = [(f"project-{seed}-{i}", f"Project {i}", f"{(seed * 7919 + i) % 2**256:064x}") for i in range(n)]
+    rec = Recorder("block", n=n, target="local")
+    with tempfile.TemporaryDirectory() as tmp:
+        with Blockchain(os.path.join(tmp, "ledger"), legacy_file=None) as chain:
+            rec.start()
+            for entry in entries:
+                with rec.measure():
+                    chain.add_block(*entry)
+            rec.stop()
+            rec.extra["sync_every"] = chain.sync_every
+    return rec.summary()
+
+
+def ledger_append_batch(n: int = 20_000, batch: int = 256, seed: int = 4) -> Dict:
+    """add_blocks in batches of `batch`; latency is per batch, throughput in blocks/s"""
+    Blockchain = _blockchain_class()
+    entries = [(f"project-{seed}-{i}", f"Project {i}", f"{(seed * 7919 + i) % 2**256:064x}") for i in range(n)]
+    rec = Recorder("block", n=n, batch=batch, target="local")
+    with tempfile.TemporaryDirectory() as tmp:
+        with Blockchain(os.path.join(tmp, "ledger"), legacy_file=None) as chain:
+            rec.start()
+            for i in range(0, n, batch):
+                chunk = entries[i:i + batch]
+                with rec.measure(items=len(chunk)):
+                    chain.add_blocks(chunk)
+            rec.stop()
+    return rec.summary()
+
@@ -0,0 +1,110 @@
+"""
+Synthetic Imagery
+Deterministic mangrove-like photos and Sentinel-2-like band rasters
+
+Everything is derived from a seed, so a benchmark run uploads byte-identical
+inputs every time. Scenes mix canopy, water channels and bare mud from a
+smooth value-noise field; `canopy` sets the share of canopy pixels.
+
+    image_bytes(seed=7, size=512)                  # JPEG bytes for /upload
+    band_raster(seed=7, size=256)                  # {"B2": ..., "B8": ...} reflectance
+    write_raster_tiff("scene.tif", band_raster(7)) # 16-bit multi-page TIFF (DN = 10000 x reflectance)
+    band_sample(seed=7, species=classes)           # /predict-biomass request body
+"""
+
+import io
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+SPECIES = ["Mangrove", "Seagrass", "Coral", "Other"]
+
+# Surface reflectance (B2 blue, B3 green, B4 red, B8 NIR) per cover class
+_REFLECTANCE = {
+    "canopy": (0.03, 0.06, 0.03, 0.35),
+    "water": (0.06, 0.05, 0.03, 0.02),
+    "mud": (0.09, 0.11, 0.13, 0.20),
+}
+# Display colours (RGB) for the same classes
+_COLOURS = {
+    "canopy": (34, 82, 40),
+    "water": (46, 70, 88),
+    "mud": (120, 104, 82),
+}
+
+
+def _value_noise(rng: np.random.Generator, size: int, cells: int) -> np.ndarray:
+    """Smooth [0, 1] field: a coarse random grid upsampled bicubically"""
+    coarse = (rng.random((cells, cells)) * 255).astype(np.uint8)
+    field = Image.fromarray(coarse, "L").resize((size, size), Image.BICUBIC)
+    return np.asarray(field, dtype=np.float32) / 255.0
+
+
+def cover_map(seed: int, size: int = 512, canopy: float = 0.6) -> Dict[str, np.ndarray]:
+    """Boolean masks for canopy / water / mud"""
+    rng = np.random.default_rng(seed)
+    field = 0.7 * _value_noise(rng, size, 6) + 0.3 * _value_noise(rng, size, 24)
+    water_cut = np.quantile(field, max(0.0, (1 - canopy) / 2))
+    canopy_cut = np.quantile(field, 1 - canopy)
+    return {
+        "water": field < water_cut,
+        "mud": (field >= water_cut) & (field < canopy_cut),
+        "canopy": field >= canopy_cut,
+    }
+
+
+def rgb_image(seed: int, size: int = 512, canopy: float = 0.6) -> Image.Image:
+    """Aerial-photo-like RGB scene"""
+    rng = np.random.default_rng(seed + 1)
+    masks = cover_map(seed, size, canopy)
+    img = np.zeros((size, size, 3), dtype=np.float32)
+    for name, mask in masks.items():
+        img[mask] = _COLOURS[name]
+    # Crown texture and sensor noise so JPEG sizes and features look realistic
+    img *= (0.75 + 0.5 * _value_noise(rng, size, size // 8))[..., None]
+    img += rng.normal(0, 6, img.shape)
+    return Image.fromarray(np.clip(img, 0, 255).astype(np.uint8), "RGB")
+
+
+def image_bytes(seed: int, size: int = 512, canopy: float = 0.6, fmt: str = "JPEG", quality: int = 90) -> bytes:
+    """Encoded RGB scene"""
+    buf = io.BytesIO()
+    rgb_image(seed, size, canopy).save(buf, format=fmt, **({"quality": quality} if fmt == "JPEG" else {}))
+    return buf.getvalue()
+
+
+def band_raster(seed: int, size: int = 256, canopy: float = 0.6) -> Dict[str, np.ndarray]:
+    """Four float32 reflectance bands over the same cover map"""
+    rng = np.random.default_rng(seed + 2)
+    masks = cover_map(seed, size, canopy)
+    bands = {}
+    for i, band in enumerate(("B2", "B3", "B4", "B8")):
+        layer = np.zeros((size, size), dtype=np.float32)
+        for name, mask in masks.items():
+            layer[mask] = _REFLECTANCE[name][i]
+        layer *= 0.85 + 0.3 * _value_noise(rng, size, 16)
+        layer += rng.normal(0, 0.004, layer.shape).astype(np.float32)
+        bands[band] = np.clip(layer, 0.0, 1.0)
+    return bands
+
+
+def write_raster_tiff(path: str, bands: Dict[str, np.ndarray]):
+    """Save bands as a 16-bit multi-page TIFF (one page per band, Sentinel-2 L2A scaling)"""
+    pages = [Image.fromarray((bands[b] * 10000).astype(np.uint16)) for b in sorted(bands)]
+    pages[0].save(path, format="TIFF", save_all=True, append_images=pages[1:])
+
+
+def band_sample(seed: int, species: Optional[Sequence[str]] = None) -> Dict:
+    """Mean band values of a small raster, shaped as a /predict-biomass request"""
+    rng = np.random.default_rng(seed + 3)
+    bands = band_raster(seed, size=32, canopy=float(rng.uniform(0.2, 0.9)))
+    sample = {band: round(float(values.mean()), 5) for band, values in bands.items()}
+    species = list(species) if species is not None else SPECIES
+    sample["species"] = str(species[int(rng.integers(len(species)))])
+    return sample
+
+
+def band_samples(seed: int, n: int, species: Optional[Sequence[str]] = None) -> List[Dict]:
+    """n request bodies; pass the model's class names as species so every label is known"""
+    return [band_sample(seed * 100_003 + i, species) for i in range(n)]
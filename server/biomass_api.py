@@ -10,11 +10,9 @@ from typing import List, Optional, Dict, Any
 import pandas as pd
 import numpy as np
 import xgboost as xgb
-import pickle
 import json
 from pathlib import Path
 import shap
-from sklearn.preprocessing import LabelEncoder
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
@@ -22,6 +20,24 @@ import io
 import base64
 from contextlib import asynccontextmanager
 
+from app.services.biomass_features import BOOSTER_FEATURES, booster_matrix, engineer_booster_features
+from app.services.model_bundle import (
+    CategoryEncoder,
+    DEFAULT_SPECIES_CLASSES,
+    DEFAULT_TRAINING_MEDIANS,
+    find_bundle,
+    load_bundle,
+    load_legacy_medians,
+    load_legacy_species_encoder,
+)
+from app.routes import debug
+from app.utils.config import settings
+from app.utils.log import configure_logging, get_logger, shutdown_logging
+from app.utils.profiler import ProfilerMiddleware
+
+configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT, settings.LOG_QUEUE_SIZE)
+logger = get_logger("biomass_api")
+
 # Global model artifacts
 booster = None
 species_encoder = None
@@ -48,158 +64,64 @@ class BiomassOutput(BaseModel):
     feature_importance: Dict[str, float]
 
 def load_artifacts():
-    """Load model artifacts from disk"""
+    """Load model artifacts from disk (bundle format, falling back to legacy files)"""
     global booster, species_encoder, training_medians, explainer
     
     try:
+        bundle_dir = find_bundle(MODELS_DIR, "biomass")
+        if bundle_dir is not None:
+            bundle = load_bundle(bundle_dir)
+            booster_path = bundle.file_path("booster")
+            species_encoder = CategoryEncoder(bundle.params.get("species_classes", DEFAULT_SPECIES_CLASSES))
+            training_medians = dict(bundle.params.get("training_medians", DEFAULT_TRAINING_MEDIANS))
+            logger.info("✓ Loaded model bundle %s@%s (%s)", bundle.name, bundle.version, bundle.bundle_hash[:12])
+        else:
+            booster_path = MODELS_DIR / "xgb_biomass_booster.json"
+            
+            # Load species encoder (optional)
+            encoder_path = MODELS_DIR / "species_encoder.pkl"
+            try:
+                species_encoder = load_legacy_species_encoder(encoder_path)
+                logger.info("✓ Loaded species encoder from %s", encoder_path)
+            except Exception as e:
+                logger.warning("⚠ Could not load species encoder (will use default encoding): %s", e)
+                species_encoder = CategoryEncoder(DEFAULT_SPECIES_CLASSES)
+                logger.info("✓ Created fallback species encoder")
+            
+            # Load training medians (optional)
+            medians_path = MODELS_DIR / "training_medians.pkl"
+            try:
+                training_medians = load_legacy_medians(medians_path)
+                logger.info("✓ Loaded training medians from %s", medians_path)
+            except Exception as e:
+                logger.warning("⚠ Could not load training medians (will use defaults): %s", e)
+                training_medians = dict(DEFAULT_TRAINING_MEDIANS)
+                logger.info("✓ Created default training medians")
+        
         # Load XGBoost booster
-        booster_path = MODELS_DIR / "xgb_biomass_booster.json"
         booster = xgb.Booster()
         booster.load_model(str(booster_path))
-        print(f"✓ Loaded booster from {booster_path}")
-        
-        # Load species encoder (optional - handle pickle compatibility issues)
-        encoder_path = MODELS_DIR / "species_encoder.pkl"
-        try:
-            with open(encoder_path, 'rb') as f:
-                species_encoder = pickle.load(f)
-            print(f"✓ Loaded species encoder from {encoder_path}")
-        except Exception as e:
-            print(f"⚠ Could not load species encoder (will use default encoding): {e}")
-            # Create a simple fallback encoder
-            from sklearn.preprocessing import LabelEncoder
-            species_encoder = LabelEncoder()
-            species_encoder.classes_ = np.array(['Mangrove', 'Seagrass', 'Coral', 'Other'])
-            print("✓ Created fallback species encoder")
-        
-        # Load training medians (optional)
-        medians_path = MODELS_DIR / "training_medians.pkl"
-        try:
-            with open(medians_path, 'rb') as f:
-                training_medians = pickle.load(f)
-            print(f"✓ Loaded training medians from {medians_path}")
-        except Exception as e:
-            print(f"⚠ Could not load training medians (will use defaults): {e}")
-            # Create default medians
-            training_medians = {
-                'B2': 0.05, 'B3': 0.06, 'B4': 0.04, 'B8': 0.3,
-                'NDVI': 0.5, 'EVI': 0.4, 'SAVI': 0.45, 'NDWI': 0.2,
-                'species_encoded': 0
-            }
-            print("✓ Created default training medians")
+        logger.info("✓ Loaded booster from %s", booster_path)
         
         # Create SHAP explainer
         explainer = shap.TreeExplainer(booster)
-        print("✓ Created SHAP explainer")
+        logger.info("✓ Created SHAP explainer")
         
     except Exception as e:
-        print(f"✗ Error loading artifacts: {e}")
+        logger.error("✗ Error loading artifacts: %s", e)
         raise
 
-def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Apply feature engineering to match model's expected features"""
-    df = df.copy()
-    
-    # Calculate indices (lowercase to match model)
-    if 'B8' in df.columns and 'B4' in df.columns:
-        df['ndvi'] = (df['B8'] - df['B4']) / (df['B8'] + df['B4'] + 1e-8)
-    
-    if 'B3' in df.columns and 'B8' in df.columns:
-        df['gndvi'] = (df['B8'] - df['B3']) / (df['B8'] + df['B3'] + 1e-8)
-        df['ndwi'] = (df['B3'] - df['B8']) / (df['B3'] + df['B8'] + 1e-8)
-    
-    if 'B8' in df.columns and 'B11' in df.columns:
-        df['ndbi'] = (df['B11'] - df['B8']) / (df['B11'] + df['B8'] + 1e-8)
-    
-    # Add missing Sentinel-2 bands with default values
-    for band in ['B1', 'B5', 'B6', 'B7', 'B8A', 'B9', 'B11', 'B12']:
-        if band not in df.columns:
-            df[band] = 0.05  # Default reflectance value
-    
-    # Add SAR features with default values
-    if 'VV' not in df.columns:
-        df['VV'] = -15.0
-    if 'VH' not in df.columns:
-        df['VH'] = -22.0
-    if 'vv_vh_ratio' not in df.columns:
-        df['vv_vh_ratio'] = df['VV'] / (df['VH'] + 1e-8)
-    if 'vv_vh_diff' not in df.columns:
-        df['vv_vh_diff'] = df['VV'] - df['VH']
-    
-    # Add geographic features with default values
-    if 'longitude' not in df.columns:
-        df['longitude'] = 0.0
-    if 'latitude' not in df.columns:
-        df['latitude'] = 0.0
-    
-    # Add biomass features with default values (these will be predicted)
-    for col in ['agb', 'bgb', 'cagb', 'cbgb', 'soil_carbon_stock', 'total_carbon_stock']:
-        if col not in df.columns:
-            df[col] = 0.0
-    
-    return df
-
-def encode_species(df: pd.DataFrame) -> pd.DataFrame:
-    """Encode species column robustly (model expects 'species_enc')"""
-    df = df.copy()
-    
-    if 'species' not in df.columns:
-        df['species_enc'] = 0
-        return df
-    
-    # If already numeric, assume encoded
-    if pd.api.types.is_numeric_dtype(df['species']):
-        df['species_enc'] = df['species'].astype(int)
-    else:
-        # String species - use encoder
-        try:
-            df['species_enc'] = species_encoder.transform(df['species'])
-        except:
-            # Unknown species - use default
-            df['species_enc'] = 0
-    
-    return df
-
-def fill_missing(df: pd.DataFrame) -> pd.DataFrame:
-    """Fill NaN/inf with training medians"""
-    df = df.copy()
-    
-    # Replace inf with NaN
-    df.replace([np.inf, -np.inf], np.nan, inplace=True)
-    
-    # Fill with medians
-    for col in df.columns:
-        if col in training_medians:
-            df[col].fillna(training_medians[col], inplace=True)
-    
-    return df
+def preload():
+    """Load the artifacts in the pre-fork parent (app.utils.prefork) so workers share them"""
+    load_artifacts()
 
 def predict_biomass(df: pd.DataFrame) -> tuple:
     """Predict biomass and calculate confidence"""
-    # Feature engineering
-    df = engineer_features(df)
-    
-    # Encode species
-    df = encode_species(df)
+    # Feature engineering (shared with the MRV backend's biomass model)
+    df = engineer_booster_features(df, species_encoder, training_medians)
     
-    # Fill missing values
-    df = fill_missing(df)
-    
-    # Model expects these features in this order
-    expected_features = [
-        'longitude', 'latitude', 'agb', 'bgb', 'cagb', 'cbgb', 
-        'soil_carbon_stock', 'total_carbon_stock', 'B1', 'B2', 'B3', 'B4', 
-        'B5', 'B6', 'B7', 'B8', 'B8A', 'B9', 'B11', 'B12', 'VV', 'VH', 
-        'ndvi', 'gndvi', 'ndbi', 'ndwi', 'vv_vh_ratio', 'vv_vh_diff', 'species_enc'
-    ]
-    
-    # Ensure all expected features exist
-    for col in expected_features:
-        if col not in df.columns:
-            df[col] = 0.0
-    
-    # Select only the expected features in the correct order
-    df_model = df[expected_features]
+    # Model expects the training features in training order
+    df_model = booster_matrix(df)
     
     # Create DMatrix
     dmatrix = xgb.DMatrix(df_model)
@@ -221,8 +143,8 @@ def predict_biomass(df: pd.DataFrame) -> tuple:
     # Calculate feature importance
     mean_shap = np.abs(shap_values).mean(axis=0)
     feature_importance = {
-        expected_features[i]: float(mean_shap[i])
-        for i in range(len(expected_features))
+        BOOSTER_FEATURES[i]: float(mean_shap[i])
+        for i in range(len(BOOSTER_FEATURES))
     }
     
     # Normalize to percentages
@@ -238,10 +160,11 @@ def predict_biomass(df: pd.DataFrame) -> tuple:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Load model artifacts on startup"""
-    load_artifacts()
+    """Load model artifacts on startup (already loaded in pre-fork workers)"""
+    if explainer is None:
+        load_artifacts()
     yield
-    # Cleanup on shutdown (if needed)
+    shutdown_logging()
 
 app = FastAPI(title="Biomass Prediction API for NeeLedger", lifespan=lifespan)
 
@@ -254,6 +177,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling (X-Profile-Token header or /debug/profile/start)
+app.add_middleware(ProfilerMiddleware)
+app.include_router(debug.router, tags=["Debug"])
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -278,15 +205,16 @@ async def predict_biomass_endpoint(input_data: BiomassInput):
     }
     """
     try:
-        print(f"Received input: {input_data}")
-        
         # Convert to DataFrame
         df = pd.DataFrame([input_data.model_dump()])
-        print(f"DataFrame created: {df}")
+        logger.debug("Received input", species=input_data.species)
         
         # Predict
         biomass, confidence, result_df, feature_importance = predict_biomass(df)
-        print(f"Prediction: biomass={biomass}, confidence={confidence}")
+        logger.info(
+            "Prediction: biomass=%.3f, confidence=%.1f", biomass, confidence,
+            species=input_data.species, sample_every=settings.LOG_SAMPLE_EVERY
+        )
         
         return BiomassOutput(
             predicted_biomass=float(biomass),
@@ -298,9 +226,7 @@ async def predict_biomass_endpoint(input_data: BiomassInput):
         )
         
     except Exception as e:
-        import traceback
-        print(f"Error in predict_biomass_endpoint: {e}")
-        print(traceback.format_exc())
+        logger.exception("Error in predict_biomass_endpoint: %s", e, input=input_data.model_dump())
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
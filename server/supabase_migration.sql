@@ -94,18 +94,70 @@ CREATE TABLE IF NOT EXISTS public.model_registry (
     UNIQUE(model_name, version)
 );
 
+-- ==================== BLOCKCHAIN ANCHORS TABLE ====================
+-- One row per anchored submission: the Merkle root of its batch and the
+-- inclusion proof needed to verify it against that root
+CREATE TABLE IF NOT EXISTS public.blockchain_anchors (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    submission_id UUID NOT NULL REFERENCES public.submissions(id) ON DELETE CASCADE,
+    data_hash TEXT NOT NULL,
+    batch_id TEXT NOT NULL,
+    merkle_root TEXT NOT NULL,
+    leaf_index INTEGER NOT NULL,
+    proof JSONB NOT NULL DEFAULT '[]',
+    hash_algorithm TEXT NOT NULL DEFAULT 'keccak256',
+    transaction_hash TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    claimed_by TEXT,
+    claimed_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- ==================== ANCHOR QUEUE TABLE ====================
+-- Submissions waiting for their Merkle batch to be sealed. A row is deleted
+-- once its batch's blockchain_anchors records exist; rows a crashed process
+-- left behind are resealed by the next sweep (recover_pending_anchors).
+-- claimed_by/claimed_at: the sweep claims rows with a conditional UPDATE so
+-- that only one process recovers each leaf or pending batch
+CREATE TABLE IF NOT EXISTS public.anchor_queue (
+    submission_id UUID PRIMARY KEY REFERENCES public.submissions(id) ON DELETE CASCADE,
+    data_hash TEXT NOT NULL,
+    claimed_by TEXT,
+    claimed_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Claim columns for tables created before they existed
+ALTER TABLE public.blockchain_anchors ADD COLUMN IF NOT EXISTS claimed_by TEXT;
+ALTER TABLE public.blockchain_anchors ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ;
+ALTER TABLE public.anchor_queue ADD COLUMN IF NOT EXISTS claimed_by TEXT;
+ALTER TABLE public.anchor_queue ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ;
+
 -- ==================== INDEXES ====================
+-- Keyset pagination for the hashing watcher (created_at, id) > watermark
+CREATE INDEX IF NOT EXISTS idx_projects_created_at_id ON public.projects(created_at, id);
+-- GET /projects region and bbox filters
+CREATE INDEX IF NOT EXISTS idx_projects_region_created_at_id ON public.projects(region, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_projects_lat_lon ON public.projects(latitude, longitude);
+-- Change polling for the /projects/search spatial index (updated_at, id) > watermark
+CREATE INDEX IF NOT EXISTS idx_projects_updated_at_id ON public.projects(updated_at, id);
 CREATE INDEX IF NOT EXISTS idx_submissions_project_id ON public.submissions(project_id);
 CREATE INDEX IF NOT EXISTS idx_submissions_status ON public.submissions(status);
 CREATE INDEX IF NOT EXISTS idx_submissions_timestamp ON public.submissions(timestamp DESC);
 CREATE INDEX IF NOT EXISTS idx_temporal_history_project_id ON public.temporal_history(project_id);
 CREATE INDEX IF NOT EXISTS idx_temporal_history_current_submission ON public.temporal_history(current_submission_id);
+CREATE INDEX IF NOT EXISTS idx_blockchain_anchors_submission_id ON public.blockchain_anchors(submission_id);
+CREATE INDEX IF NOT EXISTS idx_blockchain_anchors_batch_id ON public.blockchain_anchors(batch_id);
+CREATE INDEX IF NOT EXISTS idx_blockchain_anchors_status ON public.blockchain_anchors(status);
+CREATE INDEX IF NOT EXISTS idx_anchor_queue_created_at ON public.anchor_queue(created_at);
 
 -- ==================== ROW LEVEL SECURITY ====================
 ALTER TABLE public.projects ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.submissions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.temporal_history ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.model_registry ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.blockchain_anchors ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.anchor_queue ENABLE ROW LEVEL SECURITY;
 
 -- Permissive policies for authenticated users
 CREATE POLICY "Allow authenticated users to read projects" ON public.projects
@@ -138,6 +190,15 @@ CREATE POLICY "Allow authenticated users to read model registry" ON public.model
 CREATE POLICY "Allow service role to manage model registry" ON public.model_registry
     FOR ALL USING (auth.role() = 'service_role');
 
+CREATE POLICY "Allow public reads of blockchain anchors" ON public.blockchain_anchors
+    FOR SELECT USING (true);
+
+CREATE POLICY "Allow service role to manage blockchain anchors" ON public.blockchain_anchors
+    FOR ALL USING (auth.role() = 'service_role');
+
+CREATE POLICY "Allow service role to manage the anchor queue" ON public.anchor_queue
+    FOR ALL USING (auth.role() = 'service_role');
+
 -- ==================== STORAGE BUCKET ====================
 -- Create storage bucket for project submissions
 INSERT INTO storage.buckets (id, name, public)
@@ -0,0 +1,70 @@
+"""
+Regression tests for AnchorWorker nonce handling
+
+    cd server && python -m pytest -q tests/test_anchoring.py
+
+The dev chain runs with queue_future_nonces=True, i.e. like a real node: a
+transaction whose nonce leaves a gap is held unmined instead of rejected.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services import anchoring
+from app.services.anchoring import AnchorWorker, JsonRpcClient
+from app.services.devchain import DEV_ACCOUNT, DevChain
+from app.services.merkle import MerkleBatch, MerkleTree
+
+
+@pytest.fixture
+def statuses(monkeypatch):
+    recorded = {}
+
+    async def record(batch, status, tx_hash):
+        recorded[batch.batch_id] = status
+
+    monkeypatch.setattr(anchoring, "_update_anchor_status", record)
+    return recorded
+
+
+def _batch(name: str) -> MerkleBatch:
+    return MerkleBatch(name, MerkleTree([name.encode().ljust(32, b"\x00")]), [name])
+
+
+async def _run(chain: DevChain, batches, statuses, prepare=None, timeout: float = 10.0, **kwargs):
+    worker = AnchorWorker(JsonRpcClient("http://devchain", transport=chain.transport()),
+                          "0x" + "11" * 20, poll_seconds=0.05, **kwargs)
+    await worker.start()
+    if prepare is not None:
+        await prepare(worker)
+    for batch in batches:
+        worker.enqueue(batch)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and any(statuses.get(b.batch_id) != "confirmed" for b in batches):
+        await asyncio.sleep(0.05)
+    await worker.stop(drain_seconds=0)
+
+
+def test_transport_failure_does_not_strand_later_anchors(statuses):
+    chain = DevChain(queue_future_nonces=True, drop_next_sends=1)
+    batches = [_batch("batch-a"), _batch("batch-b"), _batch("batch-c")]
+    asyncio.run(_run(chain, batches, statuses))
+
+    assert {b.batch_id: statuses.get(b.batch_id) for b in batches} == dict.fromkeys(
+        (b.batch_id for b in batches), "confirmed")
+    assert not chain.queued.get(DEV_ACCOUNT.lower())
+
+
+def test_timed_out_tx_behind_a_nonce_gap_is_resent(statuses):
+    chain = DevChain(queue_future_nonces=True)
+
+    async def skip_a_nonce(worker):
+        await worker._nonces.next()            # consumed locally, never sent
+
+    batch = _batch("batch-gap")
+    asyncio.run(_run(chain, [batch], statuses, prepare=skip_a_nonce, tx_timeout_seconds=0.2))
+
+    assert statuses.get(batch.batch_id) == "confirmed"
+    assert chain.merkle_roots["batch-gap"] == batch.tree.root